@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Время запуска команд CLI и загружаемые ими тяжелые модули
+
+Каждая команда запускается в отдельном процессе с -X importtime.
+Скрипт завершается с ошибкой, если collect загружает matplotlib.
+    
+    python benchmarks/import_time.py [-r 5]
+"""
+
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Any
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(PROJECT_DIR, 'main.py')
+
+# Модули, которые не должны загружаться без необходимости
+HEAVY_MODULES = ['matplotlib', 'schedule', 'numpy', 'psutil']
+
+
+def run_command(args: List[str], cwd: str) -> Dict[str, Any]:
+    """Запуск команды, время импортов (мс), общее время и тяжелые модули"""
+    started = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', MAIN] + args,
+                            cwd=cwd, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"{' '.join(args)}: {result.stderr.strip()}")
+    
+    import_us = 0
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not name.startswith('  '):
+            import_us += int(cumulative)
+        modules.add(name.strip().split('.')[0])
+    
+    return {
+        'import_ms': import_us / 1000,
+        'wall_ms': wall * 1000,
+        'heavy': [m for m in HEAVY_MODULES if m in modules]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Время запуска команд CLI')
+    parser.add_argument('-r', '--repeat', type=int, default=5,
+                        help='Число запусков каждой команды')
+    args = parser.parse_args()
+    
+    workdir = tempfile.mkdtemp(prefix='import_time_')
+    commands = {
+        'collect': ['collect', '-n', '1', '-i', '0', '-o', 'metrics.jsonl'],
+        'report': ['report', '-t', 'json', '-f', 'metrics.jsonl', '-o', 'report.json'],
+        'visualize': ['visualize', '-t', 'cpu', '-f', 'metrics.jsonl', '-o', 'cpu.png'],
+        'convert': ['convert', 'metrics.jsonl', '-o', 'metrics.seg']
+    }
+    
+    failed = False
+    try:
+        print(f"{'Команда':<12}{'Импорты, мс':>14}{'Всего, мс':>12}  Тяжелые модули")
+        for name, command in commands.items():
+            runs = [run_command(command, workdir) for _ in range(args.repeat)]
+            import_ms = statistics.median(r['import_ms'] for r in runs)
+            wall_ms = statistics.median(r['wall_ms'] for r in runs)
+            heavy = runs[-1]['heavy']
+            print(f"{name:<12}{import_ms:>14.1f}{wall_ms:>12.1f}  {', '.join(heavy) or '-'}")
+            
+            if name == 'collect' and 'matplotlib' in heavy:
+                failed = True
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    if failed:
+        print("ОШИБКА: collect загружает matplotlib", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+Замеры сбора, загрузки, отчетов и графиков
+
+Время и пиковая память (tracemalloc) методов SystemMetricsCollector._get_*_metrics,
+ReportGenerator._load_metrics, ReportGenerator._generate_*_report и
+MetricsVisualizer._create_*_chart. Наборы данных синтетические
+(src/synthetic.py), заданных размеров, в обоих форматах хранения: JSON
+Lines и сегмент. Результат пишется в JSON; с --compare он сравнивается
+с сохраненным эталоном, и при регрессиях скрипт завершается с кодом 1.
+    
+    python benchmarks/suite.py -o baseline.json
+    python benchmarks/suite.py -o current.json --compare baseline.json
+    python benchmarks/suite.py -s 1000 --only report
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import re
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Optional
+
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_DIR)
+
+import numpy as np
+from src.collector import MIN_CPU_WINDOW, SystemMetricsCollector
+from src.loader import get_cache
+from src.reporter import ReportGenerator
+from src.segment import Segment, write_segment
+from src.storage import MetricsWriter
+from src.synthetic import SyntheticGenerator
+from src.visualizer import MetricsVisualizer
+
+DEFAULT_SIZES = [1000, 100000, 1000000]
+
+# Наборы больше этого размера пишутся только сегментом: миллион
+# записей JSON Lines в памяти - несколько гигабайт вложенных словарей
+JSONL_LIMIT = 100000
+
+# Изменения меньше этих величин считаются шумом при сравнении
+MIN_DELTA_SECONDS = 0.001
+MIN_DELTA_BYTES = 256 * 1024
+
+_CHUNK = 4096
+
+
+def write_jsonl(filename: str, segment_file: str, seed: int = 0):
+    """Те же измерения в JSON Lines, со списками процессов в каждой записи"""
+    rng = np.random.default_rng(seed)
+    names = [f"worker-{i}" for i in range(30)]
+    with Segment(segment_file) as segment, MetricsWriter(filename, _CHUNK) as writer:
+        for start in range(0, len(segment), _CHUNK):
+            records = segment.to_records(start, start + _CHUNK)
+            for metric in records:
+                pids = rng.choice(len(names), 5, replace=False)
+                top = [{'pid': 1000 + int(pid), 'name': names[pid],
+                        'cpu_percent': round(float(rng.uniform(0, 50)), 1),
+                        'rss': int(rng.integers(10, 500)) * 1024 ** 2} for pid in pids]
+                metric['processes'] = {'count': metric['system']['processes'],
+                                       'top_cpu': top, 'top_memory': top}
+            writer.write_many(records)
+
+
+def measure(func: Callable, repeat: int, setup: Optional[Callable[[], tuple]] = None,
+            number: int = 1) -> Dict[str, Any]:
+    """Время number вызовов func (медиана и минимум из repeat запусков,
+    в пересчете на вызов) и пиковая память одного вызова
+    
+    setup готовит аргументы перед каждым вызовом и в замер не входит.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        elapsed = 0.0
+        for _ in range(number):
+            args = setup() if setup else ()
+            started = time.perf_counter()
+            func(*args)
+            elapsed += time.perf_counter() - started
+        times.append(elapsed / number)
+    
+    # Память - отдельным запуском: трассировка замедляет выполнение
+    args = setup() if setup else ()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    
+    return {
+        'seconds': statistics.median(times),
+        'min_seconds': min(times),
+        'runs': repeat,
+        'peak_bytes': peak
+    }
+
+
+def collector_cases(calls: int) -> Dict[str, tuple]:
+    """Методы сбора; кэш групп отключен, замеряется полная стоимость вызова"""
+    collector = SystemMetricsCollector()
+    collector.intervals = {}
+    
+    def window_passed() -> tuple:
+        # Вызовы подряд ждали бы MIN_CPU_WINDOW: замеряется чтение, не пауза
+        collector._prev_cpu_at = time.monotonic() - MIN_CPU_WINDOW
+        return ()
+    
+    cases = {}
+    for name in sorted(dir(SystemMetricsCollector)):
+        if re.fullmatch(r'_get_\w+_metrics', name):
+            method = getattr(collector, name)
+            method()  # Первый вызов заполняет базы для разностей
+            cases[name] = (method, window_passed, calls)
+    return cases
+
+
+def dataset_cases(path: str, label: str, output_dir: str) -> Dict[str, tuple]:
+    """Загрузка, отчеты и графики по одному файлу; набор загружается заново
+    перед каждым запуском, чтобы колонки не переходили между замерами"""
+    reporter = ReportGenerator()
+    visualizer = MetricsVisualizer()
+    
+    def cold_path() -> tuple:
+        get_cache().clear()
+        return (path,)
+    
+    def load() -> tuple:
+        get_cache().clear()
+        return (reporter._load_metrics(path),)
+    
+    cases = {f"_load_metrics[{label}]": (reporter._load_metrics, cold_path, 1)}
+    for name in sorted(dir(ReportGenerator)):
+        if re.fullmatch(r'_generate_\w+_report', name):
+            cases[f"{name}[{label}]"] = (getattr(reporter, name), load, 1)
+    for chart_type, name in visualizer.RENDERERS.items():
+        output_file = os.path.join(output_dir, f"{chart_type}.png")
+        render = getattr(visualizer, name)
+        cases[f"{name}[{label}]"] = (lambda dataset, render=render, output_file=output_file:
+                                     render(dataset, output_file), load, 1)
+    return cases
+
+
+def run_suite(sizes: List[int], repeat: int, calls: int, jsonl_limit: int,
+              only: List[str], workdir: str) -> Dict[str, Any]:
+    """Все замеры, имя замера -> результат"""
+    results = {}
+    
+    def selected(name: str) -> bool:
+        return not only or any(pattern in name for pattern in only)
+    
+    def run(cases: Dict[str, tuple]):
+        for name, (func, setup, number) in cases.items():
+            if not selected(name):
+                continue
+            try:
+                result = measure(func, repeat, setup, number)
+            except ValueError as e:
+                # Например, графика процессов нет для сегментов
+                results[name] = {'skipped': str(e)}
+                print(f"{name:<56}пропущен: {e}")
+                continue
+            results[name] = result
+            print(f"{name:<56}{result['seconds'] * 1000:>12.3f} мс"
+                  f"{result['peak_bytes'] / 1024 ** 2:>10.1f} МБ")
+    
+    run(collector_cases(calls))
+    for size in sizes:
+        segment_file = os.path.join(workdir, f"metrics_{size}.seg")
+        jsonl_file = os.path.join(workdir, f"metrics_{size}.jsonl")
+        segment_cases = dataset_cases(segment_file, f"segment,{size}", workdir)
+        jsonl_cases = dataset_cases(jsonl_file, f"jsonl,{size}", workdir)
+        if not any(map(selected, list(segment_cases) + list(jsonl_cases))):
+            continue
+        # JSON Lines получается из сегмента, поэтому сегмент пишется всегда
+        generator = SyntheticGenerator(start=datetime(2026, 1, 1).timestamp())
+        write_segment(segment_file, generator.next_chunk(size))
+        run(segment_cases)
+        if size > jsonl_limit:
+            print(f"JSON Lines на {size} записей пропущен (--jsonl-limit {jsonl_limit})")
+        elif any(map(selected, jsonl_cases)):
+            write_jsonl(jsonl_file, segment_file)
+            run(jsonl_cases)
+        get_cache().clear()
+    return results
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Таблица изменений относительно эталона, возвращает имена регрессий
+    
+    Время сравнивается по лучшему из запусков: минимум меньше медианы
+    зависит от фоновой нагрузки.
+    """
+    if current['meta']['machine'] != baseline['meta']['machine']:
+        print("Внимание: эталон снят в другом окружении:", baseline['meta']['machine'])
+    
+    regressions = []
+    print(f"\n{'Замер':<56}{'Время':>10}{'Память':>10}")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if not base or 'seconds' not in base or 'seconds' not in result:
+            continue
+        changes = []
+        regressed = False
+        for key, floor in (('min_seconds', MIN_DELTA_SECONDS), ('peak_bytes', MIN_DELTA_BYTES)):
+            old, new = base[key], result[key]
+            change = (new - old) / old if old else 0.0
+            changes.append(change)
+            if new - old > floor and change > tolerance:
+                regressed = True
+        mark = "  РЕГРЕССИЯ" if regressed else ""
+        print(f"{name:<56}{changes[0] * 100:>+9.1f}%{changes[1] * 100:>+9.1f}%{mark}")
+        if regressed:
+            regressions.append(name)
+    
+    missing = [name for name in baseline['results'] if name not in current['results']]
+    if missing and not current['meta']['only']:
+        print(f"Нет в текущем прогоне: {', '.join(missing)}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Замеры сбора, загрузки, отчетов и графиков')
+    parser.add_argument('-s', '--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+                        help='Размеры наборов данных через запятую')
+    parser.add_argument('-r', '--repeat', type=int, default=3,
+                        help='Число запусков каждого замера')
+    parser.add_argument('-n', '--calls', type=int, default=100,
+                        help='Число вызовов методов сбора в одном запуске')
+    parser.add_argument('--jsonl-limit', type=int, default=JSONL_LIMIT,
+                        help='Наибольший набор, который пишется и в JSON Lines')
+    parser.add_argument('--only', action='append', default=[],
+                        help='Только замеры, имя которых содержит строку (можно повторять)')
+    parser.add_argument('-o', '--output', default='benchmark.json',
+                        help='Файл результатов')
+    parser.add_argument('--compare', help='Эталон для сравнения (результаты прошлого запуска)')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Допустимый относительный рост времени и памяти')
+    args = parser.parse_args()
+    
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    
+    workdir = tempfile.mkdtemp(prefix='benchmark_')
+    try:
+        results = run_suite(sizes, args.repeat, args.calls, args.jsonl_limit,
+                            args.only, workdir)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    report = {
+        'meta': {
+            'created': datetime.now().isoformat(),
+            'machine': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpus': os.cpu_count()},
+            'sizes': sizes,
+            'repeat': args.repeat,
+            'calls': args.calls,
+            'only': args.only
+        },
+        'results': results
+    }
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Результаты сохранены в {args.output}")
+    
+    if baseline is not None:
+        regressions = compare(report, baseline, args.tolerance)
+        if regressions:
+            print(f"ОШИБКА: регрессий: {len(regressions)} (допуск {args.tolerance * 100:.0f}%)",
+                  file=sys.stderr)
+            sys.exit(1)
+        print("Регрессий нет")
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -12,13 +12,32 @@ DEFAULT_CONFIG = {
         'memory': True,
         'disk': True,
         'network': True,
-        'processes': False
+        'processes': False,  # топ процессов по CPU и памяти
+        'processes_top': 10,  # процессов в каждом топе
+        'processes_scan_batch': 25,  # процессов, перечитываемых за такт помимо лидеров
+        'processes_discovery': 5,  # сек между чтениями списка процессов
+        'overhead': False,  # время сбора по группам, CPU и RSS сборщика в каждом измерении
+        'cpu_mode': 'delta',  # 'delta' (без блокировки) или 'blocking'
+        'history_size': 3600,  # измерений в памяти сборщика
+        'intervals': {  # период обновления групп метрик, сек
+            'cpu': 1,
+            'memory': 1,
+            'disk_io': 1,
+            'disk_usage': 30,
+            'network': 1,
+            'connections': 300,
+            'system': 300,
+            'processes': 1
+        }
     },
     'reporting': {
         'format': 'text',
         'save_charts': True,
         'charts_dir': 'reports/charts',
         'reports_dir': 'reports',
+        'max_points': 2000,  # точек, достаточных для отчета/графика
+        'downsample': 'minmax',  # прореживание рядов графика: minmax, lttb, none
+        'chart_workers': 0,  # процессов для построения графиков, 0 - по числу ядер
         'max_history': 30  # дней
     },
     'scheduling': {
@@ -26,11 +45,97 @@ DEFAULT_CONFIG = {
         'weekly_day': 'monday',
         'retention_days': 7
     },
+    'jobs': {
+        'concurrency': {'hourly': 1, 'daily': 1, 'weekly': 1},  # одновременных запусков
+        'catch_up': True,  # выполнить пропущенный запуск при старте
+        'state_file': 'data/jobs_state.json',  # сроки последних запусков
+        'log_file': 'logs/jobs.jsonl',  # задержка и длительность каждого запуска
+        'history_size': 100  # последних запусков в памяти
+    },
+    'daemon': {
+        'frequencies': ['hourly', 'daily', 'weekly'],
+        'interval': 1.0,  # период сбора, сек
+        'buffer_size': 3600,  # последних измерений в памяти (окно часового отчета)
+        'store': True  # писать измерения в хранилище для дневных/недельных окон
+    },
+    'agent': {
+        'url': 'http://127.0.0.1:8765/ingest',  # адрес агрегатора
+        'host': None,  # имя узла, по умолчанию socket.gethostname()
+        'batch_size': 60,  # измерений в пакете
+        'flush_interval': 10,  # сек, наибольшая задержка отправки
+        'queue_size': 100,  # пакетов в памяти, сверх - сразу в спул
+        'timeout': 5,  # сек на запрос
+        'max_backoff': 300,  # сек, предельная пауза между попытками
+        'spool_max_mb': 100  # предел спула, при переполнении удаляются старые пакеты
+    },
+    'aggregator': {
+        'bind': '127.0.0.1',
+        'port': 8765,
+        'queue_size': 1000,  # пакетов в очереди записи, сверх - ответ 503
+        'retry_after': 5,  # сек, пауза, которую агрегатор просит при перегрузке
+        'max_batch_mb': 16  # предел пакета до и после распаковки
+    },
+    'retention': {
+        'enabled': True,  # фоновая очистка в режиме демона
+        'interval': 3600,  # сек между проходами
+        'compress_after_days': 1,  # часовые сегменты старше - в бинарный формат
+        'io_budget_mb': 5  # МБ/с чтения и записи, чтобы не мешать сбору
+    },
+    'alerts': {
+        'enabled': True,  # проверка правил на каждом измерении во время сбора
+        'log_file': 'logs/alerts.jsonl',  # события открытия и закрытия оповещений
+        # above - порог, for - сколько секунд подряд выше порога до оповещения,
+        # clear_below - ниже чего значение должно опуститься для закрытия
+        # (гистерезис), clear_after - сколько секунд продержаться там
+        'rules': [
+            {'name': 'cpu_high', 'field': 'cpu.percent_total', 'above': 80,
+             'for': 300, 'clear_below': 70, 'clear_after': 60},
+            {'name': 'memory_high', 'field': 'memory.percent', 'above': 85,
+             'for': 300, 'clear_below': 80, 'clear_after': 60},
+            {'name': 'disk_full', 'field': 'disk.percent', 'above': 90,
+             'for': 0, 'clear_below': 88}
+        ]
+    },
+    'anomaly': {
+        'enabled': True,  # пометка аномальных значений во время сбора
+        'state_file': 'data/anomaly_state.json',  # статистика между запусками
+        'save_every': 60,  # измерений между сохранениями состояния
+        'z_threshold': 4.0,  # |z| выше - аномалия
+        'warmup': 30,  # измерений до первых срабатываний
+        'merge_gap': 600,  # сек между пометками, объединяемыми в эпизод отчета
+        # half_life - полупериод забывания истории, сек: чем больше, тем
+        # заметнее медленный дрейф; min_std - нижняя граница отклонения,
+        # чтобы шум почти постоянного значения не давал аномалий
+        'fields': {
+            'cpu.percent_total': {'half_life': 3600, 'min_std': 5.0},
+            'memory.percent': {'half_life': 6 * 3600, 'min_std': 1.0},
+            'disk.percent': {'half_life': 24 * 3600, 'min_std': 0.5}
+        }
+    },
+    'replay': {
+        'speed': 0,  # ускорение воспроизведения (1000 - в 1000 раз), 0 - без пауз
+        'alerts_log': 'logs/replay_alerts.jsonl',  # оповещения воспроизведения
+        'output': 'replay.jsonl'  # файл результата (рядом - его агрегаты)
+    },
     'paths': {
         'reports': 'reports',
         'charts': 'reports/charts',
         'logs': 'logs',
-        'data': 'data'
+        'data': 'data',
+        'store': 'data/store',  # почасовые сегменты хранилища
+        'spool': 'data/spool'  # пакеты агента, еще не принятые агрегатором
+    },
+    'rollups': {
+        'enabled': True,
+        'tiers': [60, 300, 3600],  # 1m / 5m / 1h, секунды
+        'relative_accuracy': 0.01  # погрешность p95
+    },
+    'loader': {
+        'cache_mb': 256  # бюджет памяти кэша разобранных файлов
+    },
+    'storage': {
+        'flush_every': 1,  # записей между сбросами на диск
+        'fsync': False  # os.fsync после каждого сброса
     },
     'thresholds': {
         'cpu_warning': 80,  # %
@@ -40,19 +145,31 @@ DEFAULT_CONFIG = {
 }
 
 
-def ensure_directories():
-    """Создание необходимых директорий"""
-    paths = DEFAULT_CONFIG['paths']
+# Директории, уже созданные в этом процессе
+_created_directories = set()
+
+
+def ensure_directories(*paths):
+    """Создание директорий перед записью в них
     
-    for path in paths.values():
-        os.makedirs(path, exist_ok=True)
+    Без аргументов создаются все директории из конфигурации. Каждая
+    директория создается не больше одного раза за процесс.
+    """
+    if not paths:
+        paths = (*DEFAULT_CONFIG['paths'].values(),
+                 DEFAULT_CONFIG['reporting']['charts_dir'],
+                 DEFAULT_CONFIG['reporting']['reports_dir'])
     
-    # Специальные директории
-    os.makedirs(DEFAULT_CONFIG['reporting']['charts_dir'], exist_ok=True)
-    os.makedirs(DEFAULT_CONFIG['reporting']['reports_dir'], exist_ok=True)
+    for path in paths:
+        if path not in _created_directories:
+            os.makedirs(path, exist_ok=True)
+            _created_directories.add(path)
 
 
 def get_config():
-    """Получение конфигурации"""
-    ensure_directories()
+    """Получение конфигурации
+    
+    Директории не создаются: это делает тот, кто в них пишет
+    (см. ensure_directories).
+    """
     return DEFAULT_CONFIG
\ No newline at end of file
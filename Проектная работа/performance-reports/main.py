@@ -4,15 +4,41 @@ Performance Reports - CLI инструмент для мониторинга п
 """
 
 import argparse
+import glob
+import os
 import sys
 from datetime import datetime
-from src.collector import SystemMetricsCollector
-from src.visualizer import MetricsVisualizer
-from src.reporter import ReportGenerator
-from src.scheduler import ReportScheduler
-from src.validator import validate_config
+from src.validator import validate_config, validate_date_range
 from config import DEFAULT_CONFIG
 
+# Модули команд импортируются внутри веток main(): collect не должен
+# загружать matplotlib, это заметно при частом запуске из cron.
+
+
+def comma_choices(choices: list):
+    """Тип аргумента: список значений из choices через запятую"""
+    def parse(value: str) -> list:
+        types = [t.strip() for t in value.split(',') if t.strip()]
+        unknown = [t for t in types if t not in choices]
+        if not types or unknown:
+            raise argparse.ArgumentTypeError(
+                f"неизвестный тип: {', '.join(unknown) or value} "
+                f"(допустимо: {', '.join(choices)})")
+        return list(dict.fromkeys(types))
+    return parse
+
+
+def add_range_arguments(parser: argparse.ArgumentParser):
+    """Аргументы периода для чтения из хранилища"""
+    parser.add_argument('--from', dest='start',
+                        help='Начало периода (ISO, например 2026-01-01T14:00); '
+                             'метрики берутся из хранилища')
+    parser.add_argument('--to', dest='end',
+                        help='Конец периода (ISO, по умолчанию - сейчас)')
+    parser.add_argument('--host',
+                        help='Узел из хранилища агрегатора; несколько через запятую '
+                             'или all - по узлам отдельно (требует --from)')
+
 
 def parse_arguments():
     """Парсинг аргументов командной строки"""
@@ -22,9 +48,23 @@ def parse_arguments():
         epilog="""
 Примеры использования:
   python main.py collect -n 5 -i 2     # Собрать 5 метрик с интервалом 2 сек
+  python main.py collect --store        # Сбор в почасовое хранилище
   python main.py report -t html         # Сгенерировать HTML отчет
+  python main.py report -t text,html,json  # Все форматы за один проход
+  python main.py report -t interactive -o report.html  # HTML с графиками в браузере
   python main.py visualize -t cpu       # Построить график загрузки CPU
+  python main.py visualize -t cpu,memory,network,disk  # Графики параллельно
+  python main.py report --from 2026-01-01T14:00 --to 2026-01-01T16:00
   python main.py schedule daily         # Запустить ежедневные отчеты
+  python main.py daemon                 # Фоновый сбор и все отчеты в одном процессе
+  python main.py aggregator             # Прием метрик от агентов
+  python main.py agent -u http://host:8765/ingest  # Отправка метрик агрегатору
+  python main.py report --from 2026-01-01T14:00 --host web1,web2
+  python main.py compact                # Очистка по retention_days/max_history
+  python main.py convert                # Перевести data/metrics_*.json(l) в сегменты
+  python main.py replay -f metrics.jsonl --speed 1000  # Воспроизвести запись
+  python main.py replay --synthetic 1000000  # Синтетическая нагрузка без пауз
+  python main.py generate -n 10000000 -o load.seg  # Синтетический набор
         """
     )
     
@@ -36,25 +76,34 @@ def parse_arguments():
                               help='Количество измерений')
     collect_parser.add_argument('-i', '--interval', type=float, default=1.0,
                               help='Интервал между измерениями (секунды)')
-    collect_parser.add_argument('-o', '--output', default='metrics.json',
-                              help='Файл для сохранения метрик')
+    collect_parser.add_argument('-o', '--output', default='metrics.jsonl',
+                              help='Файл для сохранения метрик (JSON Lines, дозапись)')
+    collect_parser.add_argument('--store', action='store_true',
+                              help='Писать в почасовое хранилище вместо файла')
     
     # Команда report
     report_parser = subparsers.add_parser('report', help='Генерация отчетов')
-    report_parser.add_argument('-t', '--type', choices=['text', 'html', 'json'], 
-                              default='text', help='Тип отчета')
-    report_parser.add_argument('-f', '--file', default='metrics.json',
+    report_parser.add_argument('-t', '--type',
+                              type=comma_choices(['text', 'html', 'interactive', 'json']),
+                              default=['text'],
+                              help='Тип отчета: text, html, interactive, json '
+                                   'или несколько через запятую')
+    report_parser.add_argument('-f', '--file', default='metrics.jsonl',
                               help='Файл с метриками')
     report_parser.add_argument('-o', '--output', help='Выходной файл')
+    add_range_arguments(report_parser)
     
     # Команда visualize
     viz_parser = subparsers.add_parser('visualize', help='Визуализация данных')
     viz_parser.add_argument('-t', '--type', required=True,
-                          choices=['cpu', 'memory', 'disk', 'network', 'all'],
-                          help='Тип графика')
-    viz_parser.add_argument('-f', '--file', default='metrics.json',
+                          type=comma_choices(['cpu', 'memory', 'disk', 'network',
+                                              'processes', 'all']),
+                          help='Тип графика: cpu, memory, disk, network, processes, all '
+                               'или несколько через запятую')
+    viz_parser.add_argument('-f', '--file', default='metrics.jsonl',
                           help='Файл с метриками')
     viz_parser.add_argument('-o', '--output', help='Выходной файл')
+    add_range_arguments(viz_parser)
     
     # Команда schedule
     schedule_parser = subparsers.add_parser('schedule', help='Планирование отчетов')
@@ -63,45 +112,255 @@ def parse_arguments():
     schedule_parser.add_argument('-c', '--continuous', action='store_true',
                                help='Непрерывный режим')
     
+    # Команда daemon
+    daemon_parser = subparsers.add_parser(
+        'daemon', help='Фоновый сбор и отчеты по расписанию в одном процессе')
+    daemon_parser.add_argument('-f', '--frequencies',
+                               type=comma_choices(['hourly', 'daily', 'weekly']),
+                               help='Частоты отчетов через запятую '
+                                    '(по умолчанию из daemon.frequencies)')
+    daemon_parser.add_argument('-i', '--interval', type=float,
+                               help='Интервал сбора (секунды)')
+    daemon_parser.add_argument('--no-store', action='store_true',
+                               help='Не писать в хранилище, только буфер в памяти')
+    
+    # Команда agent
+    agent_parser = subparsers.add_parser('agent', help='Сбор и отправка метрик агрегатору')
+    agent_parser.add_argument('-u', '--url', help='Адрес агрегатора (по умолчанию agent.url)')
+    agent_parser.add_argument('--host', help='Имя узла (по умолчанию имя машины)')
+    agent_parser.add_argument('-n', '--count', type=int,
+                              help='Количество измерений (по умолчанию - до Ctrl+C)')
+    agent_parser.add_argument('-i', '--interval', type=float, default=1.0,
+                              help='Интервал между измерениями (секунды)')
+    
+    # Команда aggregator
+    aggregator_parser = subparsers.add_parser(
+        'aggregator', help='Прием метрик от агентов и запись по узлам')
+    aggregator_parser.add_argument('--bind', help='Адрес (по умолчанию aggregator.bind)')
+    aggregator_parser.add_argument('-p', '--port', type=int,
+                                   help='Порт (по умолчанию aggregator.port)')
+    
+    # Команда compact
+    compact_parser = subparsers.add_parser(
+        'compact', help='Сжатие и удаление данных, отчетов и графиков по сроку')
+    compact_parser.add_argument('--dry-run', action='store_true',
+                                help='Только показать, что будет сделано')
+    compact_parser.add_argument('--max-seconds', type=float,
+                                help='Ограничение времени прохода (остальное - в следующий)')
+    
+    # Команда convert
+    convert_parser = subparsers.add_parser('convert',
+                                           help='Конвертация метрик в бинарные сегменты')
+    convert_parser.add_argument('files', nargs='*',
+                                help='Файлы с метриками (по умолчанию data/metrics_*.json, '
+                                     'data/metrics_*.jsonl)')
+    convert_parser.add_argument('-o', '--output',
+                                help='Выходной файл (только для одного входного файла)')
+    
+    # Команда replay
+    replay_parser = subparsers.add_parser(
+        'replay', help='Воспроизведение записанных метрик через конвейер сбора')
+    replay_parser.add_argument('-f', '--file', default='metrics.jsonl',
+                               help='Файл с метриками')
+    add_range_arguments(replay_parser)
+    replay_parser.add_argument('--synthetic', type=int, metavar='N',
+                               help='Вместо записи - N синтетических измерений')
+    replay_parser.add_argument('--step', type=float, default=1.0,
+                               help='Шаг синтетических измерений (секунды)')
+    replay_parser.add_argument('--seed', type=int, default=0,
+                               help='Зерно генератора синтетических измерений')
+    replay_parser.add_argument('--speed', type=float,
+                               help='Ускорение (по умолчанию replay.speed; 0 - без пауз)')
+    replay_parser.add_argument('-o', '--output',
+                               help='Файл результата (по умолчанию replay.output)')
+    
+    # Команда generate
+    generate_parser = subparsers.add_parser(
+        'generate', help='Синтетический набор метрик для нагрузочных испытаний')
+    generate_parser.add_argument('-n', '--count', type=int, default=86400,
+                                 help='Количество измерений')
+    generate_parser.add_argument('-o', '--output', default='synthetic.jsonl',
+                                 help='Выходной файл (.seg - сегмент, иначе JSON Lines)')
+    generate_parser.add_argument('--step', type=float, default=1.0,
+                                 help='Шаг между измерениями (секунды)')
+    generate_parser.add_argument('--seed', type=int, default=0,
+                                 help='Зерно генератора')
+    
+    # Профилирование доступно в каждой команде
+    for command_parser in subparsers.choices.values():
+        command_parser.add_argument('--profile', nargs='?', const='', metavar='FILE',
+                                    help='Записать профиль cProfile (по умолчанию '
+                                         'logs/profile_<команда>_<время>.prof)')
+    
     return parser.parse_args()
 
 
+def check_range_arguments(args):
+    """Проверка согласованности --from/--to"""
+    if args.end and not args.start:
+        raise ValueError("Параметр --to требует --from")
+    if args.host and not args.start:
+        raise ValueError("Параметр --host требует --from")
+
+
+def resolve_hosts(args) -> list:
+    """Узлы из --host: перечисленные или все узлы хранилища (all)"""
+    if not args.host:
+        return []
+    if args.host == 'all':
+        from src.store import list_hosts
+        
+        hosts = list_hosts(DEFAULT_CONFIG['paths']['store'])
+        if not hosts:
+            raise ValueError("В хранилище нет данных узлов")
+        return hosts
+    return list(dict.fromkeys(h.strip() for h in args.host.split(',') if h.strip()))
+
+
 def main():
     """Основная функция CLI"""
     args = parse_arguments()
     
+    profiler = None
+    if getattr(args, 'profile', None) is not None:
+        from src.profiling import Profiler
+        
+        profile_file = args.profile or os.path.join(
+            DEFAULT_CONFIG['paths']['logs'],
+            f"profile_{args.command}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.prof")
+        profiler = Profiler(profile_file)
+        profiler.start()
+    
     try:
         validate_config(DEFAULT_CONFIG)
         
         if args.command == 'collect':
+            from src.collector import SystemMetricsCollector
+            from src.storage import MetricsWriter
+            from src.store import MetricsStore
+            from src.rollups import RollupManager, RollupWriter
+            from src.alerts import AlertEngine
+            from src.anomaly import AnomalyDetector
+            
             print(f"Сбор метрик ({args.count} измерений, интервал {args.interval} сек)...")
             collector = SystemMetricsCollector()
-            metrics = collector.collect_continuous(args.count, args.interval)
-            collector.save_metrics(metrics, args.output)
-            print(f"Метрики сохранены в {args.output}")
+            storage = DEFAULT_CONFIG['storage']
+            if args.store:
+                destination = DEFAULT_CONFIG['paths']['store']
+                writer = MetricsStore(destination).writer(storage['flush_every'],
+                                                          storage['fsync'])
+                rollup_writer = RollupWriter.for_store(destination)
+                anomaly_state = None
+            else:
+                destination = args.output
+                writer = MetricsWriter(args.output, storage['flush_every'],
+                                       storage['fsync'])
+                rollup_writer = RollupWriter.for_file(args.output)
+                # Разовый сбор в файл не трогает общее состояние детектора
+                anomaly_state = f"{os.path.splitext(args.output)[0]}.anomaly.json"
+            
+            # Детектор первым: пометки аномалий попадают в запись измерения
+            detector = None
+            if DEFAULT_CONFIG['anomaly']['enabled']:
+                detector = AnomalyDetector(state_file=anomaly_state)
+                collector.add_listener(detector)
+            rollups = None
+            if DEFAULT_CONFIG['rollups']['enabled']:
+                rollups = RollupManager(rollup_writer, DEFAULT_CONFIG['rollups']['tiers'],
+                                        relative_accuracy=DEFAULT_CONFIG['rollups']['relative_accuracy'])
+                collector.add_listener(rollups)
+            alerts = None
+            if DEFAULT_CONFIG['alerts']['enabled']:
+                alerts = AlertEngine()
+                collector.add_listener(alerts)
+            # Агрегаты, журнал оповещений и состояние детектора сохраняются
+            # при любом завершении, в том числе при ошибке записи
+            try:
+                with writer:
+                    try:
+                        for metric in collector.iter_samples(args.count, args.interval):
+                            writer.write(metric)
+                    except KeyboardInterrupt:
+                        print("\nОстановка сбора...")
+            finally:
+                if rollups:
+                    rollups.close()
+                if alerts:
+                    alerts.close()
+                if detector:
+                    detector.close()
+            if alerts:
+                for incident in alerts.active():
+                    print(f"Активно оповещение {incident['rule']} с {incident['start']}")
+            if detector:
+                print(f"Аномальных значений: {detector.flagged}")
+            print(f"Метрики сохранены в {destination}")
+            print(f"Пропущено тактов: {collector.missed_ticks}, "
+                  f"макс. задержка: {collector.max_lag * 1000:.1f} мс")
             
         elif args.command == 'report':
-            print(f"Генерация {args.type} отчета...")
+            from src.reporter import ReportGenerator, write_report
+            
+            check_range_arguments(args)
+            hosts = resolve_hosts(args)
+            print(f"Генерация отчетов: {', '.join(args.type)}...")
             reporter = ReportGenerator()
-            report = reporter.generate_report(args.file, args.type)
+            if len(hosts) > 1:
+                for host in hosts:
+                    reports = reporter.generate_reports(args.file, args.type, args.start,
+                                                        args.end, host, stream=True)
+                    for report_type, path in reporter.save_reports(reports, args.output,
+                                                                   host).items():
+                        print(f"Отчет {report_type} ({host}) сохранен в {path}")
+                return
             
+            reports = reporter.generate_reports(args.file, args.type, args.start, args.end,
+                                                hosts[0] if hosts else None, stream=True)
+            
+            if len(reports) > 1:
+                for report_type, path in reporter.save_reports(reports, args.output).items():
+                    print(f"Отчет {report_type} сохранен в {path}")
+                return
+            
+            report_type, report = next(iter(reports.items()))
             if args.output:
                 with open(args.output, 'w') as f:
-                    f.write(report)
+                    write_report(f, report)
                 print(f"Отчет сохранен в {args.output}")
             else:
-                if args.type == 'text':
+                report = "".join(report)
+                if report_type == 'text':
                     print(report)
                 else:
                     print(f"Отчет сгенерирован ({len(report)} байт)")
                     
         elif args.command == 'visualize':
-            print(f"Создание графика: {args.type}...")
+            from src.visualizer import MetricsVisualizer
+            
+            check_range_arguments(args)
+            hosts = resolve_hosts(args)
+            print(f"Создание графиков: {', '.join(args.type)}...")
             visualizer = MetricsVisualizer()
-            output_file = visualizer.create_chart(args.file, args.type, args.output)
-            print(f"График сохранен в {output_file}")
+            output_files = None
+            if args.output:
+                if len(args.type) == 1:
+                    output_files = {args.type[0]: args.output}
+                else:
+                    base, ext = os.path.splitext(args.output)
+                    output_files = {t: f"{base}_{t}{ext or '.png'}" for t in args.type}
+            if len(hosts) > 1:
+                charts = visualizer.create_host_charts(hosts, args.type, output_files,
+                                                       args.start, args.end)
+            else:
+                charts = visualizer.create_charts(args.file, args.type, output_files,
+                                                  args.start, args.end,
+                                                  hosts[0] if hosts else None)
+            for output_file in charts.values():
+                print(f"График сохранен в {output_file}")
             
         elif args.command == 'schedule':
+            from src.scheduler import ReportScheduler
+            
             print(f"Запуск планировщика ({args.frequency} отчеты)...")
             scheduler = ReportScheduler()
             if args.continuous:
@@ -109,6 +368,178 @@ def main():
             else:
                 scheduler.run_once(args.frequency)
                 
+        elif args.command == 'daemon':
+            from src.daemon import MetricsDaemon
+            
+            daemon = MetricsDaemon(args.frequencies, args.interval,
+                                   False if args.no_store else None)
+            daemon.run_forever()
+                
+        elif args.command == 'agent':
+            from src.agent import MetricsAgent
+            from src.anomaly import AnomalyDetector
+            from src.collector import SystemMetricsCollector
+            
+            agent = MetricsAgent(args.url, args.host)
+            collector = SystemMetricsCollector()
+            detector = None
+            if DEFAULT_CONFIG['anomaly']['enabled']:
+                detector = AnomalyDetector()
+                collector.add_listener(detector)
+            collector.add_listener(agent)
+            print(f"Агент {agent.host}: отправка на {agent.url}, интервал {args.interval} сек")
+            if args.count is None:
+                print("Нажмите Ctrl+C для остановки")
+            with agent:
+                try:
+                    for _ in collector.iter_samples(args.count, args.interval):
+                        pass
+                except KeyboardInterrupt:
+                    print("\nОстановка агента...")
+            if detector:
+                detector.close()
+            
+            stats = agent.stats
+            spooled, size = agent.spool_size()
+            print(f"Измерений: {stats['collected']}, отправлено пакетов: {stats['sent']}, "
+                  f"из спула: {stats['resent']}, удалено при переполнении: {stats['dropped']}")
+            if spooled:
+                print(f"В спуле {spooled} пакетов ({size / 1024:.1f} КБ), "
+                      f"будут отправлены при следующем запуске")
+                
+        elif args.command == 'aggregator':
+            from src.aggregator import MetricsAggregator
+            
+            MetricsAggregator(args.bind, args.port).serve_forever()
+                
+        elif args.command == 'compact':
+            from src.retention import RetentionEngine
+            
+            result = RetentionEngine(dry_run=args.dry_run).run(args.max_seconds)
+            print(f"Сжато сегментов: {result['compressed']}, "
+                  f"свернуто в агрегаты: {result['rolled_up']}, "
+                  f"удалено файлов: {result['deleted']}, ошибок: {result['failed']}")
+            print(f"Освобождено: {result['reclaimed_bytes'] / 1024 ** 2:.1f} МБ "
+                  f"за {result['seconds']:.1f} сек")
+            if not result['complete']:
+                print("Проход прерван, оставшееся будет обработано в следующий раз")
+                
+        elif args.command == 'convert':
+            from src.storage import convert_to_segment
+            
+            data_dir = DEFAULT_CONFIG['paths']['data']
+            files = args.files or sorted(
+                glob.glob(os.path.join(data_dir, 'metrics_*.json')) +
+                glob.glob(os.path.join(data_dir, 'metrics_*.jsonl')))
+            if args.output and len(files) != 1:
+                raise ValueError("Параметр -o допустим только для одного файла")
+            if not files:
+                print("Нет файлов для конвертации")
+            
+            for source in files:
+                target, rows = convert_to_segment(source, args.output)
+                print(f"{source} -> {target} ({rows} записей)")
+                
+        elif args.command == 'replay':
+            from src.replay import MetricsReplayer
+            from src.storage import MetricsWriter, iter_metrics
+            from src.rollups import RollupManager, RollupWriter
+            from src.alerts import AlertEngine
+            from src.anomaly import AnomalyDetector
+            
+            settings = DEFAULT_CONFIG['replay']
+            speed = settings['speed'] if args.speed is None else args.speed
+            output = args.output or settings['output']
+            if os.path.exists(output):
+                raise ValueError(f"Файл {output} уже существует")
+            if args.synthetic:
+                from src.synthetic import SyntheticGenerator, iter_synthetic
+                
+                start = datetime.now().timestamp() - args.synthetic * args.step
+                records = iter_synthetic(args.synthetic,
+                                         SyntheticGenerator(start, args.step, args.seed))
+                source = f"{args.synthetic} синтетических измерений"
+            elif args.start:
+                from src.schema import parse_datetime
+                from src.store import MetricsStore, host_root
+                
+                check_range_arguments(args)
+                hosts = resolve_hosts(args)
+                if len(hosts) > 1:
+                    raise ValueError("Воспроизведение - по одному узлу")
+                end = args.end or datetime.now().isoformat()
+                validate_date_range(args.start, end)
+                root = DEFAULT_CONFIG['paths']['store']
+                if hosts:
+                    root = host_root(root, hosts[0])
+                records = MetricsStore(root).iter_range(parse_datetime(args.start),
+                                                        parse_datetime(end))
+                source = f"{root} за {args.start} - {end}"
+            else:
+                records = iter_metrics(args.file)
+                source = args.file
+            
+            # Тот же конвейер, что у collect; состояние детектора живого
+            # сбора не читается и не перезаписывается
+            replayer = MetricsReplayer(records, speed)
+            detector = None
+            if DEFAULT_CONFIG['anomaly']['enabled']:
+                detector = AnomalyDetector(persist=False)
+                replayer.add_listener(detector)
+            rollups = None
+            if DEFAULT_CONFIG['rollups']['enabled']:
+                rollups = RollupManager(RollupWriter.for_file(output),
+                                        DEFAULT_CONFIG['rollups']['tiers'],
+                                        relative_accuracy=DEFAULT_CONFIG['rollups']['relative_accuracy'])
+                replayer.add_listener(rollups)
+            alerts = None
+            if DEFAULT_CONFIG['alerts']['enabled']:
+                alerts = AlertEngine(log_file=settings['alerts_log'])
+                replayer.add_listener(alerts)
+            
+            print(f"Воспроизведение: {source}, "
+                  f"{'без пауз' if speed <= 0 else f'ускорение {speed:g}x'}...")
+            started = datetime.now()
+            storage = DEFAULT_CONFIG['storage']
+            try:
+                with MetricsWriter(output, storage['flush_every'], storage['fsync']) as writer:
+                    try:
+                        for metric in replayer.iter_samples():
+                            writer.write(metric)
+                    except KeyboardInterrupt:
+                        print("\nОстановка воспроизведения...")
+            finally:
+                if rollups:
+                    rollups.close()
+                if alerts:
+                    alerts.close()
+            if alerts:
+                print(f"Событий оповещений: {alerts.events} (журнал {alerts.log_file})")
+            if detector:
+                print(f"Аномальных значений: {detector.flagged}")
+            
+            seconds = (datetime.now() - started).total_seconds()
+            print(f"Воспроизведено {replayer.replayed} измерений за {seconds:.1f} сек "
+                  f"({replayer.replayed / max(seconds, 1e-9):.0f} в сек), "
+                  f"пропущено: {replayer.skipped}")
+            if replayer.first is not None:
+                span = replayer.last - replayer.first
+                print(f"Период записи: {span / 3600:.1f} ч, "
+                      f"фактическое ускорение: {span / max(seconds, 1e-9):.0f}x")
+            if speed > 0:
+                print(f"Макс. отставание от графика: {replayer.max_lag * 1000:.1f} мс")
+            print(f"Метрики сохранены в {output}")
+            
+        elif args.command == 'generate':
+            from src.synthetic import SyntheticGenerator, write_synthetic
+            
+            if os.path.exists(args.output):
+                raise ValueError(f"Файл {args.output} уже существует")
+            start = datetime.now().timestamp() - args.count * args.step
+            rows = write_synthetic(args.output, args.count,
+                                   SyntheticGenerator(start, args.step, args.seed))
+            print(f"Синтетические метрики ({rows} записей) сохранены в {args.output}")
+            
         else:
             print("Используйте --help для просмотра доступных команд")
             sys.exit(1)
@@ -116,7 +547,14 @@ def main():
     except Exception as e:
         print(f"Ошибка: {e}", file=sys.stderr)
         sys.exit(1)
+    finally:
+        if profiler is not None:
+            summary = profiler.stop()
+            if summary:
+                print(summary)
+                print(f"Профиль сохранен в {profiler.filename}")
 
 
-# Прямой запуск программы
-main()
\ No newline at end of file
+# Прямой запуск программы (защита нужна рабочим процессам графиков)
+if __name__ == '__main__':
+    main()
\ No newline at end of file
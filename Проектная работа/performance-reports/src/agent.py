@@ -0,0 +1,233 @@
+"""
+Агент: отправка измерений агрегатору сжатыми пакетами
+"""
+
+import glob
+import hashlib
+import json
+import os
+import queue
+import socket
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from typing import Dict, List, Any, Optional, Tuple
+from config import get_config, ensure_directories
+from .schema import with_offset
+
+# Расширение файлов спула: пакет в том же виде, в каком уходит по сети
+SPOOL_EXTENSION = '.jsonl.gz'
+
+
+def encode_batch(metrics: List[Dict[str, Any]]) -> bytes:
+    """Пакет измерений: JSON Lines, сжатый gzip"""
+    lines = '\n'.join(json.dumps(m, ensure_ascii=False, separators=(',', ':'))
+                      for m in metrics)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    return compressor.compress(lines.encode('utf-8')) + compressor.flush()
+
+
+def decode_batch(payload: bytes, max_size: int = 0) -> List[Dict[str, Any]]:
+    """Разбор пакета; max_size ограничивает объем после распаковки"""
+    decompressor = zlib.decompressobj(31)
+    data = decompressor.decompress(payload, max_size)
+    if decompressor.unconsumed_tail:
+        raise ValueError("Пакет после распаковки больше допустимого")
+    if not decompressor.eof:
+        raise ValueError("Пакет поврежден или обрезан")
+    return [json.loads(line) for line in data.decode('utf-8').splitlines() if line.strip()]
+
+
+class MetricsAgent:
+    """Отправка измерений агрегатору по HTTP
+    
+    Агент подключается к сборщику как слушатель и копит измерения в
+    пакет. Полный пакет (agent.batch_size записей или agent.flush_interval
+    секунд) сжимается и ставится в очередь, откуда его отправляет
+    отдельный поток, так что сбор никогда не ждет сеть.
+    
+    Если агрегатор недоступен или перегружен (503), пакет ложится в
+    локальный спул, а следующая попытка делается после паузы: Retry-After
+    агрегатора или удваивающейся до agent.max_backoff. Перед отправкой
+    нового пакета спул выгружается от старых пакетов к новым. Спул ограничен
+    agent.spool_max_mb, при переполнении удаляются самые старые пакеты.
+    """
+    
+    def __init__(self, url: Optional[str] = None, host: Optional[str] = None):
+        self.config = get_config()
+        settings = self.config['agent']
+        self.url = url or settings['url']
+        self.host = host or settings['host'] or socket.gethostname()
+        self.batch_size = settings['batch_size']
+        self.flush_interval = settings['flush_interval']
+        self.timeout = settings['timeout']
+        self.max_backoff = settings['max_backoff']
+        self.spool_dir = self.config['paths']['spool']
+        self.spool_limit = settings['spool_max_mb'] * 1024 ** 2
+        self.stats = {'collected': 0, 'sent': 0, 'spooled': 0, 'resent': 0,
+                      'dropped': 0, 'failures': 0}
+        self._batch = []
+        self._batch_started = time.monotonic()
+        self._queue = queue.Queue(maxsize=settings['queue_size'])
+        self._spool_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._failures = 0
+        self._retry_at = 0.0
+    
+    def __call__(self, metric: Dict[str, Any]):
+        """Слушатель сборщика: добавление измерения в текущий пакет"""
+        if not self._batch:
+            self._batch_started = time.monotonic()
+        # Время со смещением пояса: агрегатор может работать в другом поясе
+        self._batch.append(dict(metric, host=self.host,
+                                timestamp=with_offset(metric['timestamp'])))
+        self.stats['collected'] += 1
+        if len(self._batch) >= self.batch_size or \
+                time.monotonic() - self._batch_started >= self.flush_interval:
+            self.flush()
+    
+    def flush(self):
+        """Передача текущего пакета на отправку (в спул, если очередь полна)"""
+        if not self._batch:
+            return
+        payload = encode_batch(self._batch)
+        self._batch = []
+        try:
+            self._queue.put_nowait(payload)
+        except queue.Full:
+            self._spool(payload)
+    
+    def start(self):
+        """Запуск потока отправки"""
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._send_loop,
+                                            name='agent-sender', daemon=True)
+            self._thread.start()
+    
+    def close(self):
+        """Отправка остатка; не отправленное остается в спуле до следующего запуска"""
+        self.flush()
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        while True:
+            try:
+                self._spool(self._queue.get_nowait())
+            except queue.Empty:
+                break
+    
+    def __enter__(self):
+        self.start()
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def spool_size(self) -> Tuple[int, int]:
+        """Число пакетов и байт в спуле"""
+        files = self._spool_files()
+        return len(files), sum(os.path.getsize(path) for path in files)
+    
+    def _send_loop(self):
+        """Поток отправки: спул, затем очередь; при ошибке - пауза"""
+        while not (self._stop.is_set() and self._queue.empty()):
+            try:
+                payload = self._queue.get(timeout=min(self.flush_interval, 1.0))
+            except queue.Empty:
+                payload = None
+            
+            if time.monotonic() < self._retry_at:
+                # Агрегатор недоступен: новые пакеты сразу в спул
+                if payload is not None:
+                    self._spool(payload)
+                continue
+            
+            # Сначала спул: агрегатор получает записи узла по порядку времени
+            if not self._stop.is_set() and not self._drain_spool():
+                if payload is not None:
+                    self._spool(payload)
+                continue
+            if payload is not None and not self._send(payload):
+                self._spool(payload)
+    
+    def _drain_spool(self) -> bool:
+        """Отправка пакетов из спула от старых к новым; False - до первой ошибки"""
+        for path in self._spool_files():
+            if self._stop.is_set():
+                return True
+            try:
+                with open(path, 'rb') as f:
+                    payload = f.read()
+            except OSError:
+                continue
+            if not self._send(payload):
+                return False
+            with self._spool_lock:
+                if os.path.exists(path):
+                    os.remove(path)
+            self.stats['resent'] += 1
+        return True
+    
+    def _send(self, payload: bytes) -> bool:
+        """Отправка пакета; False - агрегатор недоступен, повторить позже"""
+        request = urllib.request.Request(self.url, data=payload, method='POST', headers={
+            'Content-Type': 'application/x-ndjson',
+            'Content-Encoding': 'gzip',
+            'X-Metrics-Host': self.host,
+            # Повтор пакета, ответ на который потерялся, агрегатор пропустит
+            'X-Batch-Id': hashlib.sha1(payload).hexdigest()
+        })
+        retry_after = None
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                response.read()
+        except urllib.error.HTTPError as e:
+            if e.code < 500:
+                # Пакет отвергнут по содержимому, повтор не поможет
+                print(f"Агрегатор отклонил пакет: {e.code} {e.reason}")
+                self.stats['dropped'] += 1
+                return True
+            retry_after = e.headers.get('Retry-After')
+        except (urllib.error.URLError, OSError):
+            pass
+        else:
+            self.stats['sent'] += 1
+            self._failures = 0
+            return True
+        
+        self.stats['failures'] += 1
+        self._failures += 1
+        delay = min(self.max_backoff, 2 ** min(self._failures - 1, 16))
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, int(retry_after))
+        self._retry_at = time.monotonic() + delay
+        return False
+    
+    def _spool(self, payload: bytes):
+        """Сохранение пакета на диск с ограничением размера спула"""
+        with self._spool_lock:
+            ensure_directories(self.spool_dir)
+            path = os.path.join(self.spool_dir, f"{time.time_ns()}{SPOOL_EXTENSION}")
+            with open(path + '.tmp', 'wb') as f:
+                f.write(payload)
+            os.replace(path + '.tmp', path)
+            self.stats['spooled'] += 1
+            
+            files = self._spool_files()
+            sizes = [os.path.getsize(p) for p in files]
+            total = sum(sizes)
+            for old_path, size in zip(files, sizes):
+                if total <= self.spool_limit:
+                    break
+                os.remove(old_path)
+                total -= size
+                self.stats['dropped'] += 1
+    
+    def _spool_files(self) -> List[str]:
+        # Имена - время в наносекундах, сортировка по имени дает порядок записи
+        return sorted(glob.glob(os.path.join(self.spool_dir, '*' + SPOOL_EXTENSION)))
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""
+Агрегатор: прием пакетов измерений от агентов и запись по узлам
+"""
+
+import json
+import queue
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Optional, Tuple
+from config import get_config
+from .agent import decode_batch
+from .rollups import RollupManager, RollupWriter
+from .schema import parse_timestamp, format_timestamp
+from .store import MetricsStore, host_root, safe_host_name
+
+# Сколько последних идентификаторов пакетов помнить для отсева повторов
+SEEN_BATCHES = 10000
+
+
+class _HostSink:
+    """Запись измерений одного узла в его хранилище и агрегаты"""
+    
+    def __init__(self, root: str, config: Dict[str, Any]):
+        storage = config['storage']
+        self.writer = MetricsStore(root).writer(storage['flush_every'], storage['fsync'])
+        self.rollups = None
+        rollups = config['rollups']
+        if rollups['enabled']:
+            self.rollups = RollupManager(RollupWriter.for_store(root), rollups['tiers'],
+                                         relative_accuracy=rollups['relative_accuracy'])
+        self.last = float('-inf')
+        self.late = 0
+    
+    def write(self, metric: Dict[str, Any]):
+        self.writer.write(metric)
+        moment = parse_timestamp(metric['timestamp'])
+        if moment > self.last:
+            self.last = moment
+            if self.rollups is not None:
+                self.rollups.add(metric)
+        else:
+            # Запоздавшие записи (из спула агента) идут только в сырые
+            # данные: их интервалы агрегатов уже закрыты
+            self.late += 1
+    
+    def close(self):
+        if self.rollups is not None:
+            self.rollups.close()
+        self.writer.close()
+
+
+class _IngestHandler(BaseHTTPRequestHandler):
+    """POST /ingest - пакет измерений, GET /status - состояние агрегатора"""
+    
+    server_version = 'PerformanceReports'
+    
+    def do_POST(self):
+        if self.path != '/ingest':
+            self._reply(404, {'error': 'not found'})
+            return
+        aggregator = self.server.aggregator
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+        except ValueError:
+            length = -1
+        if length <= 0 or length > aggregator.max_batch:
+            self.close_connection = True
+            self._reply(413, {'error': 'invalid batch size'})
+            return
+        
+        payload = self.rfile.read(length)
+        status, body = aggregator.ingest(payload, self.headers.get('X-Metrics-Host'),
+                                         self.headers.get('X-Batch-Id'))
+        headers = {'Retry-After': str(aggregator.retry_after)} if status == 503 else {}
+        self._reply(status, body, headers)
+    
+    def do_GET(self):
+        if self.path != '/status':
+            self._reply(404, {'error': 'not found'})
+            return
+        self._reply(200, self.server.aggregator.status())
+    
+    def _reply(self, status: int, body: Dict[str, Any], headers: Dict[str, str] = None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, format, *args):
+        # Журнал каждого запроса не нужен: итоги доступны в /status
+        pass
+
+
+class MetricsAggregator:
+    """Прием измерений от агентов по HTTP
+    
+    Пакеты разбираются в потоках HTTP-сервера и ставятся в ограниченную
+    очередь (aggregator.queue_size). Единственный поток записи
+    раскладывает записи по узлам: у каждого узла свое хранилище
+    <paths.store>/hosts/<узел>/ с часовыми сегментами и агрегатами.
+    Переполненная очередь - ответ 503 с Retry-After, и агент
+    придерживает пакеты в своем спуле (обратное давление).
+    """
+    
+    def __init__(self, bind: Optional[str] = None, port: Optional[int] = None,
+                 root: Optional[str] = None):
+        self.config = get_config()
+        settings = self.config['aggregator']
+        self.bind = settings['bind'] if bind is None else bind
+        self.port = settings['port'] if port is None else port
+        self.root = root or self.config['paths']['store']
+        self.retry_after = settings['retry_after']
+        self.max_batch = settings['max_batch_mb'] * 1024 ** 2
+        self.stats = {'batches': 0, 'records': 0, 'duplicates': 0, 'rejected': 0,
+                      'throttled': 0, 'errors': 0}
+        self._queue = queue.Queue(maxsize=settings['queue_size'])
+        self._seen = OrderedDict()
+        self._lock = threading.Lock()
+        self._sinks = {}
+        self._server = None
+        self._threads = []
+    
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Фактический адрес сервера (при port=0 порт выбирает система)"""
+        return self._server.server_address[:2] if self._server else (self.bind, self.port)
+    
+    def start(self):
+        """Запуск сервера и потока записи в фоне"""
+        if self._server is not None:
+            return
+        self._server = ThreadingHTTPServer((self.bind, self.port), _IngestHandler)
+        self._server.daemon_threads = True
+        self._server.aggregator = self
+        self._threads = [
+            threading.Thread(target=self._write_loop, name='aggregator-writer', daemon=True),
+            threading.Thread(target=self._server.serve_forever, name='aggregator-http',
+                             daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+    
+    def stop(self):
+        """Остановка приема, запись очереди и закрытие сегментов"""
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        for sink in self._sinks.values():
+            sink.close()
+        self._sinks.clear()
+        self._server = None
+    
+    def serve_forever(self):
+        """Работа до Ctrl+C"""
+        self.start()
+        host, port = self.address
+        print(f"Агрегатор слушает http://{host}:{port}/ingest, "
+              f"хранилище узлов: {self.root}")
+        print("Нажмите Ctrl+C для остановки")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            print("\nОстановка агрегатора...")
+        finally:
+            self.stop()
+            print(f"Принято пакетов: {self.stats['batches']}, записей: {self.stats['records']}, "
+                  f"отклонено: {self.stats['rejected']}, "
+                  f"отложено (503): {self.stats['throttled']}")
+    
+    def ingest(self, payload: bytes, host: Optional[str] = None,
+               batch_id: Optional[str] = None) -> Tuple[int, Dict[str, Any]]:
+        """Прием пакета: (HTTP-статус, тело ответа)"""
+        with self._lock:
+            if batch_id and batch_id in self._seen:
+                self.stats['duplicates'] += 1
+                return 200, {'accepted': 0, 'duplicate': True}
+        
+        try:
+            metrics = decode_batch(payload, self.max_batch)
+            for metric in metrics:
+                metric['host'] = safe_host_name(metric.get('host') or host)
+                # Время узла (со смещением пояса) - в локальное время агрегатора;
+                # время без смещения считается уже локальным
+                metric['timestamp'] = format_timestamp(parse_timestamp(metric['timestamp']))
+        except (ValueError, KeyError, TypeError, zlib.error) as e:
+            with self._lock:
+                self.stats['rejected'] += 1
+            return 400, {'error': str(e)}
+        
+        try:
+            self._queue.put_nowait(metrics)
+        except queue.Full:
+            with self._lock:
+                self.stats['throttled'] += 1
+            return 503, {'error': 'busy'}
+        
+        with self._lock:
+            if batch_id:
+                self._seen[batch_id] = True
+                if len(self._seen) > SEEN_BATCHES:
+                    self._seen.popitem(last=False)
+            self.stats['batches'] += 1
+            self.stats['records'] += len(metrics)
+        return 200, {'accepted': len(metrics)}
+    
+    def status(self) -> Dict[str, Any]:
+        """Счетчики приема и последние записи по узлам"""
+        with self._lock:
+            hosts = {name: {'last': datetime.fromtimestamp(sink.last).isoformat(),
+                            'late': sink.late}
+                     for name, sink in self._sinks.items() if sink.last > float('-inf')}
+            return dict(self.stats, queued=self._queue.qsize(), hosts=hosts)
+    
+    def _write_loop(self):
+        """Поток записи: пакеты из очереди в хранилища узлов"""
+        while True:
+            metrics = self._queue.get()
+            if metrics is None:
+                break
+            try:
+                for metric in metrics:
+                    self._sink(metric['host']).write(metric)
+                for sink in self._sinks.values():
+                    sink.writer.flush()
+            except Exception as e:
+                with self._lock:
+                    self.stats['errors'] += 1
+                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] "
+                      f"Ошибка записи пакета: {e}")
+    
+    def _sink(self, host: str) -> _HostSink:
+        sink = self._sinks.get(host)
+        if sink is None:
+            sink = _HostSink(host_root(self.root, host), self.config)
+            with self._lock:
+                self._sinks[host] = sink
+        return sink
\ No newline at end of file
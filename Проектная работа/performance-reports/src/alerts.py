@@ -0,0 +1,193 @@
+"""
+Потоковые оповещения о превышении порогов
+"""
+
+import math
+import os
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Optional
+from config import get_config, ensure_directories
+from .schema import get_field, parse_timestamp, format_timestamp
+from .storage import MetricsWriter
+
+
+class AlertRule:
+    """Правило "поле выше above не меньше duration секунд" с гистерезисом
+    
+    Оповещение открывается, когда значение непрерывно выше порога
+    duration секунд, и закрывается, только когда значение опустится
+    ниже clear_below (по умолчанию - сам порог) и продержится там
+    clear_after секунд. Так одиночный всплеск не поднимает тревогу, а
+    значение, колеблющееся около порога, не открывает и не закрывает
+    оповещение на каждом измерении. Состояние - несколько чисел.
+    """
+    
+    __slots__ = ('name', 'field', 'above', 'duration', 'clear_below', 'clear_after',
+                 'active', 'since', 'clear_since', 'opened', 'peak', 'last')
+    
+    def __init__(self, name: str, field: str, above: float, duration: float = 0,
+                 clear_below: Optional[float] = None, clear_after: float = 0):
+        if clear_below is not None and clear_below > above:
+            raise ValueError(f"Правило {name}: clear_below выше порога")
+        self.name = name
+        self.field = field
+        self.above = above
+        self.duration = duration
+        self.clear_below = above if clear_below is None else clear_below
+        self.clear_after = clear_after
+        self.reset()
+    
+    @classmethod
+    def from_config(cls, rule: Dict[str, Any]) -> 'AlertRule':
+        return cls(rule['name'], rule['field'], rule['above'], rule.get('for', 0),
+                   rule.get('clear_below'), rule.get('clear_after', 0))
+    
+    def reset(self):
+        self.active = False
+        self.since = None
+        self.clear_since = None
+        self.opened = None
+        self.peak = None
+        self.last = None
+    
+    def update(self, epoch: float, value: Optional[float]) -> Optional[Dict[str, Any]]:
+        """Учет измерения, возвращает событие open/close или None"""
+        if value is None or math.isnan(value):
+            return None
+        self.last = epoch
+        
+        if not self.active:
+            if value <= self.above:
+                self.since = None
+                return None
+            if self.since is None:
+                self.since = epoch
+                self.peak = value
+            self.peak = max(self.peak, value)
+            if epoch - self.since >= self.duration:
+                self.active = True
+                self.opened = epoch
+                return self._event('open', epoch, value)
+            return None
+        
+        self.peak = max(self.peak, value)
+        if value >= self.clear_below:
+            self.clear_since = None
+            return None
+        if self.clear_since is None:
+            self.clear_since = epoch
+        if epoch - self.clear_since >= self.clear_after:
+            event = self._event('close', epoch, value)
+            self.reset()
+            return event
+        return None
+    
+    def incident(self, closed: Optional[float] = None) -> Dict[str, Any]:
+        """Описание текущего (или только что закрытого) превышения"""
+        return {
+            'rule': self.name,
+            'field': self.field,
+            'threshold': self.above,
+            'duration_rule': self.duration,
+            'start': format_timestamp(self.since),
+            'opened': format_timestamp(self.opened),
+            'end': format_timestamp(closed) if closed is not None else None,
+            'seconds': (closed if closed is not None else self.last) - self.since,
+            'peak': self.peak
+        }
+    
+    def _event(self, kind: str, epoch: float, value: float) -> Dict[str, Any]:
+        # Превышение длилось до первого измерения ниже clear_below
+        event = self.incident(self.clear_since if kind == 'close' else None)
+        event.update(event=kind, timestamp=format_timestamp(epoch), value=value)
+        return event
+
+
+class AlertEngine:
+    """Проверка правил alerts.rules на каждом измерении во время сбора
+    
+    Подключается к сборщику как слушатель. События открытия и закрытия
+    оповещений пишутся в alerts.log_file (JSON Lines) и выводятся.
+    """
+    
+    def __init__(self, rules: Optional[List[Dict[str, Any]]] = None,
+                 log_file: Optional[str] = None):
+        self.config = get_config()
+        settings = self.config['alerts']
+        self.rules = [AlertRule.from_config(rule) for rule in (rules or settings['rules'])]
+        self.log_file = log_file or settings['log_file']
+        self.events = 0
+        self._log = None
+    
+    def __call__(self, metric: Dict[str, Any]):
+        epoch = parse_timestamp(metric['timestamp'])
+        for rule in self.rules:
+            event = rule.update(epoch, get_field(metric, rule.field))
+            if event is not None:
+                self._emit(event)
+    
+    def active(self) -> List[Dict[str, Any]]:
+        """Открытые сейчас оповещения"""
+        return [rule.incident() for rule in self.rules if rule.active]
+    
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+    
+    def _emit(self, event: Dict[str, Any]):
+        self.events += 1
+        if self._log is None:
+            ensure_directories(os.path.dirname(self.log_file) or '.')
+            self._log = MetricsWriter(self.log_file)
+        self._log.write(event)
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {format_event(event)}")
+
+
+def format_event(event: Dict[str, Any]) -> str:
+    """Строка события оповещения для вывода"""
+    if event['event'] == 'open':
+        return (f"ОПОВЕЩЕНИЕ {event['rule']}: {event['field']} = {event['value']:.1f} "
+                f"> {event['threshold']} с {event['start']}")
+    return (f"ЗАКРЫТО {event['rule']}: {event['field']} = {event['value']:.1f}, "
+            f"длительность {event['seconds']:.0f} сек, пик {event['peak']:.1f}")
+
+
+def evaluate_incidents(dataset, rules: Optional[Iterable[Dict[str, Any]]] = None
+                       ) -> List[Dict[str, Any]]:
+    """Все превышения за период по правилам, в порядке начала
+    
+    Правила прогоняются по колонкам набора данных так же, как во время
+    сбора, поэтому отчет видит превышения, закончившиеся до конца
+    периода. Незакрытые к концу периода превышения имеют end = None.
+    """
+    rules = [AlertRule.from_config(rule)
+             for rule in (rules if rules is not None else get_config()['alerts']['rules'])]
+    timestamps = dataset.timestamps
+    incidents = []
+    for rule in rules:
+        values = dataset.column(rule.field)
+        # Между превышениями измерения пропускаются: правило в покое
+        # меняет состояние только на значении выше порога
+        above = np.flatnonzero(values > rule.above)
+        n = len(values)
+        i = int(above[0]) if len(above) else n
+        while i < n:
+            event = rule.update(float(timestamps[i]), float(values[i]))
+            if event is not None and event['event'] == 'close':
+                incidents.append(_strip_event(event))
+            if not rule.active and rule.since is None:
+                j = int(np.searchsorted(above, i, side='right'))
+                i = int(above[j]) if j < len(above) else n
+            else:
+                i += 1
+        if rule.active:
+            incidents.append(rule.incident())
+    incidents.sort(key=lambda incident: incident['start'])
+    return incidents
+
+
+def _strip_event(event: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in event.items()
+            if key not in ('event', 'timestamp', 'value')}
\ No newline at end of file
@@ -0,0 +1,175 @@
+"""
+Обнаружение аномалий в потоке измерений (EWMA и z-оценка)
+"""
+
+import json
+import math
+import os
+from typing import Dict, List, Any, Iterable, Optional
+from config import get_config, ensure_directories
+from .schema import get_field, parse_timestamp
+
+
+class EwmaStats:
+    """Экспоненциально взвешенные среднее и дисперсия одного поля
+    
+    Вес нового значения зависит от прошедшего времени (полупериод
+    half_life секунд), поэтому неравномерные интервалы и перерывы в
+    сборе учитываются естественно: после долгой паузы старая история
+    почти забывается. Память и время на измерение постоянны.
+    """
+    
+    __slots__ = ('half_life', 'min_std', 'mean', 'var', 'count', 'last')
+    
+    def __init__(self, half_life: float, min_std: float = 0.0):
+        self.half_life = half_life
+        self.min_std = min_std
+        self.mean = None
+        self.var = 0.0
+        self.count = 0
+        self.last = None
+    
+    def zscore(self, value: float) -> Optional[float]:
+        """Отклонение value от среднего в стандартных отклонениях"""
+        if self.mean is None:
+            return None
+        std = max(math.sqrt(self.var), self.min_std)
+        if std <= 0:
+            return None
+        return (value - self.mean) / std
+    
+    def update(self, epoch: float, value: float):
+        if self.mean is None:
+            self.mean = value
+        else:
+            dt = max(epoch - self.last, 0.0) if self.last is not None else 0.0
+            alpha = 1.0 - math.exp(-dt * math.log(2) / self.half_life) if dt else 0.0
+            diff = value - self.mean
+            increment = alpha * diff
+            self.mean += increment
+            self.var = (1.0 - alpha) * (self.var + diff * increment)
+        self.count += 1
+        self.last = epoch
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {'mean': self.mean, 'var': self.var, 'count': self.count, 'last': self.last}
+    
+    def load(self, state: Dict[str, Any]):
+        self.mean = state.get('mean')
+        self.var = state.get('var', 0.0)
+        self.count = state.get('count', 0)
+        self.last = state.get('last')
+
+
+class AnomalyDetector:
+    """Пометка аномальных значений полей anomaly.fields в каждом измерении
+    
+    Подключается к сборщику как слушатель. Значение считается аномальным,
+    если его z-оценка относительно EWMA-статистики поля по модулю больше
+    anomaly.z_threshold; такие значения добавляются в запись измерения
+    списком 'anomalies' до того, как она будет записана. Срабатывания
+    начинаются после anomaly.warmup измерений. Состояние сохраняется в
+    anomaly.state_file каждые save_every измерений и при закрытии, так что
+    перезапуск сбора или планировщика продолжает ту же статистику.
+    При persist=False (воспроизведение) состояние не читается и не пишется.
+    """
+    
+    def __init__(self, fields: Optional[Dict[str, Dict[str, float]]] = None,
+                 state_file: Optional[str] = None, persist: bool = True):
+        self.config = get_config()
+        settings = self.config['anomaly']
+        fields = fields or settings['fields']
+        self.threshold = settings['z_threshold']
+        self.warmup = settings['warmup']
+        self.save_every = settings['save_every']
+        self.state_file = (state_file or settings['state_file']) if persist else None
+        self.stats = {field: EwmaStats(options['half_life'], options.get('min_std', 0.0))
+                      for field, options in fields.items()}
+        self.flagged = 0
+        self._unsaved = 0
+        self._load_state()
+    
+    def __call__(self, metric: Dict[str, Any]):
+        epoch = parse_timestamp(metric['timestamp'])
+        anomalies = []
+        for field, stats in self.stats.items():
+            value = get_field(metric, field)
+            if value is None or value != value:
+                continue
+            if stats.last is not None and epoch <= stats.last:
+                # Повтор или запись из прошлого (после перевода часов)
+                continue
+            z = stats.zscore(value)
+            if z is not None and stats.count >= self.warmup and abs(z) > self.threshold:
+                anomalies.append({'field': field, 'value': value,
+                                  'mean': round(stats.mean, 3), 'z': round(z, 2)})
+            stats.update(epoch, value)
+        
+        if anomalies:
+            metric['anomalies'] = anomalies
+            self.flagged += len(anomalies)
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.save()
+    
+    def save(self):
+        """Атомарная запись состояния"""
+        if self.state_file is None:
+            return
+        ensure_directories(os.path.dirname(self.state_file) or '.')
+        state = {field: stats.to_dict() for field, stats in self.stats.items()}
+        tmp_path = self.state_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.state_file)
+        self._unsaved = 0
+    
+    def close(self):
+        if self._unsaved:
+            self.save()
+    
+    def _load_state(self):
+        if self.state_file is None or not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        for field, stats in self.stats.items():
+            if field in state:
+                stats.load(state[field])
+
+
+def summarize_anomalies(metrics: Iterable[Dict[str, Any]],
+                        merge_gap: Optional[float] = None) -> Optional[List[Dict[str, Any]]]:
+    """Эпизоды аномалий за период по пометкам в записях
+    
+    Пометки одного поля, между которыми не больше merge_gap секунд
+    (anomaly.merge_gap), объединяются в эпизод с наибольшей по модулю
+    z-оценкой: медленный дрейф на фоне шума дает один эпизод, а не
+    десятки. Возвращает None для наборов без записей (сегменты хранят
+    только числовые поля).
+    """
+    if getattr(metrics, 'numeric_only', False):
+        return None
+    if merge_gap is None:
+        merge_gap = get_config()['anomaly']['merge_gap']
+    episodes = []
+    current = {}
+    for metric in metrics:
+        for anomaly in metric.get('anomalies', ()):
+            field = anomaly['field']
+            epoch = parse_timestamp(metric['timestamp'])
+            episode = current.get(field)
+            if episode is None or epoch - episode['_last'] > merge_gap:
+                episode = {'field': field, 'start': metric['timestamp'], 'count': 0, 'z': 0.0}
+                current[field] = episode
+                episodes.append(episode)
+            episode.update(end=metric['timestamp'], _last=epoch)
+            episode['count'] += 1
+            if abs(anomaly['z']) > abs(episode['z']):
+                episode.update(z=anomaly['z'], value=anomaly['value'], mean=anomaly['mean'])
+    for episode in episodes:
+        del episode['_last']
+    return episodes
\ No newline at end of file
@@ -0,0 +1,105 @@
+"""
+Кольцевой буфер последних измерений с фиксированной емкостью
+"""
+
+import numpy as np
+from typing import Dict, Any, Optional, Tuple
+from .schema import NUMERIC_FIELDS, flatten, unflatten, parse_timestamp, format_timestamp
+
+
+class MetricsRecord:
+    """Одно измерение из буфера"""
+    
+    __slots__ = ('timestamp', 'values', '_index')
+    
+    def __init__(self, timestamp: float, values: Tuple[float, ...], index: Dict[str, int]):
+        self.timestamp = timestamp
+        self.values = values
+        self._index = index
+    
+    def __getitem__(self, field: str) -> float:
+        return self.values[self._index[field]]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Запись в исходном вложенном формате"""
+        metric = {'timestamp': format_timestamp(self.timestamp)}
+        metric.update(unflatten(self.values, self._index))
+        return metric
+
+
+class MetricsRingBuffer:
+    """Колоночный кольцевой буфер
+    
+    Под каждое поле заранее выделен массив длиной 2 * capacity, и каждое
+    значение пишется дважды: в позицию head и head + capacity. Благодаря
+    этому последние n значений всегда лежат в памяти подряд, и окно
+    возвращается как срез без копирования.
+    """
+    
+    def __init__(self, capacity: int = 3600, fields: Tuple[str, ...] = NUMERIC_FIELDS):
+        if capacity <= 0:
+            raise ValueError("Емкость буфера должна быть положительной")
+        
+        self.capacity = capacity
+        self.fields = tuple(fields)
+        self._index = {field: i for i, field in enumerate(self.fields)}
+        self._data = np.full((len(self.fields), 2 * capacity), np.nan)
+        self._timestamps = np.full(2 * capacity, np.nan)
+        self._head = 0
+        self._count = 0
+    
+    def __len__(self) -> int:
+        return self._count
+    
+    @property
+    def nbytes(self) -> int:
+        """Объем памяти под данные буфера"""
+        return self._data.nbytes + self._timestamps.nbytes
+    
+    def append(self, metric: Dict[str, Any]):
+        """Добавление записи метрик за O(1)"""
+        self.append_values(parse_timestamp(metric['timestamp']),
+                           flatten(metric, self.fields))
+    
+    def append_values(self, timestamp: float, values):
+        """Добавление уже разобранных значений полей"""
+        head = self._head
+        mirror = head + self.capacity
+        self._data[:, head] = values
+        self._data[:, mirror] = values
+        self._timestamps[head] = timestamp
+        self._timestamps[mirror] = timestamp
+        
+        self._head = (head + 1) % self.capacity
+        self._count = min(self._count + 1, self.capacity)
+    
+    def window(self, field: str, n: Optional[int] = None) -> np.ndarray:
+        """Последние n значений поля (представление без копирования)"""
+        return self._view(self._data[self._index[field]], n)
+    
+    def timestamps(self, n: Optional[int] = None) -> np.ndarray:
+        """Последние n меток времени (секунды от эпохи)"""
+        return self._view(self._timestamps, n)
+    
+    def record(self, i: int = -1) -> MetricsRecord:
+        """Одно измерение по индексу (отрицательные - с конца)"""
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("Индекс вне буфера")
+        
+        pos = self._head + self.capacity - self._count + i
+        return MetricsRecord(float(self._timestamps[pos]),
+                             tuple(self._data[:, pos].tolist()), self._index)
+    
+    def clear(self):
+        """Очистка буфера без освобождения памяти"""
+        self._head = 0
+        self._count = 0
+    
+    def _view(self, row: np.ndarray, n: Optional[int]) -> np.ndarray:
+        n = self._count if n is None else min(n, self._count)
+        end = self._head + self.capacity
+        view = row[end - n:end]
+        view.flags.writeable = False
+        return view
@@ -3,62 +3,225 @@
 """
 
 import psutil
+import threading
 import time
 import json
 from datetime import datetime
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, Iterator, Optional
+from config import get_config
+from .buffer import MetricsRingBuffer
+from .storage import load_metrics
+
+
+# Допуск при сравнении с интервалом группы, чтобы группа с интервалом,
+# равным интервалу сбора, не пропускала такты из-за дрожания таймера
+CADENCE_SLACK = 0.9
+
+# Наименьшее окно расчета загрузки CPU по cpu_times, секунды: за
+# микросекунды после создания сборщика счетчики не успевают измениться
+MIN_CPU_WINDOW = 0.1
+
+
+@lru_cache(maxsize=1)
+def get_static_facts() -> Dict[str, Any]:
+    """Редко меняющиеся характеристики системы (кэшируются на процесс)"""
+    cpu_freq = psutil.cpu_freq()
+    
+    return {
+        'boot_time': psutil.boot_time(),
+        'frequency_min': cpu_freq.min if cpu_freq else None,
+        'frequency_max': cpu_freq.max if cpu_freq else None
+    }
 
 
 class SystemMetricsCollector:
     """Сбор метрик производительности системы"""
     
-    def __init__(self):
-        self.metrics_history = []
+    def __init__(self, cpu_mode: Optional[str] = None):
+        self.config = get_config()
+        # Последние измерения в кольцевом буфере фиксированного размера
+        self.metrics_history = MetricsRingBuffer(
+            self.config['metrics'].get('history_size', 3600))
+        # 'delta' - неблокирующий расчет по разнице cpu_times,
+        # 'blocking' - psutil.cpu_percent с интервалом 0.1 сек
+        self.cpu_mode = cpu_mode or self.config['metrics'].get('cpu_mode', 'delta')
+        self._prev_cpu_times = psutil.cpu_times(percpu=True)
+        self._prev_cpu_at = time.monotonic()
+        self.missed_ticks = 0
+        self.max_lag = 0.0
+        # Интервалы обновления групп метрик (секунды)
+        self.intervals = self.config['metrics'].get('intervals', {})
+        self._group_cache = {}
+        self._stale = set()
+        self._process_sampler = None
+        # Собственные затраты: время вызовов _get_*_metrics, CPU и RSS процесса
+        self._meter = None
+        if self.config['metrics'].get('overhead'):
+            from .overhead import ProcessMeter
+            
+            self._meter = ProcessMeter()
+        self._timings = {}
+        self._fetches = 0
+        # Обработчики каждого нового измерения (агрегаты и т.п.)
+        self.listeners = []
         
     def collect_single(self) -> Dict[str, Any]:
         """Сбор одного набора метрик"""
+        started = time.perf_counter()
         timestamp = datetime.now().isoformat()
+        self._stale = set()
+        self._timings = {}
         
         metrics = {
             'timestamp': timestamp,
-            'cpu': self._get_cpu_metrics(),
-            'memory': self._get_memory_metrics(),
-            'disk': self._get_disk_metrics(),
-            'network': self._get_network_metrics(),
-            'system': self._get_system_metrics()
+            'cpu': self._measure('cpu', self._refresh, 'cpu', self._get_cpu_metrics),
+            'memory': self._measure('memory', self._refresh, 'memory', self._get_memory_metrics),
+            'disk': self._measure('disk', self._get_disk_metrics),
+            'network': self._measure('network', self._get_network_metrics),
+            'system': self._measure('system', self._get_system_metrics)
         }
+        if self.config['metrics'].get('processes'):
+            metrics['processes'] = self._measure('processes', self._refresh, 'processes',
+                                                 self._get_process_metrics)
+        # Группы, значения которых перенесены из прошлого обновления
+        metrics['stale'] = sorted(self._stale)
+        if self._meter is not None:
+            metrics['overhead'] = dict(
+                self._meter.sample(), timings_ms=self._timings,
+                total_ms=round((time.perf_counter() - started) * 1000, 3))
         
         self.metrics_history.append(metrics)
+        for listener in self.listeners:
+            listener(metrics)
         return metrics
     
+    def add_listener(self, listener):
+        """Подписка на каждое новое измерение"""
+        self.listeners.append(listener)
+    
+    def _measure(self, name: str, fetch, *args) -> Any:
+        """Вызов с замером времени, если группа читалась, а не взята из кэша"""
+        if self._meter is None:
+            return fetch(*args)
+        fetches = self._fetches
+        started = time.perf_counter()
+        value = fetch(*args)
+        if self._fetches > fetches:
+            self._timings[name] = round((time.perf_counter() - started) * 1000, 3)
+        return value
+    
+    def _refresh(self, group: str, fetch) -> Any:
+        """Значение группы метрик с учетом ее интервала обновления"""
+        now = time.monotonic()
+        cached = self._group_cache.get(group)
+        interval = self.intervals.get(group, 0)
+        
+        if cached is not None and now - cached[1] < interval * CADENCE_SLACK:
+            self._stale.add(group)
+            return cached[0]
+        
+        value = fetch()
+        self._fetches += 1
+        self._group_cache[group] = (value, now)
+        return value
+    
     def collect_continuous(self, count: int = 10, interval: float = 1.0) -> List[Dict]:
         """Непрерывный сбор метрик"""
-        metrics_list = []
+        return list(self.iter_samples(count, interval))
+    
+    def iter_samples(self, count: Optional[int] = 10, interval: float = 1.0,
+                     stop: Optional[threading.Event] = None) -> Iterator[Dict]:
+        """Сбор метрик по монотонным часам без накопления дрейфа
         
-        for i in range(count):
-            if i > 0:
-                time.sleep(interval)
+        Измерение i выполняется в момент start + i * interval. Если сбор
+        опоздал больше чем на интервал, пропущенные такты не догоняются,
+        а учитываются в missed_ticks. При count=None сбор идет до
+        установки события stop (без вывода прогресса).
+        """
+        self.missed_ticks = 0
+        self.max_lag = 0.0
+        start = time.monotonic()
+        tick = 0
+        i = 0
+        
+        while count is None or i < count:
+            deadline = start + tick * interval
+            delay = deadline - time.monotonic()
+            if stop is not None:
+                if stop.wait(max(delay, 0)):
+                    return
+            elif delay > 0:
+                time.sleep(delay)
+            self.max_lag = max(self.max_lag, time.monotonic() - deadline)
                 
-            print(f"Сбор {i+1}/{count}...")
-            metrics = self.collect_single()
-            metrics_list.append(metrics)
+            if count is not None:
+                print(f"Сбор {i+1}/{count}...")
+            yield self.collect_single()
+            i += 1
             
-        return metrics_list
+            tick += 1
+            if interval > 0:
+                behind = int((time.monotonic() - (start + tick * interval)) // interval)
+                if behind > 0:
+                    self.missed_ticks += behind
+                    tick += behind
     
     def _get_cpu_metrics(self) -> Dict[str, Any]:
         """Метрики CPU"""
-        cpu_percent = psutil.cpu_percent(interval=0.1, percpu=True)
+        if self.cpu_mode == 'blocking':
+            cpu_percent = psutil.cpu_percent(interval=0.1, percpu=True)
+        else:
+            cpu_percent = self._cpu_percent_delta()
         cpu_freq = psutil.cpu_freq()
+        static = get_static_facts()
         
         return {
             'percent_per_core': cpu_percent,
             'percent_total': sum(cpu_percent) / len(cpu_percent),
             'cores': len(cpu_percent),
             'frequency_current': cpu_freq.current if cpu_freq else None,
-            'frequency_min': cpu_freq.min if cpu_freq else None,
-            'frequency_max': cpu_freq.max if cpu_freq else None
+            'frequency_min': static['frequency_min'],
+            'frequency_max': static['frequency_max']
         }
     
+    def _cpu_percent_delta(self) -> List[float]:
+        """Загрузка ядер по разнице cpu_times с предыдущим измерением
+        
+        Если с прошлого чтения прошло меньше MIN_CPU_WINDOW (первое
+        измерение сразу после создания), окно разово добирается паузой.
+        """
+        elapsed = time.monotonic() - self._prev_cpu_at
+        if elapsed < MIN_CPU_WINDOW:
+            time.sleep(MIN_CPU_WINDOW - elapsed)
+        current = psutil.cpu_times(percpu=True)
+        self._prev_cpu_at = time.monotonic()
+        previous, self._prev_cpu_times = self._prev_cpu_times, current
+        
+        percents = []
+        for prev, curr in zip(previous, current):
+            total = self._cpu_total_time(curr) - self._cpu_total_time(prev)
+            idle = self._cpu_idle_time(curr) - self._cpu_idle_time(prev)
+            if total <= 0:
+                percents.append(0.0)
+                continue
+            busy = (total - idle) / total * 100
+            percents.append(round(min(max(busy, 0.0), 100.0), 1))
+        
+        return percents
+    
+    @staticmethod
+    def _cpu_total_time(times) -> float:
+        """Суммарное время CPU (guest уже входит в user)"""
+        total = sum(times)
+        total -= getattr(times, 'guest', 0) + getattr(times, 'guest_nice', 0)
+        return total
+    
+    @staticmethod
+    def _cpu_idle_time(times) -> float:
+        """Время простоя CPU с учетом ожидания ввода-вывода"""
+        return times.idle + getattr(times, 'iowait', 0)
+    
     def _get_memory_metrics(self) -> Dict[str, Any]:
         """Метрики памяти"""
         memory = psutil.virtual_memory()
@@ -76,8 +239,8 @@ class SystemMetricsCollector:
     
     def _get_disk_metrics(self) -> Dict[str, Any]:
         """Метрики диска"""
-        disk_usage = psutil.disk_usage('/')
-        disk_io = psutil.disk_io_counters()
+        disk_usage = self._refresh('disk_usage', lambda: psutil.disk_usage('/'))
+        disk_io = self._refresh('disk_io', psutil.disk_io_counters)
         
         return {
             'total': disk_usage.total,
@@ -92,34 +255,50 @@ class SystemMetricsCollector:
     
     def _get_network_metrics(self) -> Dict[str, Any]:
         """Метрики сети"""
-        net_io = psutil.net_io_counters()
+        net_io = self._refresh('network', psutil.net_io_counters)
+        connections = self._refresh('connections',
+                                    lambda: len(psutil.net_connections()))
         
         return {
             'bytes_sent': net_io.bytes_sent,
             'bytes_recv': net_io.bytes_recv,
             'packets_sent': net_io.packets_sent,
             'packets_recv': net_io.packets_recv,
-            'connections': len(psutil.net_connections())
+            'connections': connections
         }
     
     def _get_system_metrics(self) -> Dict[str, Any]:
         """Системные метрики"""
-        boot_time = datetime.fromtimestamp(psutil.boot_time())
+        boot_time = datetime.fromtimestamp(get_static_facts()['boot_time'])
         uptime = datetime.now() - boot_time
+        counts = self._refresh('system', lambda: {
+            'users': len(psutil.users()),
+            'processes': len(psutil.pids())
+        })
         
         return {
             'boot_time': boot_time.isoformat(),
             'uptime_seconds': uptime.total_seconds(),
-            'users': len(psutil.users()),
-            'processes': len(psutil.pids())
+            'users': counts['users'],
+            'processes': counts['processes']
         }
     
+    def _get_process_metrics(self) -> Dict[str, Any]:
+        """Топ процессов по CPU и памяти (кэш процессов между измерениями)"""
+        if self._process_sampler is None:
+            from .processes import ProcessSampler
+            
+            settings = self.config['metrics']
+            self._process_sampler = ProcessSampler(settings.get('processes_top', 10),
+                                                   settings.get('processes_scan_batch', 25),
+                                                   settings.get('processes_discovery', 5))
+        return self._process_sampler.sample()
+    
     def save_metrics(self, metrics: List[Dict], filename: str = 'metrics.json'):
         """Сохранение метрик в файл"""
         with open(filename, 'w') as f:
             json.dump(metrics, f, indent=2, default=str)
     
-    def load_metrics(self, filename: str = 'metrics.json') -> List[Dict]:
+    def load_metrics(self, filename: str = 'metrics.jsonl') -> List[Dict]:
         """Загрузка метрик из файла"""
-        with open(filename, 'r') as f:
-            return json.load(f)
\ No newline at end of file
+        return load_metrics(filename)
\ No newline at end of file
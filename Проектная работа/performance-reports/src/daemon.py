@@ -0,0 +1,204 @@
+"""
+Фоновый сбор метрик и отчеты по расписанию в одном процессе
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Optional, Tuple
+from config import get_config
+from .alerts import AlertEngine
+from .jobs import JobRunner
+from .loader import MetricsDataset, load_period
+from .retention import RetentionEngine
+from .rollups import RollupManager, RollupWriter
+from .scheduler import ReportScheduler
+from .schema import parse_timestamp
+from .store import MetricsStore
+
+
+class MetricsDaemon:
+    """Непрерывный сбор метрик с отчетами за полное окно без ожидания
+    
+    Фоновый поток пишет каждое измерение в ограниченный буфер последних
+    записей и, если включено, в хранилище вместе с агрегатами. Задача
+    отчета берет снимок своего окна (час, день, неделя): из буфера, если
+    он покрывает окно, иначе из хранилища. Без хранилища допускаются
+    только частоты, окно которых помещается в буфер.
+    """
+    
+    def __init__(self, frequencies: Optional[List[str]] = None,
+                 interval: Optional[float] = None, use_store: Optional[bool] = None,
+                 scheduler: Optional[ReportScheduler] = None):
+        self.config = get_config()
+        settings = self.config['daemon']
+        self.frequencies = list(frequencies or settings['frequencies'])
+        self.interval = interval or settings['interval']
+        self.use_store = settings['store'] if use_store is None else use_store
+        if not self.use_store:
+            # Без хранилища окно отчета берется только из буфера в памяти
+            capacity = settings['buffer_size'] * self.interval
+            too_long = [f for f in self.frequencies
+                        if ReportScheduler.WINDOWS[f] > capacity]
+            if too_long:
+                raise ValueError(f"Отчеты {', '.join(too_long)} требуют хранилища: "
+                                 f"буфер в памяти покрывает {capacity / 3600:.1f} ч")
+        self.scheduler = scheduler or ReportScheduler()
+        self.collector = self.scheduler.collector
+        # Последние полные записи для окон, которые помещаются в память
+        self.buffer = deque(maxlen=settings['buffer_size'])
+        self.samples = 0
+        self.errors = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._retention_thread = None
+        self._writer = None
+        self._rollups = None
+        self.collector.add_listener(self._on_sample)
+        self.alerts = None
+        if self.config['alerts']['enabled']:
+            self.alerts = AlertEngine()
+            self.collector.add_listener(self.alerts)
+    
+    def start(self):
+        """Запуск фонового сбора"""
+        if self._thread is not None:
+            return
+        
+        if self.use_store:
+            root = self.config['paths']['store']
+            storage = self.config['storage']
+            self._writer = MetricsStore(root).writer(storage['flush_every'],
+                                                     storage['fsync'])
+            rollups = self.config['rollups']
+            if rollups['enabled']:
+                self._rollups = RollupManager(RollupWriter.for_store(root), rollups['tiers'],
+                                              relative_accuracy=rollups['relative_accuracy'])
+                self.collector.add_listener(self._rollups)
+        
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop,
+                                        name='metrics-sampler', daemon=True)
+        self._thread.start()
+        
+        if self.config['retention']['enabled']:
+            self._retention_thread = threading.Thread(target=self._retention_loop,
+                                                      name='retention', daemon=True)
+            self._retention_thread.start()
+    
+    def stop(self):
+        """Остановка сбора с записью незавершенных агрегатов"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self._retention_thread is not None:
+            self._retention_thread.join()
+            self._retention_thread = None
+        if self._rollups is not None:
+            self.collector.listeners.remove(self._rollups)
+            self._rollups.close()
+            self._rollups = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self.alerts is not None:
+            self.alerts.close()
+        if self.scheduler.detector is not None:
+            self.scheduler.detector.close()
+    
+    def snapshot(self, seconds: float, end: Optional[datetime] = None) -> MetricsDataset:
+        """Измерения за seconds секунд до end (по умолчанию - до текущего момента)"""
+        end = end or datetime.now()
+        start = end - timedelta(seconds=seconds)
+        lower, upper = start.timestamp(), end.timestamp()
+        
+        with self._lock:
+            # Первая запись буфера не позже начала окна (с допуском на такт)
+            covered = (len(self.buffer) > 0 and
+                       parse_timestamp(self.buffer[0]['timestamp']) <= lower + self.interval)
+            if covered or not self.use_store:
+                rows = [m for m in self.buffer
+                        if lower <= parse_timestamp(m['timestamp']) <= upper]
+                return MetricsDataset(rows, source='daemon')
+        
+        rollups = self.config['rollups']
+        tiers = rollups['tiers'] if rollups['enabled'] else []
+        return load_period(self.config['paths']['store'], start.isoformat(),
+                           end.isoformat(), tiers, self.config['reporting']['max_points'])
+    
+    def run_job(self, frequency: str, due: Optional[datetime] = None) -> Optional[Tuple[str, str]]:
+        """Отчет и график за окно частоты, заканчивающееся в due, по уже собранным данным"""
+        started = time.monotonic()
+        dataset = self.snapshot(self.scheduler.WINDOWS[frequency], due)
+        if not len(dataset):
+            print(f"Нет данных для {frequency} отчета")
+            return None
+        
+        result = self.scheduler.report_window(frequency, dataset)
+        print(f"{frequency} отчет: {len(dataset)} записей, "
+              f"{time.monotonic() - started:.1f} сек")
+        return result
+    
+    def run_forever(self):
+        """Сбор и все задачи по расписанию до Ctrl+C"""
+        runner = JobRunner(self.frequencies, self.run_job)
+        
+        self.start()
+        print(f"Фоновый сбор: интервал {self.interval} сек, "
+              f"хранилище: {'да' if self.use_store else 'нет'}")
+        print(f"Отчеты: {', '.join(self.frequencies)}")
+        print("Нажмите Ctrl+C для остановки")
+        
+        try:
+            asyncio.run(runner.run())
+        except KeyboardInterrupt:
+            print("\nОстановка демона...")
+        finally:
+            self.stop()
+            print(f"Собрано измерений: {self.samples}, ошибок: {self.errors}")
+    
+    def status(self) -> Dict[str, Any]:
+        """Состояние сбора"""
+        with self._lock:
+            buffered = len(self.buffer)
+        return {
+            'running': self._thread is not None and self._thread.is_alive(),
+            'samples': self.samples,
+            'buffered': buffered,
+            'errors': self.errors,
+            'missed_ticks': self.collector.missed_ticks,
+            'max_lag': self.collector.max_lag,
+            'alerts': self.alerts.active() if self.alerts is not None else [],
+            'anomalies': self.scheduler.detector.flagged if self.scheduler.detector else 0
+        }
+    
+    def _retention_loop(self):
+        """Периодическая очистка старых данных с ограничением ввода-вывода"""
+        while not self._stop.wait(self.config['retention']['interval']):
+            try:
+                result = RetentionEngine(stop=self._stop).run()
+                if result['deleted'] or result['compressed']:
+                    print(f"Очистка: освобождено {result['reclaimed_bytes'] / 1024 ** 2:.1f} МБ")
+            except Exception as e:
+                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Ошибка очистки: {e}")
+    
+    def _on_sample(self, metric: Dict[str, Any]):
+        with self._lock:
+            self.buffer.append(metric)
+            self.samples += 1
+    
+    def _sample_loop(self):
+        """Цикл фонового потока: сбор и запись в хранилище"""
+        while not self._stop.is_set():
+            try:
+                for metric in self.collector.iter_samples(None, self.interval, self._stop):
+                    if self._writer is not None:
+                        self._writer.write(metric)
+            except Exception as e:
+                self.errors += 1
+                print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Ошибка сбора: {e}")
+                self._stop.wait(self.interval)
\ No newline at end of file
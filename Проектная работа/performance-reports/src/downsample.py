@@ -0,0 +1,90 @@
+"""
+Прореживание длинных рядов перед построением графиков
+"""
+
+import numpy as np
+from typing import Optional
+
+# Поддерживаемые методы прореживания
+METHODS = ('minmax', 'lttb', 'none')
+
+
+def minmax_indices(values: np.ndarray, buckets: int) -> np.ndarray:
+    """Индексы минимума и максимума в каждой из buckets корзин
+    
+    На корзину приходится не больше двух точек, поэтому пики и провалы
+    сохраняются при любой степени сжатия. Первая и последняя точки
+    ряда всегда включаются.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if buckets <= 0 or 2 * buckets >= n:
+        return np.arange(n)
+    
+    size = -(-n // buckets)
+    rows = -(-n // size)
+    padded = np.full(rows * size, np.nan)
+    padded[:n] = values
+    padded = padded.reshape(rows, size)
+    
+    # NaN не должен выигрывать ни минимум, ни максимум
+    nan = np.isnan(padded)
+    low = np.where(nan, np.inf, padded).argmin(axis=1)
+    high = np.where(nan, -np.inf, padded).argmax(axis=1)
+    
+    offsets = np.arange(rows) * size
+    indices = np.concatenate(([0, n - 1], offsets + low, offsets + high))
+    return np.unique(indices[indices < n])
+
+
+def lttb_indices(x: np.ndarray, values: np.ndarray, points: int) -> np.ndarray:
+    """Индексы точек по алгоритму Largest-Triangle-Three-Buckets
+    
+    Из каждой корзины берется точка, образующая наибольший треугольник
+    с выбранной точкой предыдущей корзины и средним следующей. Цикл
+    идет по корзинам, а не по точкам, так что время зависит от points.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    values = np.nan_to_num(np.asarray(values, dtype=np.float64))
+    n = len(values)
+    if points < 3 or points >= n:
+        return np.arange(n)
+    
+    x = x - x[0]
+    edges = np.linspace(1, n - 1, points - 1).astype(np.int64)
+    ends = np.append(edges[2:], n)
+    indices = np.empty(points, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    
+    selected = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        avg_x = x[hi:ends[i]].mean()
+        avg_y = values[hi:ends[i]].mean()
+        ax, ay = x[selected], values[selected]
+        area = np.abs((ax - avg_x) * (values[lo:hi] - ay)
+                      - (ax - x[lo:hi]) * (avg_y - ay))
+        selected = lo + int(area.argmax())
+        indices[i + 1] = selected
+    return indices
+
+
+def downsample_indices(x: np.ndarray, series: list, points: int,
+                       method: str = 'minmax') -> Optional[np.ndarray]:
+    """Общие индексы для нескольких рядов с одной осью времени
+    
+    Индексы отдельных рядов объединяются, чтобы линии и заливки
+    на одной оси строились по одним и тем же меткам времени.
+    Возвращает None, если прореживание не требуется.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Неизвестный метод прореживания: {method}")
+    n = len(x)
+    if method == 'none' or points <= 0 or n <= points:
+        return None
+    
+    if method == 'lttb':
+        parts = [lttb_indices(x, values, points) for values in series]
+    else:
+        parts = [minmax_indices(values, points // 2) for values in series]
+    return np.unique(np.concatenate(parts))
\ No newline at end of file
@@ -0,0 +1,342 @@
+"""
+Данные и сценарий графиков интерактивного HTML отчета
+"""
+
+import base64
+import json
+import zlib
+import numpy as np
+from typing import Dict, Any, List
+from .downsample import downsample_indices
+from .loader import MetricsDataset
+
+MB = 1 / (1024 ** 2)
+
+# Графики отчета: (id, заголовок, единица, порог из thresholds,
+# [(подпись, поле, множитель скорости или None для значения поля)])
+CHARTS = [
+    ('cpu', 'Загрузка CPU', '%', 'cpu_warning',
+     [('CPU', 'cpu.percent_total', None)]),
+    ('memory', 'Использование памяти', '%', 'memory_warning',
+     [('Память', 'memory.percent', None), ('Swap', 'memory.swap_percent', None)]),
+    ('disk', 'Использование диска', '%', 'disk_warning',
+     [('Диск', 'disk.percent', None)]),
+    ('disk_io', 'Дисковый ввод-вывод', 'МБ/с', None,
+     [('Чтение', 'disk.read_bytes', MB), ('Запись', 'disk.write_bytes', MB)]),
+    ('network', 'Сетевая активность', 'МБ/с', None,
+     [('Отправка', 'network.bytes_sent', MB), ('Прием', 'network.bytes_recv', MB)])
+]
+
+
+def pack_charts(dataset: MetricsDataset, points: int, method: str = 'minmax',
+                thresholds: Dict[str, float] = None) -> Dict[str, Any]:
+    """Прореженные ряды графиков одним сжатым блоком
+
+    Для каждого графика в блок пишутся приращения меток времени в
+    миллисекундах (int32), затем значения каждого ряда (float32, NaN -
+    пропуск). Блок сжимается zlib и кодируется base64; браузер
+    распаковывает его через DecompressionStream('deflate'). Графики без
+    данных пропускаются.
+    """
+    thresholds = thresholds or {}
+    timestamps = dataset.timestamps
+    charts = []
+    blobs = []
+    for chart_id, title, unit, threshold, specs in CHARTS:
+        series = [dataset.rates.rate(field, scale) if scale else dataset.column(field)
+                  for _, field, scale in specs]
+        if all(np.isnan(values).all() for values in series):
+            continue
+        indices = downsample_indices(timestamps, series, points, method)
+        if indices is None:
+            indices = np.arange(len(timestamps))
+
+        ms = np.round(timestamps[indices] * 1000).astype(np.int64)
+        deltas = np.diff(ms, prepend=ms[0])
+        blobs.append(np.clip(deltas, 0, np.iinfo(np.int32).max).astype('<i4').tobytes())
+        blobs.extend(values[indices].astype('<f4').tobytes() for values in series)
+        charts.append({
+            'id': chart_id,
+            'title': title,
+            'unit': unit,
+            'threshold': thresholds.get(threshold),
+            'start': int(ms[0]),
+            'points': len(indices),
+            'series': [label for label, _, _ in specs]
+        })
+
+    raw = b''.join(blobs)
+    return {
+        'charts': charts,
+        'raw_bytes': len(raw),
+        'data': base64.b64encode(zlib.compress(raw, 9)).decode('ascii')
+    }
+
+
+def chart_containers(packed: Dict[str, Any]) -> List[str]:
+    """Блоки HTML, в которых сценарий рисует графики"""
+    return [f"""
+            <div class="metric">
+                <h2>{chart['title']}, {chart['unit']}</h2>
+                <div class="chart" id="chart-{chart['id']}"></div>
+            </div>"""
+            for chart in packed['charts']]
+
+
+def data_script(packed: Dict[str, Any]) -> str:
+    """Тег с упакованными данными (закрывающий тег внутри JSON экранируется)"""
+    payload = json.dumps(packed, ensure_ascii=False).replace('</', '<\\/')
+    return f'<script type="application/json" id="chart-data">{payload}</script>\n'
+
+
+CHART_STYLE = """
+                .chart { position: relative; }
+                .chart svg { width: 100%; height: auto; user-select: none; }
+                .chart .axis { font-size: 11px; fill: #666; }
+                .chart .grid { stroke: #eee; }
+                .chart .threshold { stroke: #d9534f; stroke-dasharray: 4 3; }
+                .chart .selection { fill: rgba(0, 0, 0, 0.08); }
+                .chart .cursor { stroke: #999; }
+                .chart .tip { position: absolute; pointer-events: none; background: #fff;
+                    border: 1px solid #ccc; padding: 4px 6px; font-size: 12px; display: none; }
+                .chart .legend span { cursor: pointer; margin-right: 12px; font-size: 0.9em; }
+                .chart .legend span.off { opacity: 0.35; }
+                .hint { color: #666; font-size: 0.85em; }
+"""
+
+# Рисование графиков в браузере: SVG по распакованным рядам, подсказка
+# с ближайшей точкой, масштаб выделением мышью, сброс двойным щелчком,
+# скрытие рядов щелчком по легенде
+CHART_SCRIPT = r"""
+<script>
+(function () {
+    var COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728'];
+    var W = 900, H = 260, L = 55, R = 10, T = 10, B = 30;
+    var SVG = 'http://www.w3.org/2000/svg';
+    var packed = JSON.parse(document.getElementById('chart-data').textContent);
+
+    function el(name, attrs, parent) {
+        var node = document.createElementNS(SVG, name);
+        for (var key in attrs) node.setAttribute(key, attrs[key]);
+        if (parent) parent.appendChild(node);
+        return node;
+    }
+
+    function pad(n) { return (n < 10 ? '0' : '') + n; }
+
+    function timeLabel(t, span) {
+        var d = new Date(t);
+        var hm = pad(d.getHours()) + ':' + pad(d.getMinutes());
+        if (span > 2 * 86400000) return pad(d.getDate()) + '.' + pad(d.getMonth() + 1) + ' ' + hm;
+        return span > 600000 ? hm : hm + ':' + pad(d.getSeconds());
+    }
+
+    function formatValue(v) {
+        if (v !== v) return 'н/д';
+        return Math.abs(v) >= 1e5 ? v.toPrecision(3) : v.toFixed(Math.abs(v) < 10 ? 2 : 1);
+    }
+
+    function lowerBound(times, t) {
+        var lo = 0, hi = times.length;
+        while (lo < hi) {
+            var mid = (lo + hi) >> 1;
+            if (times[mid] < t) lo = mid + 1; else hi = mid;
+        }
+        return lo;
+    }
+
+    function Chart(container, chart, times, series) {
+        this.container = container;
+        this.chart = chart;
+        this.times = times;
+        this.series = series;
+        this.visible = series.map(function () { return true; });
+        this.full = [times[0], times[times.length - 1]];
+        this.range = this.full.slice();
+        this.svg = el('svg', {viewBox: '0 0 ' + W + ' ' + H}, container);
+        this.tip = document.createElement('div');
+        this.tip.className = 'tip';
+        container.appendChild(this.tip);
+        this.legend();
+        this.events();
+        this.draw();
+    }
+
+    Chart.prototype.legend = function () {
+        var self = this, legend = document.createElement('div');
+        legend.className = 'legend';
+        this.chart.series.forEach(function (label, i) {
+            var item = document.createElement('span');
+            item.textContent = '■ ' + label;
+            item.style.color = COLORS[i % COLORS.length];
+            item.onclick = function () {
+                self.visible[i] = !self.visible[i];
+                item.className = self.visible[i] ? '' : 'off';
+                self.draw();
+            };
+            legend.appendChild(item);
+        });
+        this.container.appendChild(legend);
+    };
+
+    Chart.prototype.toX = function (t) {
+        var span = this.range[1] - this.range[0] || 1;
+        return L + (t - this.range[0]) / span * (W - L - R);
+    };
+
+    Chart.prototype.fromX = function (x) {
+        return this.range[0] + (x - L) / (W - L - R) * (this.range[1] - this.range[0]);
+    };
+
+    Chart.prototype.draw = function () {
+        var self = this, svg = this.svg, times = this.times;
+        while (svg.firstChild) svg.removeChild(svg.firstChild);
+        var lo = Math.max(lowerBound(times, this.range[0]) - 1, 0);
+        var hi = Math.min(lowerBound(times, this.range[1]) + 1, times.length);
+
+        var min = Infinity, max = -Infinity;
+        this.series.forEach(function (values, s) {
+            if (!self.visible[s]) return;
+            for (var i = lo; i < hi; i++) {
+                var v = values[i];
+                if (v < min) min = v;
+                if (v > max) max = v;
+            }
+        });
+        if (this.chart.threshold != null && this.chart.unit === '%') {
+            min = Math.min(min, 0);
+            max = Math.max(max, this.chart.threshold);
+        }
+        if (!isFinite(min)) { min = 0; max = 1; }
+        if (max === min) max = min + 1;
+        this.min = min;
+        this.max = max;
+        var toY = function (v) { return T + (max - v) / (max - min) * (H - T - B); };
+
+        for (var k = 0; k <= 4; k++) {
+            var value = min + (max - min) * k / 4, y = toY(value);
+            el('line', {x1: L, x2: W - R, y1: y, y2: y, 'class': 'grid'}, svg);
+            el('text', {x: L - 5, y: y + 4, 'text-anchor': 'end', 'class': 'axis'}, svg)
+                .textContent = formatValue(value);
+        }
+        var span = this.range[1] - this.range[0];
+        for (k = 0; k <= 5; k++) {
+            var t = this.range[0] + span * k / 5;
+            el('text', {x: this.toX(t), y: H - 8, 'text-anchor': 'middle', 'class': 'axis'}, svg)
+                .textContent = timeLabel(t, span);
+        }
+        if (this.chart.threshold != null) {
+            var ty = toY(this.chart.threshold);
+            el('line', {x1: L, x2: W - R, y1: ty, y2: ty, 'class': 'threshold'}, svg);
+        }
+
+        this.series.forEach(function (values, s) {
+            if (!self.visible[s]) return;
+            var d = [], move = true;
+            for (var i = lo; i < hi; i++) {
+                var v = values[i];
+                if (v !== v) { move = true; continue; }
+                d.push((move ? 'M' : 'L') + self.toX(times[i]).toFixed(1) + ' ' + toY(v).toFixed(1));
+                move = false;
+            }
+            el('path', {d: d.join(''), fill: 'none', stroke: COLORS[s % COLORS.length],
+                        'stroke-width': 1.5}, svg);
+        });
+        el('rect', {x: L, y: T, width: W - L - R, height: H - T - B, fill: 'none',
+                    stroke: '#ccc'}, svg);
+        this.cursor = el('line', {y1: T, y2: H - B, 'class': 'cursor', visibility: 'hidden'}, svg);
+        this.selection = el('rect', {y: T, height: H - T - B, width: 0, 'class': 'selection'}, svg);
+    };
+
+    Chart.prototype.svgX = function (event) {
+        var box = this.svg.getBoundingClientRect();
+        return Math.min(Math.max((event.clientX - box.left) / box.width * W, L), W - R);
+    };
+
+    Chart.prototype.events = function () {
+        var self = this, svg = this.svg, start = null;
+        svg.addEventListener('mousedown', function (event) { start = self.svgX(event); });
+        svg.addEventListener('mousemove', function (event) {
+            var x = self.svgX(event);
+            if (start !== null) {
+                self.selection.setAttribute('x', Math.min(start, x));
+                self.selection.setAttribute('width', Math.abs(x - start));
+            }
+            self.hover(x, event);
+        });
+        svg.addEventListener('mouseup', function (event) {
+            var x = self.svgX(event);
+            if (start !== null && Math.abs(x - start) > 5) {
+                var a = self.fromX(Math.min(start, x)), b = self.fromX(Math.max(start, x));
+                self.range = [a, b];
+                self.draw();
+            } else {
+                self.selection.setAttribute('width', 0);
+            }
+            start = null;
+        });
+        svg.addEventListener('mouseleave', function () {
+            self.cursor.setAttribute('visibility', 'hidden');
+            self.tip.style.display = 'none';
+        });
+        svg.addEventListener('dblclick', function () {
+            self.range = self.full.slice();
+            self.draw();
+        });
+    };
+
+    Chart.prototype.hover = function (x, event) {
+        var times = this.times, t = this.fromX(x);
+        var i = Math.min(lowerBound(times, t), times.length - 1);
+        if (i > 0 && t - times[i - 1] < times[i] - t) i--;
+        var cx = this.toX(times[i]);
+        this.cursor.setAttribute('x1', cx);
+        this.cursor.setAttribute('x2', cx);
+        this.cursor.setAttribute('visibility', 'visible');
+        var lines = [new Date(times[i]).toLocaleString()], self = this;
+        this.chart.series.forEach(function (label, s) {
+            if (self.visible[s]) {
+                lines.push(label + ': ' + formatValue(self.series[s][i]) + ' ' + self.chart.unit);
+            }
+        });
+        this.tip.innerHTML = lines.join('<br>');
+        var box = this.container.getBoundingClientRect();
+        this.tip.style.left = (event.clientX - box.left + 12) + 'px';
+        this.tip.style.top = (event.clientY - box.top + 12) + 'px';
+        this.tip.style.display = 'block';
+    };
+
+    function render(buffer) {
+        var offset = 0;
+        packed.charts.forEach(function (chart) {
+            var n = chart.points;
+            var deltas = new Int32Array(buffer, offset, n);
+            offset += 4 * n;
+            var times = new Float64Array(n), t = chart.start;
+            for (var i = 0; i < n; i++) { t += deltas[i]; times[i] = t; }
+            var series = chart.series.map(function () {
+                var values = new Float32Array(buffer, offset, n);
+                offset += 4 * n;
+                return values;
+            });
+            new Chart(document.getElementById('chart-' + chart.id), chart, times, series);
+        });
+    }
+
+    function fail(message) {
+        packed.charts.forEach(function (chart) {
+            document.getElementById('chart-' + chart.id).textContent = message;
+        });
+    }
+
+    if (typeof DecompressionStream === 'undefined') {
+        fail('Браузер не поддерживает DecompressionStream: графики недоступны');
+        return;
+    }
+    var binary = atob(packed.data), bytes = new Uint8Array(binary.length);
+    for (var i = 0; i < binary.length; i++) bytes[i] = binary.charCodeAt(i);
+    new Response(new Blob([bytes]).stream().pipeThrough(new DecompressionStream('deflate')))
+        .arrayBuffer().then(render, function (error) { fail('Ошибка распаковки: ' + error); });
+})();
+</script>
+"""
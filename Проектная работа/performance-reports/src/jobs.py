@@ -0,0 +1,185 @@
+"""
+Асинхронный запуск задач по расписанию
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Callable, Optional
+from config import get_config, ensure_directories
+from .storage import MetricsWriter
+
+# Дни недели в порядке datetime.weekday()
+WEEKDAYS = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday',
+            'saturday', 'sunday']
+
+# Самый долгий непрерывный сон: после него время до запуска пересчитывается
+# по настенным часам (перевод часов, сон машины)
+MAX_SLEEP = 3600
+
+
+def next_run(frequency: str, after: datetime,
+             config: Optional[Dict[str, Any]] = None) -> datetime:
+    """Ближайший момент запуска задачи строго после after"""
+    scheduling = (config or get_config())['scheduling']
+    if frequency == 'hourly':
+        return after.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+    
+    candidate = datetime.combine(after.date(), scheduling['daily_time'])
+    if frequency == 'daily':
+        return candidate if candidate > after else candidate + timedelta(days=1)
+    if frequency == 'weekly':
+        weekday = WEEKDAYS.index(scheduling['weekly_day'])
+        candidate += timedelta(days=(weekday - after.weekday()) % 7)
+        return candidate if candidate > after else candidate + timedelta(days=7)
+    raise ValueError(f"Неизвестная частота: {frequency}")
+
+
+def last_missed_run(frequency: str, last_due: datetime, now: datetime,
+                    config: Optional[Dict[str, Any]] = None) -> Optional[datetime]:
+    """Последний плановый запуск после last_due, не позже now (или None)"""
+    missed = None
+    due = next_run(frequency, last_due, config)
+    while due <= now:
+        missed = due
+        due = next_run(frequency, due, config)
+    return missed
+
+
+class JobRunner:
+    """Запуск задач task(frequency, due) точно в срок на asyncio
+    
+    У каждой частоты свой цикл ожидания и свой лимит одновременных
+    запусков (jobs.concurrency): если лимит занят, очередной запуск
+    пропускается, а не копится. Сама работа идет в пуле потоков, поэтому
+    долгий недельный отчет не задерживает часовые. Пропущенный, пока
+    процесс не работал, запуск выполняется один раз при старте.
+    Для каждого запуска записываются задержка и длительность.
+    """
+    
+    def __init__(self, frequencies: List[str], task: Callable[[str, datetime], Any]):
+        self.config = get_config()
+        settings = self.config['jobs']
+        self.frequencies = list(frequencies)
+        self.task = task
+        self.limits = {f: settings['concurrency'].get(f, 1) for f in self.frequencies}
+        self.catch_up = settings['catch_up']
+        self.state_file = settings['state_file']
+        self.log_file = settings['log_file']
+        self.history = deque(maxlen=settings['history_size'])
+        self._running = {f: 0 for f in self.frequencies}
+        self._state = self._load_state()
+        self._executor = None
+        self._log = None
+        self._tasks = set()
+    
+    async def run(self):
+        """Работа до отмены (Ctrl+C)"""
+        self._executor = ThreadPoolExecutor(max_workers=sum(self.limits.values()),
+                                            thread_name_prefix='job')
+        ensure_directories(os.path.dirname(self.log_file) or '.')
+        self._log = MetricsWriter(self.log_file)
+        try:
+            await asyncio.gather(*(self._schedule(f) for f in self.frequencies))
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._log.close()
+    
+    async def _schedule(self, frequency: str):
+        """Цикл одной частоты: сон до срока и запуск без ожидания завершения"""
+        now = datetime.now()
+        last_due = self._state.get(frequency)
+        if not last_due:
+            # Первый старт: пропущенным считается только то, что после него
+            self._state[frequency] = now.isoformat()
+            self._save_state()
+        elif self.catch_up:
+            missed = last_missed_run(frequency, datetime.fromisoformat(last_due), now,
+                                     self.config)
+            if missed:
+                print(f"Пропущенный запуск {frequency} ({missed.isoformat(' ', 'minutes')}) "
+                      f"выполняется сейчас")
+                self._start(frequency, missed, catch_up=True)
+        due = next_run(frequency, now, self.config)
+        
+        while True:
+            delay = (due - datetime.now()).total_seconds()
+            if delay > 0:
+                await asyncio.sleep(min(delay, MAX_SLEEP))
+                continue
+            self._start(frequency, due)
+            due = next_run(frequency, max(due, datetime.now()), self.config)
+    
+    def _start(self, frequency: str, due: datetime, catch_up: bool = False):
+        task = asyncio.create_task(self._run(frequency, due, catch_up))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+    
+    async def _run(self, frequency: str, due: datetime, catch_up: bool):
+        """Один запуск задачи в пуле потоков с учетом лимита и замером времени"""
+        started = datetime.now()
+        record = {
+            'job': frequency,
+            'due': due.isoformat(),
+            'started': started.isoformat(),
+            'lag': (started - due).total_seconds(),
+            'catch_up': catch_up
+        }
+        
+        if self._running[frequency] >= self.limits[frequency]:
+            record.update(status='skipped', duration=0.0)
+            self._finish(record)
+            return
+        
+        self._running[frequency] += 1
+        clock = time.monotonic()
+        try:
+            loop = asyncio.get_running_loop()
+            await loop.run_in_executor(self._executor, self.task, frequency, due)
+            record['status'] = 'ok'
+        except Exception as e:
+            record.update(status='error', error=str(e))
+        finally:
+            self._running[frequency] -= 1
+            record['duration'] = time.monotonic() - clock
+        
+        # Догоняющий запуск может закончиться позже планового
+        if due.isoformat() > self._state.get(frequency, ''):
+            self._state[frequency] = due.isoformat()
+            self._save_state()
+        self._finish(record)
+    
+    def _finish(self, record: Dict[str, Any]):
+        """Учет завершенного запуска в истории и журнале"""
+        self.history.append(record)
+        if self._log is not None:
+            self._log.write(record)
+        message = f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {record['job']}: "
+        message += f"{record['status']}, задержка {record['lag']:.3f} сек, "
+        message += f"длительность {record['duration']:.1f} сек"
+        if 'error' in record:
+            message += f" ({record['error']})"
+        print(message)
+    
+    def _load_state(self) -> Dict[str, str]:
+        """Сроки последних выполненных запусков по частотам"""
+        if not os.path.exists(self.state_file):
+            return {}
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def _save_state(self):
+        ensure_directories(os.path.dirname(self.state_file) or '.')
+        tmp_path = self.state_file + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._state, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.state_file)
\ No newline at end of file
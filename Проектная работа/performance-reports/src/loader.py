@@ -0,0 +1,339 @@
+"""
+Общий загрузчик метрик с кэшем разобранных наборов данных
+"""
+
+import os
+import tempfile
+import threading
+import numpy as np
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Callable, Iterable, Iterator, Optional, Union
+from config import DEFAULT_CONFIG
+from .schema import split_fields, parse_timestamp, parse_datetime
+from .segment import Segment, remove_segment, write_records
+from .storage import detect_format, iter_metrics, load_metrics, time_span
+from .store import MetricsStore
+from .rollups import file_tier_path, store_tier_files, select_resolution
+from .rates import RateEngine, stale_mask
+from .validator import validate_date_range
+
+
+# Оценка памяти на одну запись в виде вложенных словарей Python
+RECORD_SIZE_ESTIMATE = 3072
+_CHUNK = 4096
+
+
+class MetricsDataset:
+    """Разобранный набор метрик
+    
+    Ведет себя как неизменяемый список записей (len, индексы, перебор) и
+    выдает колонки NumPy только для чтения. Колонки строятся один раз
+    при первом обращении. Для сегментов колонки - представления над mmap,
+    а записи восстанавливаются только по требованию.
+    """
+    
+    def __init__(self, records: Optional[Iterable[Dict[str, Any]]] = None,
+                 segment: Optional[Segment] = None, source: str = ''):
+        self._records = tuple(records) if records is not None else None
+        self._segment = segment
+        self.source = source
+        self._columns = {}
+        self._stale = {}
+        self._timestamps = None
+        self._datetimes = None
+        self._rates = None
+        self._lock = threading.Lock()
+    
+    def __len__(self) -> int:
+        if self._records is not None:
+            return len(self._records)
+        return len(self._segment)
+    
+    def __getitem__(self, i: Union[int, slice]):
+        if self._records is not None:
+            return self._records[i]
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            return tuple(self._segment.to_records(start, stop)[::step])
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("Индекс вне набора данных")
+        return self._segment.to_records(i, i + 1)[0]
+    
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        if self._records is not None:
+            yield from self._records
+            return
+        for start in range(0, len(self), _CHUNK):
+            yield from self._segment.to_records(start, start + _CHUNK)
+    
+    @property
+    def records(self) -> tuple:
+        """Все записи (для сегмента восстанавливаются один раз)"""
+        if self._records is None:
+            self._records = tuple(self._segment.to_records())
+        return self._records
+    
+    @property
+    def numeric_only(self) -> bool:
+        """Набор читается из сегмента без нечисловых полей"""
+        return self._records is None and not self._segment.has_extras
+    
+    @property
+    def is_rollup(self) -> bool:
+        """Набор состоит из строк агрегатов"""
+        return len(self) > 0 and 'rollup' in self[0]
+    
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Метки времени в секундах от эпохи"""
+        if self._timestamps is None:
+            if self._segment is not None:
+                values = self._segment.timestamps()
+            else:
+                values = np.fromiter((parse_timestamp(m['timestamp']) for m in self._records),
+                                     dtype=np.float64, count=len(self._records))
+            self._timestamps = _read_only(values)
+        return self._timestamps
+    
+    @property
+    def datetimes(self) -> np.ndarray:
+        """Метки времени как datetime64 (локальное время, для графиков)"""
+        if self._datetimes is None:
+            if self._segment is not None:
+                values = _local_datetimes(self._segment.raw_column('timestamp'))
+            else:
+                values = np.array([m['timestamp'] for m in self._records],
+                                  dtype='datetime64[us]')
+            self._datetimes = _read_only(values)
+        return self._datetimes
+    
+    def column(self, field: str) -> np.ndarray:
+        """Значения поля 'группа.поле' (отсутствующие - NaN)"""
+        if field not in self._columns:
+            with self._lock:
+                if field not in self._columns:
+                    self._columns[field] = _read_only(self._build_column(field))
+        return self._columns[field]
+    
+    def stale(self, group: str) -> Optional[np.ndarray]:
+        """Маска записей с перенесенными значениями группы (None, если их нет)"""
+        if self.numeric_only:
+            return None
+        if group not in self._stale:
+            with self._lock:
+                if group not in self._stale:
+                    # У сегмента пометки лежат среди его нечисловых полей
+                    metrics = self._records if self._records is not None \
+                        else self._segment.extras
+                    self._stale[group] = stale_mask(metrics, group)
+        return self._stale[group]
+    
+    @property
+    def rates(self) -> RateEngine:
+        """Скорости накопительных счетчиков (кэшируются вместе с набором)"""
+        if self._rates is None:
+            self._rates = RateEngine(self.timestamps, self.column, self.stale)
+        return self._rates
+    
+    @property
+    def nbytes(self) -> int:
+        """Оценка занимаемой памяти"""
+        size = sum(c.nbytes for c in self._columns.values())
+        if self._records is not None:
+            size += len(self._records) * RECORD_SIZE_ESTIMATE
+        return size
+    
+    def _build_column(self, field: str) -> np.ndarray:
+        if self._segment is not None:
+            if field not in self._segment:
+                return np.full(len(self), np.nan)
+            values = self._segment.column(field)
+            nulls = self._segment.nulls(field)
+            if nulls is not None:
+                values = values.astype(np.float64)
+                values[nulls] = np.nan
+            return values
+        (group, name), = split_fields((field,))
+        values = (m.get(group, {}).get(name) for m in self._records)
+        return np.fromiter((np.nan if v is None else v for v in values),
+                           dtype=np.float64, count=len(self._records))
+
+
+class DatasetCache:
+    """Кэш наборов данных с бюджетом памяти и вытеснением давно неиспользуемых"""
+    
+    def __init__(self, budget_bytes: int):
+        self.budget_bytes = budget_bytes
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.RLock()
+    
+    def get(self, key: tuple, load: Callable[[], MetricsDataset]) -> MetricsDataset:
+        """Набор по ключу; при отсутствии загружается через load()"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            
+            self.misses += 1
+            dataset = load()
+            self._items[key] = dataset
+            self._evict(keep=key)
+            return dataset
+    
+    @property
+    def size(self) -> int:
+        return sum(d.nbytes for d in self._items.values())
+    
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+    
+    def _evict(self, keep: tuple):
+        while len(self._items) > 1 and self.size > self.budget_bytes:
+            oldest = next(iter(self._items))
+            if oldest == keep:
+                break
+            self._items.pop(oldest)
+
+
+_cache = None
+
+
+def get_cache() -> DatasetCache:
+    """Общий кэш процесса"""
+    global _cache
+    if _cache is None:
+        budget = DEFAULT_CONFIG.get('loader', {}).get('cache_mb', 256) * 1024 * 1024
+        _cache = DatasetCache(budget)
+    return _cache
+
+
+def as_dataset(metrics: Union[MetricsDataset, List[Dict[str, Any]]]) -> MetricsDataset:
+    """Набор данных из списка записей (набор возвращается как есть)"""
+    if isinstance(metrics, MetricsDataset):
+        return metrics
+    return MetricsDataset(metrics)
+
+
+def load_dataset(filename: str) -> MetricsDataset:
+    """Разобранный файл метрик; повторные вызовы для неизмененного файла
+    возвращают тот же объект"""
+    return get_cache().get(('file',) + _file_key(filename), lambda: _read_file(filename))
+
+
+def load_file(filename: str, tiers: Iterable[int] = (), max_points: int = 0) -> MetricsDataset:
+    """Файл метрик или его агрегаты самого грубого подходящего уровня"""
+    available = [r for r in tiers if os.path.exists(file_tier_path(filename, r))]
+    if available and max_points:
+        first, last = time_span(filename)
+        resolution = select_resolution(last - first, max_points, available)
+        if resolution is not None:
+            return load_dataset(file_tier_path(filename, resolution))
+    return load_dataset(filename)
+
+
+def load_period(root: str, start: str, end: Optional[str] = None,
+                tiers: Iterable[int] = (), max_points: int = 0) -> MetricsDataset:
+    """Записи хранилища за период, заданный ISO-строками (конец - по умолчанию сейчас)
+    
+    Для длинных периодов читается самый грубый уровень агрегатов, дающий
+    не меньше max_points точек. Ключ кэша включает размеры и время
+    изменения прочитанных файлов.
+    """
+    end = end or datetime.now().isoformat()
+    validate_date_range(start, end)
+    start_dt, end_dt = parse_datetime(start), parse_datetime(end)
+    store = MetricsStore(root)
+    
+    resolution = None
+    if tiers and max_points:
+        resolution = select_resolution((end_dt - start_dt).total_seconds(), max_points, tiers)
+    files = store_tier_files(root, resolution, start_dt, end_dt) if resolution else []
+    if not files:
+        resolution = None
+        files = store.range_files(start_dt, end_dt)
+    if not files:
+        # Сырые данные удалены по сроку хранения - самый подробный из уровней
+        for resolution in sorted(tiers):
+            files = store_tier_files(root, resolution, start_dt, end_dt)
+            if files:
+                break
+        else:
+            resolution = None
+    
+    def read() -> MetricsDataset:
+        if resolution:
+            lo, hi = start_dt.timestamp(), end_dt.timestamp()
+            rows = [m for f in files for m in iter_metrics(f)
+                    if lo <= parse_timestamp(m['timestamp']) <= hi]
+            if rows:
+                return MetricsDataset(rows, source=root)
+        return MetricsDataset(store.iter_range(start_dt, end_dt), source=root)
+    
+    key = ('period', os.path.abspath(root), start_dt.timestamp(), end_dt.timestamp(),
+           resolution) + tuple(_file_key(f) for f in files)
+    return get_cache().get(key, read)
+
+
+@contextmanager
+def shared_segment(dataset: MetricsDataset) -> Iterator[str]:
+    """Путь к сегменту с данными набора для чтения из других процессов
+    
+    Набор, открытый из сегмента, отдается как есть. Иначе записи один раз
+    сохраняются во временный сегмент, который удаляется при выходе.
+    """
+    if dataset._segment is not None:
+        yield dataset.source
+        return
+    
+    fd, path = tempfile.mkstemp(suffix='.seg', prefix='metrics_')
+    os.close(fd)
+    try:
+        write_records(path, dataset)
+        yield path
+    finally:
+        if os.path.exists(path):
+            remove_segment(path)
+
+
+def _read_file(filename: str) -> MetricsDataset:
+    if detect_format(filename) == 'segment':
+        return MetricsDataset(segment=Segment(filename), source=filename)
+    return MetricsDataset(load_metrics(filename), source=filename)
+
+
+def _file_key(filename: str) -> tuple:
+    stat = os.stat(filename)
+    return os.path.abspath(filename), stat.st_mtime_ns, stat.st_size
+
+
+def _read_only(values: np.ndarray) -> np.ndarray:
+    view = values.view()
+    view.flags.writeable = False
+    return view
+
+
+def _local_datetimes(epoch_us: np.ndarray) -> np.ndarray:
+    """Микросекунды от эпохи -> локальное время datetime64"""
+    if len(epoch_us) == 0:
+        return np.array([], dtype='datetime64[us]')
+    
+    def offset_us(value: int) -> int:
+        moment = value / 1_000_000
+        local = datetime.fromtimestamp(moment)
+        utc = datetime.fromtimestamp(moment, timezone.utc).replace(tzinfo=None)
+        return int((local - utc).total_seconds() * 1_000_000)
+    
+    first, last = offset_us(int(epoch_us[0])), offset_us(int(epoch_us[-1]))
+    if first == last:
+        return (epoch_us + first).astype('datetime64[us]')
+    # Период пересекает смену часового пояса (летнее время)
+    return np.array([datetime.fromtimestamp(v / 1_000_000) for v in epoch_us.tolist()],
+                    dtype='datetime64[us]')
@@ -0,0 +1,72 @@
+"""
+Собственные затраты мониторинга: время сбора, CPU и память процесса
+"""
+
+import time
+import numpy as np
+import psutil
+from typing import Dict, List, Any, Iterable, Optional
+
+# Время CPU процесса растет тиками ядра (обычно 10 мс), поэтому загрузка
+# считается по окну не короче этого
+MIN_WINDOW = 0.5
+
+
+class ProcessMeter:
+    """Загрузка CPU (в % одного ядра) и RSS собственного процесса"""
+    
+    def __init__(self):
+        self.process = psutil.Process()
+        self._cpu_time = self._read_cpu_time()
+        self._read_at = time.monotonic()
+        self._percent = None
+    
+    def sample(self) -> Dict[str, Any]:
+        """Показания; загрузка - за последнее окно не короче MIN_WINDOW"""
+        now = time.monotonic()
+        if now - self._read_at >= MIN_WINDOW:
+            cpu_time = self._read_cpu_time()
+            self._percent = round((cpu_time - self._cpu_time) / (now - self._read_at) * 100, 2)
+            self._cpu_time, self._read_at = cpu_time, now
+        return {'cpu_percent': self._percent, 'rss': self.process.memory_info().rss}
+    
+    def _read_cpu_time(self) -> float:
+        times = self.process.cpu_times()
+        return times.user + times.system
+
+
+def summarize_overhead(metrics: Iterable[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Затраты мониторинга за период по полю 'overhead' записей
+    
+    Время вызовов - среднее, p95 и максимум в миллисекундах (по
+    измерениям, где группа действительно читалась, без кэша). Возвращает
+    None, если затраты не записывались (metrics.overhead выключен или
+    набор из сегментов).
+    """
+    if getattr(metrics, 'numeric_only', False):
+        return None
+    rows = [m['overhead'] for m in metrics if m.get('overhead')]
+    if not rows:
+        return None
+    
+    timings = {}
+    for row in rows:
+        for group, value in row['timings_ms'].items():
+            timings.setdefault(group, []).append(value)
+    # До первого полного окна загрузка CPU неизвестна
+    cpu = np.array([row['cpu_percent'] for row in rows if row['cpu_percent'] is not None])
+    rss = np.array([row['rss'] for row in rows])
+    return {
+        'samples': len(rows),
+        'total_ms': _distribution([row['total_ms'] for row in rows]),
+        'timings_ms': {group: _distribution(values) for group, values in timings.items()},
+        'cpu_percent': {'mean': float(cpu.mean()) if len(cpu) else 0.0,
+                        'max': float(cpu.max()) if len(cpu) else 0.0},
+        'rss': {'last': int(rss[-1]), 'max': int(rss.max())}
+    }
+
+
+def _distribution(values: List[float]) -> Dict[str, float]:
+    values = np.asarray(values, dtype=np.float64)
+    return {'mean': float(values.mean()), 'p95': float(np.percentile(values, 95)),
+            'max': float(values.max())}
\ No newline at end of file
@@ -0,0 +1,211 @@
+"""
+Самые нагруженные процессы: выборка по CPU и памяти
+"""
+
+import heapq
+import time
+from collections import deque
+import psutil
+from typing import Dict, List, Any, Iterable, Optional
+
+# Атрибуты, которые читаются у процесса за один проход (oneshot)
+ATTRS = ['name', 'cpu_times', 'memory_info']
+
+
+class _ProcessEntry:
+    """Кэшированный процесс и его последние показания"""
+    
+    __slots__ = ('process', 'name', 'cpu_time', 'read_at', 'cpu_percent', 'rss')
+    
+    def __init__(self, process: psutil.Process):
+        self.process = process
+        self.name = None
+        self.cpu_time = None
+        self.read_at = None
+        self.cpu_percent = None
+        self.rss = 0
+    
+    def update(self, info: Dict[str, Any], now: float):
+        """Новые показания; загрузка CPU - по разнице с прошлым чтением"""
+        if info.get('name') is not None:
+            self.name = info['name']
+        cpu_times = info.get('cpu_times')
+        if cpu_times is not None:
+            cpu_time = cpu_times.user + cpu_times.system
+            if self.cpu_time is not None and cpu_time < self.cpu_time:
+                # Номер занят новым процессом: прошлые показания не годятся
+                self.name = None
+                self.cpu_time = None
+            if self.cpu_time is not None and now > self.read_at:
+                self.cpu_percent = round(
+                    max(cpu_time - self.cpu_time, 0.0) / (now - self.read_at) * 100, 1)
+            self.cpu_time = cpu_time
+            self.read_at = now
+        memory = info.get('memory_info')
+        if memory is not None:
+            self.rss = memory.rss
+
+
+class ProcessSampler:
+    """Топ-N процессов по загрузке CPU и резидентной памяти
+    
+    Объекты psutil.Process живут между измерениями, поэтому загрузка CPU
+    считается по разнице cpu_times, а не создается заново на каждый такт.
+    Первое измерение читает все процессы через process_iter(attrs). Дальше
+    за такт перечитываются только лидеры и очередная порция остальных
+    процессов по кругу (scan_batch), и рейтинг строится по лидерам и
+    перечитанным, так что стоимость такта почти не зависит от числа
+    процессов. Круг идет по очереди (FIFO): каждый процесс перечитывается
+    не реже раза за число_процессов / scan_batch тактов. Список номеров
+    (новые и завершившиеся процессы) читается раз в discovery_interval
+    секунд; новые процессы читаются в двух ближайших тактах (исходные
+    показания и загрузка CPU), завершившийся лидер удаляется сразу.
+    """
+    
+    def __init__(self, top_n: int = 10, scan_batch: int = 25,
+                 discovery_interval: float = 5.0):
+        self.top_n = top_n
+        self.scan_batch = scan_batch
+        self.discovery_interval = discovery_interval
+        self._cache = {}
+        # Запас лидеров: процесс, выпавший из топа, остается кандидатом
+        self._leaders = set()
+        self._rotation = deque()
+        # Новые процессы: прочитать в ближайшем такте и еще раз в следующем
+        self._new = set()
+        self._recheck = set()
+        self._discovered_at = None
+        self.last_duration = 0.0
+    
+    def sample(self) -> Dict[str, Any]:
+        """Число процессов и списки лидеров по CPU и памяти"""
+        started = time.perf_counter()
+        if self._discovered_at is None:
+            self._full_scan()
+            candidates = list(self._cache.values())
+        else:
+            if time.monotonic() - self._discovered_at >= self.discovery_interval:
+                self._discover()
+            refreshed = self._refresh()
+            candidates = [self._cache[pid] for pid in self._leaders | refreshed
+                          if pid in self._cache]
+        
+        pool = 2 * self.top_n
+        top_cpu = heapq.nlargest(pool, (e for e in candidates if e.cpu_percent),
+                                 key=lambda e: e.cpu_percent)
+        top_memory = heapq.nlargest(pool, (e for e in candidates if e.rss),
+                                    key=lambda e: e.rss)
+        self._leaders = {e.process.pid for e in top_cpu} | {e.process.pid for e in top_memory}
+        self.last_duration = time.perf_counter() - started
+        
+        return {
+            'count': len(self._cache),
+            'top_cpu': [self._describe(e) for e in top_cpu[:self.top_n]],
+            'top_memory': [self._describe(e) for e in top_memory[:self.top_n]]
+        }
+    
+    def _full_scan(self):
+        """Чтение всех процессов (первое измерение)"""
+        now = time.monotonic()
+        for process in psutil.process_iter(ATTRS, ad_value=None):
+            entry = _ProcessEntry(process)
+            entry.update(process.info, now)
+            self._cache[process.pid] = entry
+        self._discovered_at = now
+    
+    def _discover(self):
+        """Сверка кэша со списком процессов: новые добавляются, завершившиеся удаляются"""
+        pids = set(psutil.pids())
+        for pid in self._cache.keys() - pids:
+            del self._cache[pid]
+        new = pids - self._cache.keys()
+        for pid in new:
+            try:
+                self._cache[pid] = _ProcessEntry(psutil.Process(pid))
+            except psutil.Error:
+                continue
+        self._rotation = deque(pid for pid in self._rotation if pid in self._cache)
+        self._rotation.extend(sorted(pid for pid in new if pid in self._cache))
+        self._new.update(pid for pid in new if pid in self._cache)
+        self._discovered_at = time.monotonic()
+    
+    def _refresh(self) -> set:
+        """Чтение лидеров и порции остальных, возвращает номера прочитанных"""
+        if not self._rotation:
+            self._rotation = deque(sorted(self._cache))
+        batch = [self._rotation.popleft()
+                 for _ in range(min(self.scan_batch, len(self._rotation)))]
+        new, self._new = self._new, set()
+        
+        refreshed = set()
+        now = time.monotonic()
+        for pid in self._leaders.union(batch, new, self._recheck):
+            entry = self._cache.get(pid)
+            if entry is None:
+                continue
+            try:
+                # Прямые вызовы дешевле as_dict: без перебора атрибутов
+                info = {'cpu_times': entry.process.cpu_times(),
+                        'memory_info': entry.process.memory_info()}
+                if entry.name is None:
+                    info['name'] = entry.process.name()
+            except psutil.NoSuchProcess:
+                del self._cache[pid]
+                continue
+            except psutil.AccessDenied:
+                continue
+            entry.update(info, now)
+            refreshed.add(pid)
+        # Загрузка CPU нового процесса известна после второго чтения
+        self._recheck = new & refreshed
+        return refreshed
+    
+    @staticmethod
+    def _describe(entry: _ProcessEntry) -> Dict[str, Any]:
+        return {
+            'pid': entry.process.pid,
+            'name': entry.name,
+            'cpu_percent': entry.cpu_percent or 0.0,
+            'rss': entry.rss
+        }
+
+
+def summarize_processes(metrics: Iterable[Dict[str, Any]],
+                        top_n: int = 10) -> Optional[Dict[str, Any]]:
+    """Лидеры за период по спискам процессов в записях
+    
+    Средняя загрузка CPU считается по всем измерениям с данными о
+    процессах (вне топа - как ноль), память - по максимуму RSS.
+    Возвращает None, если процессы не собирались.
+    """
+    if getattr(metrics, 'numeric_only', False):
+        # В сегментах списков процессов нет, записи не восстанавливаются
+        return None
+    samples = 0
+    totals = {}
+    for metric in metrics:
+        processes = metric.get('processes')
+        if not processes:
+            continue
+        samples += 1
+        seen = {}
+        for entry in processes['top_cpu'] + processes['top_memory']:
+            seen[(entry['pid'], entry['name'])] = entry
+        for key, entry in seen.items():
+            total = totals.setdefault(key, {'pid': key[0], 'name': key[1],
+                                            'cpu_sum': 0.0, 'cpu_max': 0.0, 'rss_max': 0})
+            total['cpu_sum'] += entry['cpu_percent']
+            total['cpu_max'] = max(total['cpu_max'], entry['cpu_percent'])
+            total['rss_max'] = max(total['rss_max'], entry['rss'])
+    
+    if not samples:
+        return None
+    rows = [{'pid': t['pid'], 'name': t['name'], 'cpu_mean': t['cpu_sum'] / samples,
+             'cpu_max': t['cpu_max'], 'rss_max': t['rss_max']} for t in totals.values()]
+    return {
+        'samples': samples,
+        'top_cpu': heapq.nlargest(top_n, (r for r in rows if r['cpu_max'] > 0),
+                                  key=lambda r: r['cpu_mean']),
+        'top_memory': heapq.nlargest(top_n, (r for r in rows if r['rss_max'] > 0),
+                                     key=lambda r: r['rss_max'])
+    }
\ No newline at end of file
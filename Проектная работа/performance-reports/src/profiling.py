@@ -0,0 +1,64 @@
+"""
+Профилирование команд (cProfile)
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import threading
+from config import ensure_directories
+
+
+class Profiler:
+    """cProfile основного потока и всех потоков, запущенных после start
+    
+    Сбор демона и отправка агента идут в отдельных потоках, поэтому
+    каждому новому потоку при старте назначается свой профилировщик, а
+    при остановке статистика всех потоков сводится в один файл (формат
+    pstats: snakeviz, python -m pstats). Рабочие процессы графиков не
+    профилируются.
+    """
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        self._profiles = []
+        self._lock = threading.Lock()
+    
+    def start(self):
+        self._profiles = [cProfile.Profile()]
+        threading.setprofile(self._start_thread)
+        self._profiles[0].enable()
+    
+    def stop(self, top: int = 15) -> str:
+        """Остановка и запись дампа; возвращает сводку самых дорогих вызовов"""
+        threading.setprofile(None)
+        self._profiles[0].disable()
+        with self._lock:
+            profiles = list(self._profiles)
+        
+        stats = None
+        for profile in profiles:
+            profile.create_stats()
+            if not profile.stats:
+                continue
+            if stats is None:
+                stats = pstats.Stats(profile)
+            else:
+                stats.add(profile)
+        if stats is None:
+            return ""
+        
+        ensure_directories(os.path.dirname(self.filename) or '.')
+        stats.dump_stats(self.filename)
+        output = io.StringIO()
+        stats.stream = output
+        stats.sort_stats('cumulative').print_stats(top)
+        return output.getvalue()
+    
+    def _start_thread(self, frame, event, arg):
+        # Хук вызывается уже в новом потоке: его профилировщик заменяет хук
+        profile = cProfile.Profile()
+        with self._lock:
+            self._profiles.append(profile)
+        profile.enable()
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+Расчет скоростей по накопительным счетчикам
+"""
+
+import numpy as np
+from typing import Dict, List, Any, Callable, Iterable, Optional, Union
+from .schema import COUNTER_FIELDS, COUNTER_GROUPS, get_field, parse_timestamp
+
+
+def counter_rate(timestamps: np.ndarray, values: np.ndarray,
+                 resets: Optional[np.ndarray] = None,
+                 fresh: Optional[np.ndarray] = None) -> np.ndarray:
+    """Скорость изменения счетчика в единицах в секунду
+    
+    Результат выровнен по timestamps: первый элемент - NaN. Уменьшение
+    счетчика (перезагрузка или переполнение) считается сбросом: прирост
+    на этом шаге равен текущему значению, т.е. отсчет ведется от нуля.
+    Дополнительные сбросы можно передать маской resets длиной n - 1.
+    fresh - маска измерений, в которых счетчик действительно прочитан:
+    скорость считается только между ними, в остальных - NaN.
+    """
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float64)
+    if fresh is not None:
+        indices = np.flatnonzero(fresh)
+        if resets is not None:
+            # Сброс где-либо между соседними свежими измерениями
+            passed = np.concatenate(([0], np.cumsum(resets)))
+            resets = passed[indices[1:]] > passed[indices[:-1]]
+        rates = np.full(len(values), np.nan)
+        rates[indices] = counter_rate(timestamps[indices], values[indices], resets)
+        return rates
+    
+    rates = np.full(len(values), np.nan)
+    if len(values) < 2:
+        return rates
+    
+    delta = np.diff(values)
+    elapsed = np.diff(timestamps)
+    reset = delta < 0
+    if resets is not None:
+        reset |= resets
+    delta = np.where(reset, values[1:], delta)
+    
+    with np.errstate(divide='ignore', invalid='ignore'):
+        rates[1:] = np.where(elapsed > 0, delta / elapsed, np.nan)
+    return rates
+
+
+def stale_mask(metrics: Iterable[Dict[str, Any]], group: str) -> Optional[np.ndarray]:
+    """Маска записей, в которых группа group перенесена (None, если таких нет)"""
+    mask = np.array([group in m.get('stale', ()) for m in metrics], dtype=bool)
+    return mask if mask.any() else None
+
+
+class RateEngine:
+    """Скорости счетчиков одного набора данных с кэшированием
+    
+    columns - словарь колонок или функция, возвращающая колонку по имени
+    (например, Segment.column). Если доступно время работы системы,
+    его уменьшение тоже считается сбросом всех счетчиков. stale -
+    функция, возвращающая по группе COUNTER_GROUPS маску измерений с
+    перенесенными значениями (или None): такие измерения пропускаются.
+    """
+    
+    def __init__(self, timestamps: np.ndarray,
+                 columns: Union[Dict[str, np.ndarray], Callable[[str], np.ndarray]],
+                 stale: Optional[Callable[[str], Optional[np.ndarray]]] = None):
+        self.timestamps = np.asarray(timestamps, dtype=np.float64)
+        self._column = columns.__getitem__ if isinstance(columns, dict) else columns
+        self._stale = stale
+        self._cache = {}
+        self._resets = None
+    
+    @classmethod
+    def from_records(cls, metrics: List[Dict[str, Any]],
+                     fields: Iterable[str] = COUNTER_FIELDS) -> 'RateEngine':
+        """Движок по списку записей метрик"""
+        fields = list(fields) + ['system.uptime_seconds']
+        timestamps = np.fromiter((parse_timestamp(m['timestamp']) for m in metrics),
+                                 dtype=np.float64, count=len(metrics))
+        columns = {}
+        for field in fields:
+            columns[field] = np.fromiter(
+                (np.nan if v is None else v for v in (get_field(m, field) for m in metrics)),
+                dtype=np.float64, count=len(metrics))
+        return cls(timestamps, columns, lambda group: stale_mask(metrics, group))
+    
+    def rate(self, field: str, scale: float = 1.0) -> np.ndarray:
+        """Скорость поля в секунду, умноженная на scale"""
+        key = (field, scale)
+        if key not in self._cache:
+            rates = counter_rate(self.timestamps, self._column(field), self._reboots(),
+                                 self._fresh(field))
+            if scale != 1.0:
+                rates *= scale
+            rates.flags.writeable = False
+            self._cache[key] = rates
+        return self._cache[key]
+    
+    def summary(self, field: str, scale: float = 1.0) -> Dict[str, Optional[float]]:
+        """Средняя, пиковая и последняя скорость поля"""
+        rates = self.rate(field, scale)
+        valid = rates[~np.isnan(rates)]
+        if len(valid) == 0:
+            return {'mean': None, 'max': None, 'last': None}
+        return {'mean': float(valid.mean()), 'max': float(valid.max()),
+                'last': float(valid[-1])}
+    
+    def _fresh(self, field: str) -> Optional[np.ndarray]:
+        """Маска измерений, в которых счетчик прочитан заново"""
+        group = COUNTER_GROUPS.get(field)
+        if self._stale is None or group is None:
+            return None
+        stale = self._stale(group)
+        return None if stale is None else ~stale
+    
+    def _reboots(self) -> Optional[np.ndarray]:
+        """Маска перезагрузок по уменьшению времени работы системы"""
+        if self._resets is None:
+            try:
+                uptime = np.asarray(self._column('system.uptime_seconds'), dtype=np.float64)
+            except KeyError:
+                return None
+            self._resets = np.diff(uptime) < 0
+        return self._resets
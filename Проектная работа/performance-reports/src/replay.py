@@ -0,0 +1,74 @@
+"""
+Воспроизведение записанных измерений с ускорением
+"""
+
+import threading
+import time
+from typing import Dict, Any, Iterable, Iterator, Optional
+from .schema import parse_timestamp
+
+
+class MetricsReplayer:
+    """Подача записанных измерений слушателям, как при живом сборе
+
+    По интерфейсу повторяет SystemMetricsCollector (listeners,
+    add_listener, iter_samples), поэтому оповещения, детектор аномалий,
+    агрегаты и запись подключаются к нему без изменений. Паузы между
+    измерениями - исходные, деленные на speed; speed = 0 - без пауз.
+    Метки времени не меняются: агрегаты и правила оповещений работают
+    по времени записи.
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]], speed: float = 0):
+        self.records = records
+        self.speed = speed
+        self.listeners = []
+        self.replayed = 0
+        self.skipped = 0
+        self.max_lag = 0.0
+        self.first = None
+        self.last = None
+
+    def add_listener(self, listener):
+        """Подписка на каждое воспроизведенное измерение"""
+        self.listeners.append(listener)
+
+    def iter_samples(self, stop: Optional[threading.Event] = None) -> Iterator[Dict[str, Any]]:
+        """Измерения в исходном порядке с паузами по меткам времени
+
+        Записи без метки времени и записи не позже предыдущей (повторы,
+        перевод часов) пропускаются и учитываются в skipped.
+        """
+        started = time.monotonic()
+        for record in self.records:
+            try:
+                moment = parse_timestamp(record['timestamp'])
+            except (KeyError, TypeError, ValueError):
+                self.skipped += 1
+                continue
+            if self.last is not None and moment <= self.last:
+                self.skipped += 1
+                continue
+            if self.first is None:
+                self.first = moment
+            self.last = moment
+
+            if self.speed > 0:
+                deadline = started + (moment - self.first) / self.speed
+                delay = deadline - time.monotonic()
+                if stop is not None:
+                    if stop.wait(max(delay, 0)):
+                        return
+                elif delay > 0:
+                    time.sleep(delay)
+                self.max_lag = max(self.max_lag, time.monotonic() - deadline)
+            elif stop is not None and stop.is_set():
+                return
+
+            metric = dict(record)
+            # Пометки прошлого прогона детектор расставит заново
+            metric.pop('anomalies', None)
+            for listener in self.listeners:
+                listener(metric)
+            self.replayed += 1
+            yield metric
@@ -3,34 +3,161 @@
 """
 
 import json
+import os
+from html import escape
 from datetime import datetime, timedelta
-from typing import Dict, List, Any
-from config import get_config
+from typing import Dict, List, Any, Union, Iterable, Iterator, TextIO
+from config import get_config, ensure_directories
+from .loader import MetricsDataset, load_file, load_period, as_dataset
+from .alerts import evaluate_incidents
+from .anomaly import summarize_anomalies
+from .interactive import CHART_SCRIPT, CHART_STYLE, pack_charts, chart_containers, data_script
+from .overhead import summarize_overhead
+from .processes import summarize_processes
+from .stats import dataset_period_stats, QUANTILES
+from .store import host_root
 
 
 class ReportGenerator:
     """Генератор отчетов"""
     
+    # Скорости в отчетах: (ключ, подпись, единица)
+    RATE_LABELS = [
+        ('network_sent_mb_s', 'Сеть, отправка', 'МБ/с'),
+        ('network_recv_mb_s', 'Сеть, прием', 'МБ/с'),
+        ('disk_read_mb_s', 'Диск, чтение', 'МБ/с'),
+        ('disk_write_mb_s', 'Диск, запись', 'МБ/с'),
+        ('disk_read_iops', 'Диск, операций чтения', 'IOPS'),
+        ('disk_write_iops', 'Диск, операций записи', 'IOPS')
+    ]
+    
+    # Тип отчета -> метод построения и расширение файла
+    RENDERERS = {
+        'text': '_generate_text_report',
+        'html': '_generate_html_report',
+        'interactive': '_generate_interactive_report',
+        'json': '_generate_json_report'
+    }
+    EXTENSIONS = {'text': 'txt', 'html': 'html', 'interactive': 'interactive.html',
+                  'json': 'json'}
+    
+    # Типы, которые могут выдаваться частями (генератором строк)
+    STREAMERS = {'interactive': '_iter_interactive_report'}
+    
+    # Поле, по превышениям которого за период окрашивается блок HTML
+    STATUS_FIELDS = {
+        'cpu': 'cpu.percent_total',
+        'memory': 'memory.percent',
+        'disk': 'disk.percent'
+    }
+    
+    # Общие стили HTML отчетов
+    HTML_STYLE = """
+                body { font-family: Arial, sans-serif; margin: 20px; }
+                .header { background-color: #f0f0f0; padding: 20px; border-radius: 5px; }
+                .metric { border: 1px solid #ddd; padding: 15px; margin: 10px 0; border-radius: 5px; }
+                .warning { background-color: #fff3cd; border-color: #ffeaa7; }
+                .good { background-color: #d4edda; border-color: #c3e6cb; }
+                .value { font-weight: bold; font-size: 1.2em; }
+                .timestamp { color: #666; font-size: 0.9em; }
+                table { border-collapse: collapse; font-size: 0.9em; }
+                th, td { border: 1px solid #ddd; padding: 4px 8px; text-align: right; }
+                td:first-child { text-align: left; }
+"""
+    
+    THRESHOLD_LABELS = {
+        'cpu_warning': 'CPU',
+        'memory_warning': 'Память',
+        'disk_warning': 'Диск'
+    }
+    
+    # Колонки таблицы статистики: (ключ, заголовок)
+    STAT_COLUMNS = [('mean', 'Среднее'), ('min', 'Мин'), ('max', 'Макс')] + \
+        [(name, name) for name, _ in QUANTILES] + [('std', 'σ')]
+    
     def __init__(self):
         self.config = get_config()
         
-    def generate_report(self, metrics_file: str, report_type: str = 'text') -> str:
-        """Генерация отчета указанного типа"""
-        metrics = self._load_metrics(metrics_file)
+    def generate_report(self, metrics_file: Union[str, MetricsDataset],
+                        report_type: str = 'text', start: str = None,
+                        end: str = None) -> str:
+        """Генерация отчета указанного типа
         
-        if report_type == 'text':
-            return self._generate_text_report(metrics)
-        elif report_type == 'html':
-            return self._generate_html_report(metrics)
-        elif report_type == 'json':
-            return self._generate_json_report(metrics)
-        else:
-            raise ValueError(f"Неизвестный тип отчета: {report_type}")
+        Если задано начало периода, метрики берутся из хранилища за период
+        start..end вместо файла.
+        """
+        return self.generate_reports(metrics_file, [report_type], start, end)[report_type]
     
-    def _generate_text_report(self, metrics: List[Dict]) -> str:
+    def generate_reports(self, metrics: Union[str, MetricsDataset, List[Dict]],
+                         report_types: List[str], start: str = None,
+                         end: str = None, host: str = None,
+                         stream: bool = False) -> Dict[str, Union[str, Iterator[str]]]:
+        """Генерация отчетов нескольких типов за одну загрузку и агрегацию
+        
+        metrics - путь к файлу метрик или уже загруженный набор. Метрики
+        читаются и сводка (скорости, статистика, превышения) считается
+        один раз, затем по ней строится каждый формат. host - узел из
+        хранилища агрегатора. При stream=True типы из STREAMERS
+        возвращаются генераторами частей страницы: они строятся по мере
+        записи (save_reports), а не целиком в памяти.
+        """
+        for report_type in report_types:
+            if report_type not in self.RENDERERS:
+                raise ValueError(f"Неизвестный тип отчета: {report_type}")
+        
+        if isinstance(metrics, str):
+            metrics = self._load_metrics(metrics, start, end, host)
+        metrics = as_dataset(metrics)
+        summary = self._summarize(metrics)
+        
+        renderers = dict(self.RENDERERS, **self.STREAMERS) if stream else self.RENDERERS
+        return {report_type: getattr(self, renderers[report_type])(metrics, summary)
+                for report_type in report_types}
+    
+    def save_reports(self, reports: Dict[str, Union[str, Iterable[str]]], basename: str = None,
+                     host: str = None) -> Dict[str, str]:
+        """Сохранение отчетов в файлы по формату, возвращает тип -> путь
+        
+        По умолчанию файлы называются report_<время>.<расширение> в
+        reporting.reports_dir. Имя узла host добавляется к имени файла.
+        Отчет может быть строкой или последовательностью частей.
+        """
+        if not basename:
+            ensure_directories(self.config['reporting']['reports_dir'])
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            basename = os.path.join(self.config['reporting']['reports_dir'],
+                                    f"report_{timestamp}")
+        basename = os.path.splitext(basename)[0]
+        if host:
+            basename += f"_{host}"
+        
+        paths = {}
+        for report_type, content in reports.items():
+            paths[report_type] = f"{basename}.{self.EXTENSIONS[report_type]}"
+            with open(paths[report_type], 'w') as f:
+                write_report(f, content)
+        return paths
+    
+    def _summarize(self, metrics: List[Dict]) -> Dict[str, Any]:
+        """Сводка за период, общая для всех форматов"""
+        if not metrics:
+            return {}
+        return {
+            'rates': self._io_rates(metrics),
+            'statistics': self._period_stats(metrics),
+            'alerts': self._check_thresholds(metrics[-1]),
+            'incidents': evaluate_incidents(as_dataset(metrics)),
+            'anomalies': summarize_anomalies(metrics),
+            'processes': summarize_processes(metrics,
+                                             self.config['metrics'].get('processes_top', 10)),
+            'overhead': summarize_overhead(metrics)
+        }
+    
+    def _generate_text_report(self, metrics: List[Dict], summary: Dict = None) -> str:
         """Генерация текстового отчета"""
         if not metrics:
             return "Нет данных для отчета"
+        summary = summary or self._summarize(metrics)
         
         last_metric = metrics[-1]
         first_metric = metrics[0]
@@ -43,6 +170,9 @@ class ReportGenerator:
         report_lines.append(f"Период измерений: {len(metrics)} записей")
         report_lines.append(f"Первое измерение: {first_metric['timestamp']}")
         report_lines.append(f"Последнее измерение: {last_metric['timestamp']}")
+        if 'rollup' in last_metric:
+            resolution = last_metric['rollup']['resolution']
+            report_lines.append(f"Детализация: агрегаты по {resolution} сек")
         report_lines.append("")
         
         # CPU
@@ -81,6 +211,13 @@ class ReportGenerator:
         report_lines.append(f"  Соединений: {network['connections']}")
         report_lines.append("")
         
+        # Скорости по счетчикам
+        rates = summary['rates']
+        report_lines.append("СКОРОСТИ (среднее / пик):")
+        for key, label, unit in self.RATE_LABELS:
+            report_lines.append(f"  {label}: {self._format_rate(rates[key])} {unit}")
+        report_lines.append("")
+        
         # System
         system = last_metric['system']
         uptime = timedelta(seconds=system['uptime_seconds'])
@@ -90,6 +227,70 @@ class ReportGenerator:
         report_lines.append(f"  Процессов: {system['processes']}")
         report_lines.append("")
         
+        processes = summary.get('processes')
+        if processes:
+            report_lines.append(f"ПРОЦЕССЫ (по {processes['samples']} измерениям):")
+            report_lines.append("  По CPU (среднее / пик):")
+            for row in processes['top_cpu']:
+                report_lines.append(f"    {row['name']} ({row['pid']}): "
+                                    f"{row['cpu_mean']:.1f}% / {row['cpu_max']:.1f}%")
+            report_lines.append("  По памяти (пик RSS):")
+            for row in processes['top_memory']:
+                report_lines.append(f"    {row['name']} ({row['pid']}): "
+                                    f"{self._bytes_to_mb(row['rss_max']):.1f} МБ")
+            report_lines.append("")
+        
+        # Статистика за весь период
+        stats = summary['statistics']
+        report_lines.append("СТАТИСТИКА ЗА ПЕРИОД:")
+        if stats.get('resolution'):
+            report_lines.append(f"  {self._approximate_note(stats)}")
+        header = "".join(f"{title:>11}" for _, title in self.STAT_COLUMNS)
+        report_lines.append(f"  {'Поле':<24}{header}")
+        for field, values in stats['fields'].items():
+            row = "".join(f"{self._format_stat(values[key]):>11}"
+                          for key, _ in self.STAT_COLUMNS)
+            report_lines.append(f"  {field:<24}{row}")
+        report_lines.append("")
+        
+        report_lines.append("ВРЕМЯ ВЫШЕ ПОРОГОВ:")
+        if stats.get('resolution'):
+            report_lines.append(f"  {self._approximate_note(stats)}")
+        for key, above in stats['time_above'].items():
+            duration = str(timedelta(seconds=round(above['seconds'])))
+            report_lines.append(f"  {self.THRESHOLD_LABELS.get(key, key)} > {above['threshold']}%: "
+                                f"{duration} ({above['share'] * 100:.1f}% периода)")
+        report_lines.append("")
+        
+        report_lines.append("ОПОВЕЩЕНИЯ ЗА ПЕРИОД:")
+        for incident in summary['incidents']:
+            report_lines.append(f"  {self._format_incident(incident)}")
+        if not summary['incidents']:
+            report_lines.append("  Нет")
+        report_lines.append("")
+        
+        anomalies = summary.get('anomalies')
+        if anomalies is not None:
+            report_lines.append("АНОМАЛИИ ЗА ПЕРИОД:")
+            for episode in anomalies:
+                report_lines.append(f"  {self._format_anomaly(episode)}")
+            if not anomalies:
+                report_lines.append("  Нет")
+            report_lines.append("")
+        
+        overhead = summary.get('overhead')
+        if overhead:
+            report_lines.append(f"ЗАТРАТЫ МОНИТОРИНГА (по {overhead['samples']} измерениям):")
+            report_lines.append(f"  {'Вызов':<24}{'среднее':>10}{'p95':>10}{'макс.':>10}  мс")
+            for name, values in self._overhead_rows(overhead):
+                report_lines.append(f"  {name:<24}{values['mean']:>10.2f}"
+                                    f"{values['p95']:>10.2f}{values['max']:>10.2f}")
+            report_lines.append(f"  CPU сборщика: {overhead['cpu_percent']['mean']:.1f}% "
+                                f"(макс. {overhead['cpu_percent']['max']:.1f}%)")
+            report_lines.append(f"  RSS сборщика: {self._bytes_to_mb(overhead['rss']['last']):.1f} МБ "
+                                f"(макс. {self._bytes_to_mb(overhead['rss']['max']):.1f} МБ)")
+            report_lines.append("")
+        
         # Проверка порогов
         report_lines.append("ПРОВЕРКА ПОРОГОВ:")
         thresholds = self.config['thresholds']
@@ -107,15 +308,24 @@ class ReportGenerator:
         
         return "\n".join(report_lines)
     
-    def _generate_html_report(self, metrics: List[Dict]) -> str:
+    def _generate_html_report(self, metrics: List[Dict], summary: Dict = None) -> str:
         """Генерация HTML отчета"""
         if not metrics:
             return "<html><body>Нет данных</body></html>"
+        summary = summary or self._summarize(metrics)
         
         last_metric = metrics[-1]
         cpu = last_metric['cpu']
         memory = last_metric['memory']
         disk = last_metric['disk']
+        incidents = summary['incidents']
+        rate_lines = self._rates_html(summary['rates'])
+        stat_table = self._stats_html(summary['statistics'])
+        above_lines = self._time_above_html(summary['statistics'])
+        incident_lines = self._incidents_html(incidents)
+        processes_html = self._processes_html(summary.get('processes'))
+        anomalies_html = self._anomalies_html(summary.get('anomalies'))
+        overhead_html = self._overhead_html(summary.get('overhead'))
         
         html = f"""
         <!DOCTYPE html>
@@ -123,15 +333,7 @@ class ReportGenerator:
         <head>
             <meta charset="UTF-8">
             <title>Отчет о производительности</title>
-            <style>
-                body {{ font-family: Arial, sans-serif; margin: 20px; }}
-                .header {{ background-color: #f0f0f0; padding: 20px; border-radius: 5px; }}
-                .metric {{ border: 1px solid #ddd; padding: 15px; margin: 10px 0; border-radius: 5px; }}
-                .warning {{ background-color: #fff3cd; border-color: #ffeaa7; }}
-                .good {{ background-color: #d4edda; border-color: #c3e6cb; }}
-                .value {{ font-weight: bold; font-size: 1.2em; }}
-                .timestamp {{ color: #666; font-size: 0.9em; }}
-            </style>
+            <style>{self.HTML_STYLE}            </style>
         </head>
         <body>
             <div class="header">
@@ -139,19 +341,19 @@ class ReportGenerator:
                 <p class="timestamp">Сгенерирован: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
             </div>
             
-            <div class="metric {self._get_status_class(cpu['percent_total'], 'cpu')}">
+            <div class="metric {self._get_status_class(cpu['percent_total'], 'cpu', incidents)}">
                 <h2>Загрузка CPU</h2>
                 <p class="value">{cpu['percent_total']:.1f}%</p>
                 <p>Ядер: {cpu['cores']} | Частота: {cpu['frequency_current'] or 'N/A'} МГц</p>
             </div>
             
-            <div class="metric {self._get_status_class(memory['percent'], 'memory')}">
+            <div class="metric {self._get_status_class(memory['percent'], 'memory', incidents)}">
                 <h2>Оперативная память</h2>
                 <p class="value">{memory['percent']:.1f}%</p>
                 <p>Использовано: {self._bytes_to_gb(memory['used']):.1f} ГБ из {self._bytes_to_gb(memory['total']):.1f} ГБ</p>
             </div>
             
-            <div class="metric {self._get_status_class(disk['percent'], 'disk')}">
+            <div class="metric {self._get_status_class(disk['percent'], 'disk', incidents)}">
                 <h2>Дисковое пространство</h2>
                 <p class="value">{disk['percent']:.1f}%</p>
                 <p>Свободно: {self._bytes_to_gb(disk['free']):.1f} ГБ из {self._bytes_to_gb(disk['total']):.1f} ГБ</p>
@@ -164,22 +366,119 @@ class ReportGenerator:
                 <p>Активных соединений: {last_metric['network']['connections']}</p>
             </div>
             
+            <div class="metric">
+                <h2>Скорости ввода-вывода (среднее / пик)</h2>
+                {rate_lines}
+            </div>
+            
+            <div class="metric">
+                <h2>Время выше порогов</h2>
+                {above_lines}
+            </div>
+            
+            <div class="metric {'warning' if incidents else 'good'}">
+                <h2>Оповещения за период</h2>
+                {incident_lines}
+            </div>
+            {anomalies_html}
+            <div class="metric">
+                <h2>Статистика за период</h2>
+                {stat_table}
+            </div>
+            
             <div class="metric">
                 <h2>🖥️ Системная информация</h2>
                 <p>Время работы системы: {timedelta(seconds=last_metric['system']['uptime_seconds'])}</p>
                 <p>Активных пользователей: {last_metric['system']['users']}</p>
                 <p>Запущенных процессов: {last_metric['system']['processes']}</p>
             </div>
+            {processes_html}
+            {overhead_html}
         </body>
         </html>
         """
         
         return html
     
-    def _generate_json_report(self, metrics: List[Dict]) -> str:
+    def _generate_interactive_report(self, metrics: List[Dict], summary: Dict = None) -> str:
+        """Генерация интерактивного HTML отчета со встроенными графиками"""
+        return "".join(self._iter_interactive_report(metrics, summary))
+    
+    def _iter_interactive_report(self, metrics: List[Dict],
+                                 summary: Dict = None) -> Iterator[str]:
+        """Интерактивный HTML отчет по разделам
+        
+        Ряды графиков прорежены до reporting.max_points точек и встроены
+        в страницу сжатым блоком; рисует их сценарий в браузере (SVG),
+        так что matplotlib не нужен. Страница выдается частями, по
+        мере построения разделов.
+        """
+        if not metrics:
+            yield "<html><body>Нет данных</body></html>"
+            return
+        summary = summary or self._summarize(metrics)
+        dataset = as_dataset(metrics)
+        reporting = self.config['reporting']
+        first, last = (str(dataset[i]['timestamp'])[:19].replace('T', ' ') for i in (0, -1))
+        
+        yield f"""<!DOCTYPE html>
+        <html>
+        <head>
+            <meta charset="UTF-8">
+            <title>Отчет о производительности</title>
+            <style>{self.HTML_STYLE}{CHART_STYLE}            </style>
+        </head>
+        <body>
+            <div class="header">
+                <h1>Отчет о производительности системы</h1>
+                <p class="timestamp">Сгенерирован: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</p>
+                <p class="timestamp">Период: {first} - {last} ({len(dataset)} измерений)</p>
+                <p class="hint">Выделите участок графика мышью для увеличения, двойной щелчок - весь период, щелчок по легенде скрывает ряд.</p>
+            </div>
+            """
+        
+        packed = pack_charts(dataset, reporting['max_points'], reporting['downsample'],
+                             self.config['thresholds'])
+        yield from chart_containers(packed)
+        
+        incidents = summary['incidents']
+        yield f"""
+            <div class="metric">
+                <h2>Скорости ввода-вывода (среднее / пик)</h2>
+                {self._rates_html(summary['rates'])}
+            </div>
+            
+            <div class="metric">
+                <h2>Время выше порогов</h2>
+                {self._time_above_html(summary['statistics'])}
+            </div>
+            
+            <div class="metric {'warning' if incidents else 'good'}">
+                <h2>Оповещения за период</h2>
+                {self._incidents_html(incidents)}
+            </div>
+            """
+        yield self._anomalies_html(summary.get('anomalies'))
+        yield f"""
+            <div class="metric">
+                <h2>Статистика за период</h2>
+                {self._stats_html(summary['statistics'])}
+            </div>
+            """
+        yield self._processes_html(summary.get('processes'))
+        yield self._overhead_html(summary.get('overhead'))
+        yield data_script(packed)
+        yield CHART_SCRIPT
+        yield """
+        </body>
+        </html>
+        """
+    
+    def _generate_json_report(self, metrics: List[Dict], summary: Dict = None) -> str:
         """Генерация JSON отчета"""
         if not metrics:
             return json.dumps({"error": "Нет данных"}, indent=2)
+        summary = summary or self._summarize(metrics)
         
         last_metric = metrics[-1]
         summary = {
@@ -196,15 +495,176 @@ class ReportGenerator:
                 "network_sent_mb": self._bytes_to_mb(last_metric['network']['bytes_sent']),
                 "network_recv_mb": self._bytes_to_mb(last_metric['network']['bytes_recv'])
             },
+            "rates": summary['rates'],
+            "statistics": summary['statistics'],
             "thresholds": self.config['thresholds'],
-            "alerts": self._check_thresholds(last_metric)
+            "alerts": summary['alerts'],
+            "incidents": summary['incidents'],
+            "anomalies": summary.get('anomalies'),
+            "processes": summary.get('processes'),
+            "overhead": summary.get('overhead')
         }
         
         return json.dumps(summary, indent=2, default=str)
     
-    def _get_status_class(self, value: float, metric_type: str) -> str:
-        """Определение класса CSS на основе значения метрики"""
+    def _rates_html(self, rates: Dict[str, Dict]) -> str:
+        """Строки HTML со средними и пиковыми скоростями"""
+        return "".join(f"<p>{label}: {self._format_rate(rates[key])} {unit}</p>"
+                       for key, label, unit in self.RATE_LABELS)
+    
+    def _stats_html(self, stats: Dict[str, Any]) -> str:
+        """Таблица HTML со статистикой полей за период"""
+        header = "".join(f"<th>{title}</th>" for _, title in self.STAT_COLUMNS)
+        rows = "".join(
+            f"<tr><td>{field}</td>" +
+            "".join(f"<td>{self._format_stat(values[key])}</td>" for key, _ in self.STAT_COLUMNS) +
+            "</tr>"
+            for field, values in stats['fields'].items())
+        note = f"<p>{self._approximate_note(stats)}</p>" if stats.get('resolution') else ""
+        return f"""{note}<table>
+                    <tr><th>Поле</th>{header}</tr>
+                    {rows}
+                </table>"""
+    
+    def _time_above_html(self, stats: Dict[str, Any]) -> str:
+        """Строки HTML со временем выше порогов"""
+        note = f"<p>{self._approximate_note(stats)}</p>" if stats.get('resolution') else ""
+        return note + "".join(
+            f"<p>{self.THRESHOLD_LABELS.get(key, key)} &gt; {above['threshold']}%: "
+            f"{timedelta(seconds=round(above['seconds']))} ({above['share'] * 100:.1f}% периода)</p>"
+            for key, above in stats['time_above'].items())
+    
+    def _incidents_html(self, incidents: List[Dict]) -> str:
+        """Строки HTML с превышениями за период"""
+        return "".join(f"<p>{escape(self._format_incident(incident))}</p>"
+                       for incident in incidents) or "<p>Нет</p>"
+    
+    def _anomalies_html(self, anomalies: List[Dict] = None) -> str:
+        """Блок HTML с эпизодами аномалий (пустой, если пометок нет в данных)"""
+        if anomalies is None:
+            return ""
+        lines = "".join(f"<p>{escape(self._format_anomaly(episode))}</p>"
+                        for episode in anomalies) or "<p>Нет</p>"
+        return f"""
+            <div class="metric {'warning' if anomalies else 'good'}">
+                <h2>Аномалии за период</h2>
+                {lines}
+            </div>
+            """
+    
+    def _overhead_html(self, overhead: Dict = None) -> str:
+        """Блок HTML с затратами мониторинга (пустой без данных)"""
+        if not overhead:
+            return ""
+        rows = "".join(
+            f"<tr><td>{name}</td><td>{values['mean']:.2f}</td><td>{values['p95']:.2f}</td>"
+            f"<td>{values['max']:.2f}</td></tr>"
+            for name, values in self._overhead_rows(overhead))
+        return f"""
+            <div class="metric">
+                <h2>Затраты мониторинга (по {overhead['samples']} измерениям)</h2>
+                <table>
+                    <tr><th>Вызов</th><th>Среднее, мс</th><th>p95, мс</th><th>Макс., мс</th></tr>
+                    {rows}
+                </table>
+                <p>CPU сборщика: {overhead['cpu_percent']['mean']:.1f}% (макс. {overhead['cpu_percent']['max']:.1f}%)</p>
+                <p>RSS сборщика: {self._bytes_to_mb(overhead['rss']['last']):.1f} МБ (макс. {self._bytes_to_mb(overhead['rss']['max']):.1f} МБ)</p>
+            </div>
+            """
+    
+    def _overhead_rows(self, overhead: Dict) -> List[tuple]:
+        """Строки таблицы затрат: все измерение, затем вызовы _get_*_metrics"""
+        rows = [("Измерение целиком", overhead['total_ms'])]
+        rows.extend((f"_get_{group}_metrics", values)
+                    for group, values in overhead['timings_ms'].items())
+        return rows
+    
+    def _processes_html(self, processes: Dict = None) -> str:
+        """Блок HTML с лидерами по CPU и памяти (пустой без данных)"""
+        if not processes:
+            return ""
+        cpu_rows = "".join(
+            f"<tr><td>{row['name']}</td><td>{row['pid']}</td>"
+            f"<td>{row['cpu_mean']:.1f}</td><td>{row['cpu_max']:.1f}</td></tr>"
+            for row in processes['top_cpu'])
+        memory_rows = "".join(
+            f"<tr><td>{row['name']}</td><td>{row['pid']}</td>"
+            f"<td>{self._bytes_to_mb(row['rss_max']):.1f}</td></tr>"
+            for row in processes['top_memory'])
+        return f"""
+            <div class="metric">
+                <h2>Процессы (по {processes['samples']} измерениям)</h2>
+                <table>
+                    <tr><th>Процесс</th><th>PID</th><th>CPU, % (среднее)</th><th>CPU, % (пик)</th></tr>
+                    {cpu_rows}
+                </table>
+                <p></p>
+                <table>
+                    <tr><th>Процесс</th><th>PID</th><th>RSS, МБ (пик)</th></tr>
+                    {memory_rows}
+                </table>
+            </div>"""
+    
+    def _io_rates(self, metrics: List[Dict]) -> Dict[str, Dict]:
+        """Средние и пиковые скорости сети и диска за период"""
+        engine = as_dataset(metrics).rates
+        mb = 1 / (1024 ** 2)
+        
+        return {
+            'network_sent_mb_s': engine.summary('network.bytes_sent', mb),
+            'network_recv_mb_s': engine.summary('network.bytes_recv', mb),
+            'disk_read_mb_s': engine.summary('disk.read_bytes', mb),
+            'disk_write_mb_s': engine.summary('disk.write_bytes', mb),
+            'disk_read_iops': engine.summary('disk.read_count'),
+            'disk_write_iops': engine.summary('disk.write_count')
+        }
+    
+    def _period_stats(self, metrics: List[Dict]) -> Dict[str, Any]:
+        """Статистика всех числовых полей и время выше порогов за период"""
+        return dataset_period_stats(as_dataset(metrics), self.config['thresholds'])
+    
+    def _format_incident(self, incident: Dict) -> str:
+        """Строка превышения: правило, интервал, длительность и пик"""
+        start = incident['start'].replace('T', ' ')[:19]
+        end = incident['end'].replace('T', ' ')[:19] if incident['end'] else "продолжается"
+        duration = str(timedelta(seconds=round(incident['seconds'])))
+        return (f"{incident['rule']} ({incident['field']} > {incident['threshold']}): "
+                f"{start} - {end} ({duration}), пик {incident['peak']:.1f}")
+    
+    def _format_anomaly(self, episode: Dict) -> str:
+        """Строка эпизода аномалии: поле, интервал и самое сильное отклонение"""
+        start = episode['start'].replace('T', ' ')[:19]
+        end = episode['end'].replace('T', ' ')[:19]
+        return (f"{episode['field']}: {start} - {end} (помечено измерений: {episode['count']}), "
+                f"{episode['value']:.1f} при среднем {episode['mean']:.1f}, z = {episode['z']:+.1f}")
+    
+    def _approximate_note(self, stats: Dict[str, Any]) -> str:
+        """Пометка о статистике, посчитанной по агрегатам"""
+        return (f"Приблизительно: квантили и время выше порогов посчитаны по средним "
+                f"интервалов агрегатов {stats['resolution']} сек, пики сглажены "
+                f"(min и max - точные)")
+    
+    def _format_stat(self, value: float) -> str:
+        """Короткая запись значения статистики"""
+        if value != value:
+            return "н/д"
+        if abs(value) >= 1e5:
+            return f"{value:.3g}"
+        return f"{value:.1f}"
+    
+    def _format_rate(self, summary: Dict) -> str:
+        """Строка 'среднее / пик' для скорости"""
+        if summary['mean'] is None:
+            return "н/д"
+        return f"{summary['mean']:.2f} / {summary['max']:.2f}"
+    
+    def _get_status_class(self, value: float, metric_type: str,
+                          incidents: List[Dict] = None) -> str:
+        """Определение класса CSS по значению метрики и превышениям за период"""
         thresholds = self.config['thresholds']
+        field = self.STATUS_FIELDS.get(metric_type)
+        if any(incident['field'] == field for incident in incidents or []):
+            return 'warning'
         
         if metric_type == 'cpu' and value > thresholds['cpu_warning']:
             return 'warning'
@@ -239,7 +699,29 @@ class ReportGenerator:
         """Конвертация байтов в мегабайты"""
         return bytes_value / (1024 ** 2)
     
-    def _load_metrics(self, metrics_file: str) -> List[Dict]:
-        """Загрузка метрик из файла"""
-        with open(metrics_file, 'r') as f:
-            return json.load(f)
\ No newline at end of file
+    def _load_metrics(self, metrics_file: str, start: str = None,
+                      end: str = None, host: str = None) -> MetricsDataset:
+        """Загрузка метрик из файла или из хранилища за период
+        
+        Для длинных периодов читаются агрегаты самого грубого уровня,
+        который дает не меньше reporting.max_points точек. host - узел,
+        принятый агрегатором (только для периода из хранилища).
+        """
+        rollups = self.config['rollups']
+        tiers = rollups['tiers'] if rollups['enabled'] else []
+        max_points = self.config['reporting']['max_points']
+        root = self.config['paths']['store']
+        if host:
+            root = host_root(root, host)
+        if start:
+            return load_period(root, start, end, tiers, max_points)
+        return load_file(metrics_file, tiers, max_points)
+
+
+def write_report(f: TextIO, content: Union[str, Iterable[str]]):
+    """Запись отчета, построенного целиком или по частям"""
+    if isinstance(content, str):
+        f.write(content)
+    else:
+        for part in content:
+            f.write(part)
@@ -0,0 +1,271 @@
+"""
+Хранение по сроку: сжатие, свертка в агрегаты и удаление старых данных
+"""
+
+import glob
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Any, Iterator, Optional
+from config import get_config
+from .rollups import RollupManager, store_tier_path, tier_name
+from .schema import parse_timestamp, format_timestamp
+from .segment import extras_path, remove_segment, write_records
+from .storage import MetricsWriter, detect_format, iter_metrics, time_span
+from .store import MetricsStore, host_root, list_hosts, partition_key, partition_start
+
+# Файлы отчетов и графиков, которые удаляются по сроку
+REPORT_EXTENSIONS = ('.txt', '.html', '.json', '.png')
+
+
+class IOBudget:
+    """Ограничение средней скорости ввода-вывода
+    
+    После каждой операции вызывающий сообщает объем прочитанного и
+    записанного, и при превышении бюджета поток засыпает, пока средняя
+    скорость с начала прохода не вернется в пределы.
+    """
+    
+    def __init__(self, bytes_per_second: float, stop: Optional[threading.Event] = None):
+        self.bytes_per_second = bytes_per_second
+        self.stop = stop
+        self.spent = 0
+        self._started = time.monotonic()
+    
+    def spend(self, nbytes: int):
+        self.spent += nbytes
+        if self.bytes_per_second <= 0:
+            return
+        delay = self._started + self.spent / self.bytes_per_second - time.monotonic()
+        if delay > 0:
+            if self.stop is not None:
+                self.stop.wait(delay)
+            else:
+                time.sleep(delay)
+
+
+class _RowCollector:
+    """Приемник строк агрегатов в памяти (вместо RollupWriter)"""
+    
+    state_path = None
+    
+    def __init__(self):
+        self.rows = {}
+    
+    def write(self, resolution: int, row: Dict[str, Any], replace: bool = False):
+        self.rows.setdefault(resolution, []).append(row)
+
+
+class RetentionEngine:
+    """Поэтапная очистка хранилища, отчетов и графиков
+    
+    - часовые сегменты старше retention.compress_after_days переводятся
+      в бинарный формат (.seg);
+    - сырые измерения старше scheduling.retention_days удаляются, а часы,
+      для которых еще нет агрегатов, предварительно сворачиваются в них;
+    - агрегаты, отчеты и графики хранятся reporting.max_history дней;
+    - файлы data/metrics_* удаляются через retention_days.
+    
+    Хранилища узлов, принятых агрегатором, очищаются по тем же правилам.
+    
+    Каждый шаг затрагивает один файл, скорость ограничена бюджетом
+    retention.io_budget_mb, проход можно прервать событием stop.
+    """
+    
+    def __init__(self, now: Optional[datetime] = None, dry_run: bool = False,
+                 stop: Optional[threading.Event] = None):
+        self.config = get_config()
+        settings = self.config['retention']
+        self.now = now or datetime.now()
+        self.dry_run = dry_run
+        self.stop = stop
+        root = self.config['paths']['store']
+        self.stores = [MetricsStore(root)] + [MetricsStore(host_root(root, host))
+                                              for host in list_hosts(root)]
+        self.raw_cutoff = self.now - timedelta(days=self.config['scheduling']['retention_days'])
+        self.compress_cutoff = self.now - timedelta(days=settings['compress_after_days'])
+        self.history_cutoff = self.now - timedelta(days=self.config['reporting']['max_history'])
+        self.budget = IOBudget(settings['io_budget_mb'] * 1024 ** 2, stop)
+        rollups = self.config['rollups']
+        self.tiers = sorted(rollups['tiers']) if rollups['enabled'] else []
+        self.relative_accuracy = rollups['relative_accuracy']
+        self._rolled_hours = {}
+        self.rolled_up = 0
+    
+    def run(self, max_seconds: Optional[float] = None) -> Dict[str, Any]:
+        """Проход очистки, возвращает итоги (освобождено байт и т.д.)"""
+        started = time.monotonic()
+        result = {'compressed': 0, 'rolled_up': 0, 'deleted': 0, 'failed': 0,
+                  'reclaimed_bytes': 0, 'io_bytes': 0, 'complete': True}
+        
+        for action, path, step in self._plan():
+            if (self.stop is not None and self.stop.is_set()) or \
+                    (max_seconds is not None and time.monotonic() - started > max_seconds):
+                result['complete'] = False
+                break
+            if self.dry_run:
+                print(f"{action}: {path}")
+                reclaimed = os.path.getsize(path) if action == 'deleted' else 0
+                result[action] += 1
+                result['reclaimed_bytes'] += reclaimed
+                continue
+            try:
+                reclaimed, io_bytes = step()
+            except OSError as e:
+                # Например, файл еще открыт читателем - повтор в следующий проход
+                print(f"Не удалось обработать {path}: {e}")
+                result['failed'] += 1
+                continue
+            result[action] += 1
+            result['reclaimed_bytes'] += reclaimed
+            result['io_bytes'] += io_bytes
+            self.budget.spend(io_bytes)
+        
+        result['rolled_up'] = self.rolled_up
+        result['seconds'] = time.monotonic() - started
+        return result
+    
+    def _plan(self) -> Iterator[tuple]:
+        """Шаги очистки от старых данных к новым: (действие, файл, функция)"""
+        for store in self.stores:
+            yield from self._store_plan(store)
+        
+        yield from self._expired_files(os.path.join(self.config['paths']['data'], 'metrics_*'),
+                                       self.raw_cutoff)
+        for directory in (self.config['reporting']['reports_dir'],
+                          self.config['reporting']['charts_dir']):
+            for extension in REPORT_EXTENSIONS:
+                yield from self._expired_files(os.path.join(directory, '*' + extension),
+                                               self.history_cutoff)
+    
+    def _store_plan(self, store: MetricsStore) -> Iterator[tuple]:
+        """Шаги очистки одного хранилища: сегменты, затем агрегаты"""
+        index = store.load_index()
+        for partition in store.partitions():
+            key = partition['key']
+            if index.get(key, {}).get('open'):
+                continue
+            hour_end = datetime.fromtimestamp(partition_start(key) + 3600)
+            full_path = os.path.join(store.root, partition['path'])
+            if hour_end <= self.raw_cutoff:
+                yield 'deleted', full_path, self._step(self._expire_partition, store,
+                                                       key, full_path)
+            elif hour_end <= self.compress_cutoff and full_path.endswith('.jsonl'):
+                yield 'compressed', full_path, self._step(self._compress, store,
+                                                          key, full_path)
+        
+        history_day = self.history_cutoff.strftime('%Y%m%d')
+        for resolution in self.tiers:
+            tier_dir = os.path.join(store.root, 'rollups', tier_name(resolution))
+            for path in sorted(glob.glob(os.path.join(tier_dir, '*.jsonl'))):
+                if os.path.splitext(os.path.basename(path))[0] < history_day:
+                    yield 'deleted', path, self._step(self._delete_file, path)
+    
+    def _expired_files(self, pattern: str, cutoff: datetime) -> Iterator[tuple]:
+        limit = cutoff.timestamp()
+        for path in sorted(glob.glob(pattern)):
+            if os.path.isfile(path) and os.path.getmtime(path) < limit:
+                yield 'deleted', path, self._step(self._delete_file, path)
+    
+    @staticmethod
+    def _step(function, *args):
+        return lambda: function(*args)
+    
+    def _has_rollups(self, store: MetricsStore, key: str) -> bool:
+        """Есть ли агрегаты самого подробного уровня за час key"""
+        day = (store.root, self._local_day(key))
+        if day not in self._rolled_hours:
+            path = store_tier_path(store.root, self.tiers[0],
+                                   format_timestamp(partition_start(key)))
+            hours = set()
+            if os.path.exists(path):
+                hours = {partition_key(parse_timestamp(row['timestamp']))
+                         for row in iter_metrics(path)}
+            self._rolled_hours[day] = hours
+        return key in self._rolled_hours[day]
+    
+    @staticmethod
+    def _local_day(key: str) -> str:
+        """Локальная дата начала часа key: файлы агрегатов ведутся по локальным дням"""
+        return datetime.fromtimestamp(partition_start(key)).strftime('%Y%m%d')
+    
+    def _expire_partition(self, store: MetricsStore, key: str, path: str) -> tuple:
+        """Удаление сырых данных часа, при отсутствии агрегатов - после свертки"""
+        io_bytes = 0
+        if self.tiers and not self._has_rollups(store, key):
+            io_bytes = self._roll_up(store, key, path)
+            self.rolled_up += 1
+        
+        size = os.path.getsize(path)
+        store.replace_partition(key, None)
+        if path.endswith('.seg'):
+            if os.path.exists(extras_path(path)):
+                size += os.path.getsize(extras_path(path))
+            remove_segment(path)
+        else:
+            os.remove(path)
+        day_dir = os.path.dirname(path)
+        if not os.listdir(day_dir):
+            os.rmdir(day_dir)
+        return size, io_bytes
+    
+    def _roll_up(self, store: MetricsStore, key: str, path: str) -> int:
+        """Свертка часа в агрегаты всех уровней с дозаписью в дневные файлы"""
+        collector = _RowCollector()
+        manager = RollupManager(collector, self.tiers,
+                                relative_accuracy=self.relative_accuracy)
+        for metric in iter_metrics(path):
+            manager.add(metric)
+        manager.close()
+        
+        io_bytes = os.path.getsize(path)
+        for resolution, rows in collector.rows.items():
+            day_path = store_tier_path(store.root, resolution, rows[0]['timestamp'])
+            io_bytes += _merge_rows(day_path, rows)
+        self._rolled_hours.setdefault((store.root, self._local_day(key)), set()).add(key)
+        return io_bytes
+    
+    def _compress(self, store: MetricsStore, key: str, path: str) -> tuple:
+        """Перевод часового сегмента JSON Lines в бинарный формат
+        
+        Нечисловые поля (аномалии, процессы, затраты мониторинга) уходят
+        в файл рядом с сегментом и учитываются в его размере.
+        """
+        if detect_format(path) != 'jsonl':
+            return 0, 0
+        before = os.path.getsize(path)
+        target = os.path.splitext(path)[0] + '.seg'
+        rows = write_records(target, iter_metrics(path))
+        start, end = time_span(target)
+        # Сначала индекс указывает на новый файл, потом удаляется старый
+        store.replace_partition(key, os.path.relpath(target, store.root),
+                                start, end, rows)
+        os.remove(path)
+        after = os.path.getsize(target)
+        if os.path.exists(extras_path(target)):
+            after += os.path.getsize(extras_path(target))
+        return before - after, before + after
+    
+    @staticmethod
+    def _delete_file(path: str) -> tuple:
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size, 0
+
+
+def _merge_rows(path: str, rows: List[Dict[str, Any]]) -> int:
+    """Добавление строк в файл агрегатов с сохранением порядка по времени"""
+    existing = list(iter_metrics(path)) if os.path.exists(path) else []
+    seen = {row['timestamp'] for row in existing}
+    merged = existing + [row for row in rows if row['timestamp'] not in seen]
+    merged.sort(key=lambda row: parse_timestamp(row['timestamp']))
+    
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    with MetricsWriter(tmp_path, flush_every=len(merged) or 1) as writer:
+        writer.write_many(merged)
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
\ No newline at end of file
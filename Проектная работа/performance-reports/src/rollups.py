@@ -0,0 +1,404 @@
+"""
+Инкрементальные агрегаты метрик (1m/5m/1h) и выбор уровня детализации
+"""
+
+import json
+import math
+import os
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Any, Callable, Iterable, Optional
+from .schema import (NUMERIC_FIELDS, COUNTER_FIELDS, INTEGER_FIELDS, flatten,
+                     unflatten, get_field, parse_timestamp, format_timestamp)
+from .storage import MetricsWriter
+
+
+DEFAULT_TIERS = (60, 300, 3600)
+
+
+def tier_name(resolution: int) -> str:
+    """Короткое имя уровня: 60 -> '1m', 3600 -> '1h'"""
+    if resolution % 3600 == 0:
+        return f'{resolution // 3600}h'
+    if resolution % 60 == 0:
+        return f'{resolution // 60}m'
+    return f'{resolution}s'
+
+
+class QuantileSketch:
+    """Приближенные квантили для набора полей с фиксированной памятью
+    
+    Логарифмическая гистограмма: значение x попадает в корзину
+    ceil(log_gamma(x / min_value)), что дает относительную погрешность
+    не больше relative_accuracy. Обновление всех полей - одна операция
+    над массивом.
+    """
+    
+    def __init__(self, n_fields: int, relative_accuracy: float = 0.01,
+                 min_value: float = 1e-3, max_value: float = 1e16):
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.min_value = min_value
+        n_bins = int(math.ceil(math.log(max_value / min_value) / self._log_gamma)) + 1
+        self.counts = np.zeros((n_fields, n_bins), dtype=np.int32)
+        self._rows = np.arange(n_fields)
+    
+    def index(self, values: np.ndarray) -> tuple:
+        """Строки и корзины для значений (NaN пропускаются)"""
+        valid = ~np.isnan(values)
+        scaled = np.maximum(values[valid], self.min_value) / self.min_value
+        bins = np.ceil(np.log(scaled) / self._log_gamma).astype(np.int64)
+        np.clip(bins, 0, self.counts.shape[1] - 1, out=bins)
+        return self._rows[valid], bins
+    
+    def add(self, values: np.ndarray, index: Optional[tuple] = None):
+        """Учет по одному значению каждого поля
+        
+        index - заранее посчитанный результат index(values), чтобы не
+        вычислять корзины повторно для нескольких скетчей.
+        """
+        rows, bins = index if index is not None else self.index(values)
+        self.counts[rows, bins] += 1
+    
+    def add_many(self, values: np.ndarray):
+        """Учет пачки строк values (k, полей)"""
+        valid = ~np.isnan(values)
+        rows = np.broadcast_to(self._rows, values.shape)[valid]
+        scaled = np.maximum(values[valid], self.min_value) / self.min_value
+        bins = np.ceil(np.log(scaled) / self._log_gamma).astype(np.int64)
+        np.clip(bins, 0, self.counts.shape[1] - 1, out=bins)
+        np.add.at(self.counts, (rows, bins), 1)
+    
+    def quantile(self, q: float) -> np.ndarray:
+        """Квантиль q для каждого поля (NaN, если значений не было)"""
+        cumulative = np.cumsum(self.counts, axis=1)
+        totals = cumulative[:, -1]
+        ranks = np.ceil(q * totals)
+        bins = np.argmax(cumulative >= ranks[:, None], axis=1)
+        values = 2 * self.min_value * self.gamma ** bins / (self.gamma + 1)
+        values[bins == 0] = 0.0
+        values[totals == 0] = np.nan
+        return values
+    
+    def reset(self):
+        self.counts.fill(0)
+
+
+class RollupTier:
+    """Агрегаты одного уровня: min, max, mean, count и p95 по каждому полю"""
+    
+    def __init__(self, resolution: int, fields: Iterable[str] = NUMERIC_FIELDS,
+                 relative_accuracy: float = 0.01):
+        self.resolution = resolution
+        self.fields = tuple(fields)
+        self._last_fields = np.array([f in COUNTER_FIELDS for f in self.fields])
+        self._integer_fields = np.array([f in INTEGER_FIELDS for f in self.fields])
+        self.sketch = QuantileSketch(len(self.fields), relative_accuracy)
+        self.bucket = None
+        # Метка интервала, продолженного из состояния прошлого запуска:
+        # его неполная строка уже записана и заменяется при сбросе
+        self.resumed = None
+        self._reset()
+    
+    def add(self, epoch: float, values: np.ndarray, metric: Dict[str, Any],
+            index: Optional[tuple] = None) -> Optional[Dict[str, Any]]:
+        """Учет измерения; возвращает запись закрытого интервала, если он сменился"""
+        bucket = epoch - epoch % self.resolution
+        row = None
+        if self.bucket is not None and bucket != self.bucket:
+            row = self.flush()
+        self.bucket = bucket
+        
+        valid = ~np.isnan(values)
+        self._count += valid
+        self._sum += np.where(valid, values, 0.0)
+        np.fmin(self._min, values, out=self._min)
+        np.fmax(self._max, values, out=self._max)
+        self._last = values
+        self._last_metric = metric
+        self.sketch.add(values, index)
+        return row
+    
+    def flush(self) -> Optional[Dict[str, Any]]:
+        """Запись текущего (в том числе неполного) интервала"""
+        if self.bucket is None or not self._count.any():
+            return None
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = self._sum / self._count
+        means[self._count == 0] = np.nan
+        # Для счетчиков значение интервала - последнее, иначе скорость
+        # по агрегатам совпадает со скоростью по исходным данным
+        values = np.where(self._last_fields, self._last, means)
+        values = np.where(self._integer_fields & ~np.isnan(values),
+                          np.round(values), values)
+        p95 = self.sketch.quantile(0.95)
+        
+        row = {'timestamp': format_timestamp(self.bucket)}
+        row.update(unflatten(values.tolist(), self.fields))
+        for field in INTEGER_FIELDS:
+            group, name = field.split('.', 1)
+            if row.get(group, {}).get(name) is not None:
+                row[group][name] = int(row[group][name])
+        last = self._last_metric
+        if 'percent_per_core' in last.get('cpu', {}):
+            row['cpu']['percent_per_core'] = last['cpu']['percent_per_core']
+        if 'boot_time' in last.get('system', {}):
+            row['system']['boot_time'] = last['system']['boot_time']
+        row['rollup'] = {
+            'resolution': self.resolution,
+            'count': int(self._count.max()),
+            'min': self._by_field(self._min),
+            'max': self._by_field(self._max),
+            'p95': self._by_field(p95)
+        }
+        
+        self._reset()
+        return row
+    
+    def state(self) -> Optional[Dict[str, Any]]:
+        """Состояние незавершенного интервала для продолжения после перезапуска"""
+        if self.bucket is None or not self._count.any():
+            return None
+        rows, bins = np.nonzero(self.sketch.counts)
+        last = self._last_metric
+        return {
+            'fields': list(self.fields),
+            'bins': self.sketch.counts.shape[1],
+            'bucket': self.bucket,
+            'count': self._count.tolist(),
+            'sum': self._sum.tolist(),
+            'min': self._min.tolist(),
+            'max': self._max.tolist(),
+            'last': self._last.tolist(),
+            'sketch': [rows.tolist(), bins.tolist(), self.sketch.counts[rows, bins].tolist()],
+            'last_metric': {
+                'cpu': {k: v for k, v in last.get('cpu', {}).items() if k == 'percent_per_core'},
+                'system': {k: v for k, v in last.get('system', {}).items() if k == 'boot_time'}
+            }
+        }
+    
+    def restore(self, state: Dict[str, Any]) -> bool:
+        """Продолжение интервала из state(); False, если состояние не подходит"""
+        if state.get('fields') != list(self.fields) or \
+                state.get('bins') != self.sketch.counts.shape[1]:
+            return False
+        self._reset()
+        self.bucket = state['bucket']
+        self._count = np.array(state['count'], dtype=np.int64)
+        self._sum = np.array(state['sum'], dtype=np.float64)
+        self._min = np.array(state['min'], dtype=np.float64)
+        self._max = np.array(state['max'], dtype=np.float64)
+        self._last = np.array(state['last'], dtype=np.float64)
+        rows, bins, counts = state['sketch']
+        self.sketch.counts[rows, bins] = counts
+        self._last_metric = state['last_metric']
+        self.resumed = format_timestamp(self.bucket)
+        return True
+    
+    def _by_field(self, values: np.ndarray) -> Dict[str, Optional[float]]:
+        return {f: (None if v != v else v) for f, v in zip(self.fields, values.tolist())}
+    
+    def _reset(self):
+        n = len(self.fields)
+        self._count = np.zeros(n, dtype=np.int64)
+        self._sum = np.zeros(n)
+        self._min = np.full(n, np.nan)
+        self._max = np.full(n, np.nan)
+        self._last = np.full(n, np.nan)
+        self._last_metric = {}
+        self.sketch.reset()
+
+
+class RollupWriter:
+    """Запись агрегатов рядом с исходными данными
+    
+    state_path - файл состояния незавершенных интервалов (см.
+    RollupManager.close).
+    """
+    
+    def __init__(self, path_for: Callable[[int, str], str], state_path: Optional[str] = None):
+        self.path_for = path_for
+        self.state_path = state_path
+    
+    @classmethod
+    def for_file(cls, metrics_file: str) -> 'RollupWriter':
+        """Агрегаты рядом с файлом: metrics.jsonl -> metrics.1m.jsonl"""
+        return cls(lambda resolution, timestamp: file_tier_path(metrics_file, resolution),
+                   f"{os.path.splitext(metrics_file)[0]}.rollups.json")
+    
+    @classmethod
+    def for_store(cls, root: str) -> 'RollupWriter':
+        """Агрегаты хранилища: <root>/rollups/<уровень>/<ГГГГММДД>.jsonl"""
+        return cls(lambda resolution, timestamp: store_tier_path(root, resolution, timestamp),
+                   os.path.join(root, 'rollups', 'open.json'))
+    
+    def write(self, resolution: int, row: Dict[str, Any], replace: bool = False):
+        """Дозапись строки агрегата
+        
+        Строка того же интервала в конце файла (неполная, от прошлого
+        запуска) заменяется новой при replace, иначе объединяется с ней.
+        """
+        path = self.path_for(resolution, row['timestamp'])
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if os.path.exists(path):
+            last, offset = _tail_row(path)
+            if last is not None and last.get('timestamp') == row['timestamp']:
+                if not replace:
+                    row = merge_rollup_rows(last, row)
+                with open(path, 'r+b') as f:
+                    f.truncate(offset)
+        # Агрегат пишется раз в интервал, файл не держится открытым
+        with MetricsWriter(path) as writer:
+            writer.write(row)
+
+
+class RollupManager:
+    """Поддержка всех уровней агрегатов по мере поступления измерений
+    
+    При закрытии незавершенные интервалы записываются неполными строками,
+    а их состояние сохраняется в writer.state_path. Следующий запуск с
+    тем же приемником продолжает эти интервалы и заменяет неполные
+    строки, так что у интервала остается одна строка с общим счетом.
+    """
+    
+    def __init__(self, writer: RollupWriter, tiers: Iterable[int] = DEFAULT_TIERS,
+                 fields: Iterable[str] = NUMERIC_FIELDS, relative_accuracy: float = 0.01):
+        self.writer = writer
+        self.fields = tuple(fields)
+        self.tiers = [RollupTier(r, self.fields, relative_accuracy) for r in sorted(tiers)]
+        self._load_state()
+    
+    def add(self, metric: Dict[str, Any]):
+        """Учет одного измерения во всех уровнях"""
+        epoch = parse_timestamp(metric['timestamp'])
+        values = np.array(flatten(metric, self.fields))
+        # Точность у всех уровней одна, корзины считаются один раз
+        index = self.tiers[0].sketch.index(values) if self.tiers else None
+        for tier in self.tiers:
+            row = tier.add(epoch, values, metric, index)
+            if row:
+                self._write(tier, row)
+    
+    __call__ = add
+    
+    def close(self):
+        """Запись незавершенных интервалов и сохранение их состояния"""
+        state = {}
+        for tier in self.tiers:
+            tier_state = tier.state()
+            if tier_state:
+                state[str(tier.resolution)] = tier_state
+            row = tier.flush()
+            if row:
+                self._write(tier, row)
+        self._save_state(state)
+    
+    def _write(self, tier: RollupTier, row: Dict[str, Any]):
+        self.writer.write(tier.resolution, row, replace=row['timestamp'] == tier.resumed)
+    
+    def _save_state(self, state: Dict[str, Any]):
+        path = self.writer.state_path
+        if path is None:
+            return
+        if not state:
+            if os.path.exists(path):
+                os.remove(path)
+            return
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, path)
+    
+    def _load_state(self):
+        path = self.writer.state_path
+        if path is None or not os.path.exists(path):
+            return
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        for tier in self.tiers:
+            if str(tier.resolution) in state:
+                tier.restore(state[str(tier.resolution)])
+
+
+def merge_rollup_rows(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """Объединение двух строк одного интервала без сохраненного состояния
+    
+    Средние взвешиваются по числу измерений, min и max объединяются,
+    для счетчиков берется последнее значение. p95 - наибольший из двух
+    (оценка сверху: скетчей в строках нет).
+    """
+    old_count, new_count = old['rollup']['count'], new['rollup']['count']
+    total = old_count + new_count
+    merged = {key: dict(value) if isinstance(value, dict) else value
+              for key, value in new.items()}
+    for field in NUMERIC_FIELDS:
+        group, name = field.split('.', 1)
+        a, b = get_field(old, field), get_field(new, field)
+        if field in COUNTER_FIELDS or a is None or b is None:
+            value = b if b is not None else a
+        else:
+            value = (a * old_count + b * new_count) / total
+        if value is not None and field in INTEGER_FIELDS:
+            value = int(round(value))
+        merged.setdefault(group, {})[name] = value
+    
+    def combine(key: str, pick: Callable) -> Dict[str, Optional[float]]:
+        a, b = old['rollup'][key], new['rollup'][key]
+        return {f: pick(v for v in (a.get(f), b.get(f)) if v is not None)
+                for f in set(a) | set(b)}
+    
+    merged['rollup'] = dict(new['rollup'], count=total,
+                            min=combine('min', lambda v: min(v, default=None)),
+                            max=combine('max', lambda v: max(v, default=None)),
+                            p95=combine('p95', lambda v: max(v, default=None)))
+    return merged
+
+
+def _tail_row(path: str, chunk: int = 65536) -> tuple:
+    """Последняя строка JSON Lines и ее смещение в файле ((None, размер) - если не разобрать)"""
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        start = max(0, size - chunk)
+        f.seek(start)
+        data = f.read()
+    end = len(data.rstrip(b'\r\n'))
+    begin = data.rfind(b'\n', 0, end) + 1
+    if begin == 0 and start > 0:
+        return None, size
+    try:
+        return json.loads(data[begin:end]), start + begin
+    except ValueError:
+        return None, size
+
+
+def file_tier_path(metrics_file: str, resolution: int) -> str:
+    return f"{os.path.splitext(metrics_file)[0]}.{tier_name(resolution)}.jsonl"
+
+
+def store_tier_path(root: str, resolution: int, timestamp: str) -> str:
+    day = timestamp[:10].replace('-', '')
+    return os.path.join(root, 'rollups', tier_name(resolution), day + '.jsonl')
+
+
+def select_resolution(span_seconds: float, max_points: int,
+                      tiers: Iterable[int]) -> Optional[int]:
+    """Самый грубый уровень, не грубее span / max_points (None - исходные данные)"""
+    wanted = span_seconds / max(1, max_points)
+    candidates = [r for r in tiers if r <= wanted]
+    return max(candidates) if candidates else None
+
+
+def store_tier_files(root: str, resolution: int, start: datetime,
+                     end: datetime) -> List[str]:
+    """Дневные файлы уровня агрегатов хранилища, пересекающиеся с периодом"""
+    tier_dir = os.path.dirname(store_tier_path(root, resolution, start.isoformat()))
+    if not os.path.isdir(tier_dir):
+        return []
+    first_day, last_day = start.strftime('%Y%m%d'), end.strftime('%Y%m%d')
+    return [os.path.join(tier_dir, name) for name in sorted(os.listdir(tier_dir))
+            if first_day <= os.path.splitext(name)[0] <= last_day]
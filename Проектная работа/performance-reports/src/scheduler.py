@@ -2,22 +2,38 @@
 Планировщик периодических отчетов
 """
 
-import schedule
-import time
-import threading
+import asyncio
 from datetime import datetime
+from typing import Tuple
+from .anomaly import AnomalyDetector
 from .collector import SystemMetricsCollector
 from .reporter import ReportGenerator
+from .storage import MetricsWriter
 from .visualizer import MetricsVisualizer
-from config import get_config
+from .validator import validate_metrics_file
+from .jobs import JobRunner
+from config import get_config, ensure_directories
 
 
 class ReportScheduler:
     """Планировщик отчетов"""
     
+    # Окно данных, которое покрывает отчет каждой частоты, сек
+    WINDOWS = {
+        'hourly': 3600,
+        'daily': 24 * 3600,
+        'weekly': 7 * 24 * 3600
+    }
+    
     def __init__(self):
         self.config = get_config()
         self.collector = SystemMetricsCollector()
+        # Состояние детектора хранится на диске, и каждый запуск по
+        # расписанию продолжает статистику предыдущего без прогрева
+        self.detector = None
+        if self.config['anomaly']['enabled']:
+            self.detector = AnomalyDetector()
+            self.collector.add_listener(self.detector)
         self.reporter = ReportGenerator()
         self.visualizer = MetricsVisualizer()
         self.running = False
@@ -25,17 +41,33 @@ class ReportScheduler:
     def run_once(self, frequency: str):
         """Однократный запуск отчета"""
         print(f"Запуск {frequency} отчета...")
+        ensure_directories(self.config['paths']['data'], self.config['paths']['reports'])
         
-        # Сбор метрик
-        metrics = self.collector.collect_continuous(count=60, interval=1)
-        
-        # Сохранение метрик
+        # Сбор метрик с потоковой записью, как у collect: прерванный
+        # запуск оставляет в файле все измерения до сбоя
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        metrics_file = f"data/metrics_{frequency}_{timestamp}.json"
-        self.collector.save_metrics(metrics, metrics_file)
+        metrics_file = f"data/metrics_{frequency}_{timestamp}.jsonl"
+        storage = self.config['storage']
+        try:
+            with MetricsWriter(metrics_file, storage['flush_every'], storage['fsync']) as writer:
+                for metric in self.collector.iter_samples(count=60, interval=1):
+                    writer.write(metric)
+        finally:
+            if self.detector is not None:
+                self.detector.save()
+        
+        # Проверка, отчет и график используют один разбор файла
+        validate_metrics_file(metrics_file)
+        
+        return self.report_window(frequency, metrics_file, timestamp)
+    
+    def report_window(self, frequency: str, metrics, timestamp: str = None) -> Tuple[str, str]:
+        """Отчет и график по уже собранным метрикам (файл или набор данных)"""
+        timestamp = timestamp or datetime.now().strftime("%Y%m%d_%H%M%S")
+        ensure_directories(self.config['paths']['reports'])
         
         # Генерация отчета
-        report = self.reporter.generate_report(metrics_file, 'text')
+        report = self.reporter.generate_report(metrics, 'text')
         
         # Сохранение отчета
         report_file = f"reports/{frequency}_report_{timestamp}.txt"
@@ -43,7 +75,7 @@ class ReportScheduler:
             f.write(report)
         
         # Создание графиков
-        chart_file = self.visualizer.create_chart(metrics_file, 'all')
+        chart_file = self.visualizer.create_chart(metrics, 'all')
         
         print(f"Отчет сохранен: {report_file}")
         print(f"График сохранен: {chart_file}")
@@ -55,29 +87,12 @@ class ReportScheduler:
         print(f"Запуск планировщика ({frequency} отчеты)...")
         print("Нажмите Ctrl+C для остановки")
         
-        if frequency == 'hourly':
-            schedule.every().hour.at(":00").do(self._scheduled_task, 'hourly')
-        elif frequency == 'daily':
-            schedule.every().day.at("09:00").do(self._scheduled_task, 'daily')
-        elif frequency == 'weekly':
-            schedule.every().monday.at("09:00").do(self._scheduled_task, 'weekly')
-        
         self.running = True
+        runner = JobRunner([frequency], lambda f, due: self.run_once(f))
         
         try:
-            while self.running:
-                schedule.run_pending()
-                time.sleep(60)  # Проверка каждую минуту
+            asyncio.run(runner.run())
         except KeyboardInterrupt:
             print("\nОстановка планировщика...")
-            self.running = False
-    
-    def _scheduled_task(self, frequency: str):
-        """Задача по расписанию"""
-        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Запуск {frequency} задачи...")
-        
-        try:
-            self.run_once(frequency)
-            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {frequency} задача завершена")
-        except Exception as e:
-            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] Ошибка: {e}")
\ No newline at end of file
+        finally:
+            self.running = False
\ No newline at end of file
@@ -0,0 +1,139 @@
+"""
+Описание числовых полей метрик
+"""
+
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, List, Any, Iterable, Tuple
+
+
+# Числовые поля записи метрик в формате 'группа.поле'
+NUMERIC_FIELDS = (
+    'cpu.percent_total',
+    'cpu.cores',
+    'cpu.frequency_current',
+    'cpu.frequency_min',
+    'cpu.frequency_max',
+    'memory.total',
+    'memory.available',
+    'memory.used',
+    'memory.percent',
+    'memory.swap_total',
+    'memory.swap_used',
+    'memory.swap_percent',
+    'disk.total',
+    'disk.used',
+    'disk.free',
+    'disk.percent',
+    'disk.read_bytes',
+    'disk.write_bytes',
+    'disk.read_count',
+    'disk.write_count',
+    'network.bytes_sent',
+    'network.bytes_recv',
+    'network.packets_sent',
+    'network.packets_recv',
+    'network.connections',
+    'system.uptime_seconds',
+    'system.users',
+    'system.processes'
+)
+
+# Накопительные счетчики (монотонно растут до перезагрузки)
+COUNTER_FIELDS = (
+    'disk.read_bytes',
+    'disk.write_bytes',
+    'disk.read_count',
+    'disk.write_count',
+    'network.bytes_sent',
+    'network.bytes_recv',
+    'network.packets_sent',
+    'network.packets_recv'
+)
+
+# Группа обновления сборщика (metrics.intervals), из которой читается
+# счетчик: в измерениях, где группа в списке stale, значение перенесено
+COUNTER_GROUPS = {
+    'disk.read_bytes': 'disk_io',
+    'disk.write_bytes': 'disk_io',
+    'disk.read_count': 'disk_io',
+    'disk.write_count': 'disk_io',
+    'network.bytes_sent': 'network',
+    'network.bytes_recv': 'network',
+    'network.packets_sent': 'network',
+    'network.packets_recv': 'network'
+}
+
+# Целочисленные поля (размеры в байтах, количества и счетчики)
+INTEGER_FIELDS = (
+    'cpu.cores',
+    'memory.total',
+    'memory.available',
+    'memory.used',
+    'memory.swap_total',
+    'memory.swap_used',
+    'disk.total',
+    'disk.used',
+    'disk.free',
+    'network.connections',
+    'system.users',
+    'system.processes'
+) + COUNTER_FIELDS
+
+
+def get_field(metric: Dict[str, Any], field: str) -> Any:
+    """Значение поля 'группа.поле' из записи метрик"""
+    group, name = field.split('.', 1)
+    return metric.get(group, {}).get(name)
+
+
+@lru_cache(maxsize=32)
+def split_fields(fields: Tuple[str, ...]) -> Tuple[Tuple[str, str], ...]:
+    """Пары (группа, поле) для набора полей"""
+    return tuple(tuple(field.split('.', 1)) for field in fields)
+
+
+def flatten(metric: Dict[str, Any], fields: Iterable[str] = NUMERIC_FIELDS) -> List[float]:
+    """Числовые значения записи в порядке полей (None -> NaN)"""
+    values = []
+    nan = float('nan')
+    for group, name in split_fields(tuple(fields)):
+        value = metric.get(group, {}).get(name)
+        values.append(nan if value is None else float(value))
+    return values
+
+
+def unflatten(values: Iterable[float], fields: Iterable[str] = NUMERIC_FIELDS) -> Dict[str, Dict]:
+    """Вложенная запись из значений полей (NaN -> None)"""
+    metric = {}
+    for field, value in zip(fields, values):
+        group, name = field.split('.', 1)
+        metric.setdefault(group, {})[name] = None if value != value else value
+    return metric
+
+
+def parse_timestamp(timestamp: str) -> float:
+    """ISO-время записи в секунды от эпохи"""
+    return datetime.fromisoformat(timestamp).timestamp()
+
+
+def parse_datetime(value: str) -> datetime:
+    """ISO-время границы периода в локальное время без часового пояса
+    
+    Границы с поясом (в том числе 'Z') переводятся в локальное время,
+    так что их можно сравнивать с datetime.now() и с метками записей.
+    """
+    moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+def format_timestamp(epoch: float) -> str:
+    """Секунды от эпохи в ISO-время записи"""
+    return datetime.fromtimestamp(epoch).isoformat()
+
+
+def with_offset(timestamp: str) -> str:
+    """ISO-время записи (локальное) со смещением пояса: однозначно на любом узле"""
+    return datetime.fromisoformat(timestamp).astimezone().isoformat()
@@ -0,0 +1,318 @@
+"""
+Бинарный колоночный формат сегментов метрик
+"""
+
+import json
+import mmap
+import os
+import struct
+import numpy as np
+from datetime import datetime
+from typing import Dict, List, Any, Iterable, Optional
+from .schema import NUMERIC_FIELDS, COUNTER_FIELDS, INTEGER_FIELDS, get_field, unflatten
+
+
+# Заголовок файла: сигнатура, длина JSON-описания колонок, описание
+SEGMENT_MAGIC = b'PRFSEG01'
+_HEADER_LEN = struct.Struct('<I')
+_ALIGN = 64
+
+# Поля с ISO-временем хранятся как int64 микросекунды от эпохи
+TIME_FIELDS = ('timestamp', 'system.boot_time')
+PER_CORE_FIELD = 'cpu.percent_per_core'
+# Маска отсутствующих значений целочисленной колонки: '<поле>:null'
+NULL_SUFFIX = ':null'
+
+
+def _to_epoch_us(value: Optional[str]) -> int:
+    if value is None:
+        return 0
+    return int(round(datetime.fromisoformat(value).timestamp() * 1_000_000))
+
+
+def _from_epoch_us(value: int) -> str:
+    return datetime.fromtimestamp(value / 1_000_000).isoformat()
+
+
+def extras_path(filename: str) -> str:
+    """Файл нечисловых полей рядом с сегментом: 13.seg -> 13.extra.jsonl"""
+    return os.path.splitext(filename)[0] + '.extra.jsonl'
+
+
+def remove_segment(filename: str):
+    """Удаление сегмента вместе с файлом нечисловых полей"""
+    os.remove(filename)
+    if os.path.exists(extras_path(filename)):
+        os.remove(extras_path(filename))
+
+
+def records_to_columns(metrics: Iterable[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Преобразование записей метрик в колонки
+    
+    Отсутствующие значения целочисленных полей хранятся нулями, а строки
+    с ними отмечаются колонкой-маской '<поле>:null'.
+    """
+    metrics = list(metrics)
+    columns = {}
+    
+    for field in TIME_FIELDS:
+        columns[field] = np.array(
+            [_to_epoch_us(m['timestamp'] if field == 'timestamp' else get_field(m, field))
+             for m in metrics], dtype=np.int64)
+    
+    for field in NUMERIC_FIELDS:
+        values = [get_field(m, field) for m in metrics]
+        if field in INTEGER_FIELDS:
+            nulls = np.array([v is None for v in values], dtype=bool)
+            columns[field] = np.array([0 if v is None else v for v in values],
+                                      dtype=np.int64)
+            if nulls.any():
+                columns[field + NULL_SUFFIX] = nulls
+        else:
+            columns[field] = np.array([np.nan if v is None else v for v in values],
+                                      dtype=np.float64)
+    
+    # Загрузка по ядрам - двумерная колонка, если число ядер не менялось
+    per_core = [m.get('cpu', {}).get('percent_per_core') for m in metrics]
+    if per_core and all(per_core) and len({len(p) for p in per_core}) == 1:
+        columns[PER_CORE_FIELD] = np.array(per_core, dtype=np.float32)
+    
+    return columns
+
+
+def records_to_extras(metrics: Iterable[Dict[str, Any]],
+                      columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Поля записей, которых нет в колонках (anomalies, processes, overhead,
+    stale, host и т.п.), - по словарю на запись"""
+    stored = set(NUMERIC_FIELDS).union(TIME_FIELDS).intersection(columns)
+    if PER_CORE_FIELD in columns:
+        stored.add(PER_CORE_FIELD)
+    
+    extras = []
+    for metric in metrics:
+        extra = {}
+        for key, value in metric.items():
+            if key in stored:
+                continue
+            if isinstance(value, dict):
+                rest = {name: v for name, v in value.items()
+                        if f"{key}.{name}" not in stored}
+                if rest or not value:
+                    extra[key] = rest
+            else:
+                extra[key] = value
+        extras.append(extra)
+    return extras
+
+
+def columns_to_records(columns: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Записи в исходном вложенном формате из декодированных колонок"""
+    numeric = [f for f in NUMERIC_FIELDS if f in columns]
+    rows = len(columns['timestamp'])
+    matrix = np.column_stack([columns[f].astype(np.float64) for f in numeric]) \
+        if numeric else np.empty((rows, 0))
+    integers = set(INTEGER_FIELDS).intersection(numeric)
+    nulls = {f: columns[f + NULL_SUFFIX].tolist() for f in integers
+             if f + NULL_SUFFIX in columns}
+    per_core = columns[PER_CORE_FIELD].tolist() if PER_CORE_FIELD in columns else None
+    timestamps = columns['timestamp'].tolist()
+    boot_times = columns['system.boot_time'].tolist() if 'system.boot_time' in columns else None
+    
+    records = []
+    for i, row in enumerate(matrix.tolist()):
+        metric = {'timestamp': _from_epoch_us(timestamps[i])}
+        metric.update(unflatten(row, numeric))
+        for field in integers:
+            group, name = field.split('.', 1)
+            if field in nulls and nulls[field][i]:
+                metric[group][name] = None
+            else:
+                metric[group][name] = int(metric[group][name])
+        if per_core is not None:
+            metric['cpu']['percent_per_core'] = per_core[i]
+        if boot_times is not None and boot_times[i]:
+            metric.setdefault('system', {})['boot_time'] = _from_epoch_us(boot_times[i])
+        records.append(metric)
+    
+    return records
+
+
+def write_segment(filename: str, columns: Dict[str, np.ndarray]) -> int:
+    """Запись колонок в сегмент, возвращает число записей
+    
+    Накопительные счетчики сохраняются разностями соседних значений.
+    Файл сначала пишется во временный и затем атомарно подменяется.
+    """
+    rows = len(columns['timestamp'])
+    descriptors = []
+    blobs = []
+    offset = 0
+    
+    for name, values in columns.items():
+        values = np.ascontiguousarray(values)
+        encoding = 'raw'
+        if name in COUNTER_FIELDS:
+            values = np.diff(values.astype(np.int64), prepend=np.int64(0))
+            encoding = 'delta'
+        
+        offset = -(-offset // _ALIGN) * _ALIGN
+        descriptors.append({
+            'name': name,
+            'dtype': values.dtype.str,
+            'shape': list(values.shape),
+            'encoding': encoding,
+            'offset': offset
+        })
+        blobs.append((offset, values))
+        offset += values.nbytes
+    
+    header = json.dumps({'version': 1, 'rows': rows, 'columns': descriptors}).encode()
+    data_start = -(-(len(SEGMENT_MAGIC) + _HEADER_LEN.size + len(header)) // _ALIGN) * _ALIGN
+    header = header.ljust(data_start - len(SEGMENT_MAGIC) - _HEADER_LEN.size)
+    
+    tmp_name = filename + '.tmp'
+    with open(tmp_name, 'wb') as f:
+        f.write(SEGMENT_MAGIC)
+        f.write(_HEADER_LEN.pack(len(header)))
+        f.write(header)
+        for blob_offset, values in blobs:
+            f.seek(data_start + blob_offset)
+            f.write(values.tobytes())
+    os.replace(tmp_name, filename)
+    
+    return rows
+
+
+def write_records(filename: str, metrics: Iterable[Dict[str, Any]]) -> int:
+    """Запись списка метрик в сегмент
+    
+    Нечисловые поля записей сохраняются рядом с сегментом в JSON Lines
+    (extras_path), по строке на запись, если хотя бы у одной они есть.
+    """
+    metrics = list(metrics)
+    columns = records_to_columns(metrics)
+    extras = records_to_extras(metrics, columns)
+    side_file = extras_path(filename)
+    if any(extras):
+        tmp_name = side_file + '.tmp'
+        with open(tmp_name, 'w', encoding='utf-8') as f:
+            for extra in extras:
+                f.write(json.dumps(extra, ensure_ascii=False, separators=(',', ':')) + '\n')
+        os.replace(tmp_name, side_file)
+    elif os.path.exists(side_file):
+        os.remove(side_file)
+    return write_segment(filename, columns)
+
+
+def is_segment(filename: str) -> bool:
+    """Проверка сигнатуры сегмента"""
+    with open(filename, 'rb') as f:
+        return f.read(len(SEGMENT_MAGIC)) == SEGMENT_MAGIC
+
+
+class Segment:
+    """Сегмент, отображенный в память
+    
+    Колонки возвращаются как представления NumPy над mmap без разбора
+    и копирования. Исключение - счетчики со разностным кодированием:
+    они восстанавливаются накопительной суммой один раз и кэшируются.
+    Нечисловые поля из файла рядом с сегментом читаются при первом
+    восстановлении записей.
+    """
+    
+    def __init__(self, filename: str):
+        self.filename = filename
+        with open(filename, 'rb') as f:
+            if f.read(len(SEGMENT_MAGIC)) != SEGMENT_MAGIC:
+                raise ValueError(f"Файл {filename} не является сегментом метрик")
+            header_len, = _HEADER_LEN.unpack(f.read(_HEADER_LEN.size))
+            header = json.loads(f.read(header_len))
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        
+        self._data_start = len(SEGMENT_MAGIC) + _HEADER_LEN.size + header_len
+        self.rows = header['rows']
+        self._columns = {c['name']: c for c in header['columns']}
+        self._decoded = {}
+        self._extras = None
+    
+    def __len__(self) -> int:
+        return self.rows
+    
+    @property
+    def fields(self) -> List[str]:
+        return [name for name in self._columns if not name.endswith(NULL_SUFFIX)]
+    
+    @property
+    def has_extras(self) -> bool:
+        """Есть ли у сегмента файл нечисловых полей"""
+        return os.path.exists(extras_path(self.filename))
+    
+    def nulls(self, name: str) -> Optional[np.ndarray]:
+        """Маска отсутствующих значений целочисленной колонки (None, если их нет)"""
+        if name + NULL_SUFFIX not in self._columns:
+            return None
+        return self.raw_column(name + NULL_SUFFIX)
+    
+    def __contains__(self, name: str) -> bool:
+        return name in self._columns
+    
+    def raw_column(self, name: str) -> np.ndarray:
+        """Колонка в том виде, как она хранится (без декодирования)"""
+        desc = self._columns[name]
+        dtype = np.dtype(desc['dtype'])
+        shape = tuple(desc['shape'])
+        count = int(np.prod(shape)) if shape else 0
+        values = np.frombuffer(self._mmap, dtype=dtype, count=count,
+                               offset=self._data_start + desc['offset'])
+        return values.reshape(shape)
+    
+    def column(self, name: str) -> np.ndarray:
+        """Значения колонки"""
+        if self._columns[name]['encoding'] != 'delta':
+            return self.raw_column(name)
+        if name not in self._decoded:
+            decoded = np.cumsum(self.raw_column(name))
+            decoded.flags.writeable = False
+            self._decoded[name] = decoded
+        return self._decoded[name]
+    
+    def timestamps(self) -> np.ndarray:
+        """Метки времени в секундах от эпохи"""
+        return self.raw_column('timestamp') / 1_000_000
+    
+    def to_records(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Восстановление записей [start:stop] в исходном вложенном формате"""
+        rows = slice(start, stop)
+        records = columns_to_records({name: self.column(name)[rows] for name in self._columns})
+        for metric, extra in zip(records, self.extras[rows]):
+            for key, value in extra.items():
+                if isinstance(value, dict) and isinstance(metric.get(key), dict):
+                    metric[key].update(value)
+                else:
+                    metric[key] = value
+        return records
+    
+    @property
+    def extras(self) -> List[Dict[str, Any]]:
+        """Нечисловые поля по записям (пустой список, если файла нет)"""
+        if self._extras is None:
+            self._extras = []
+            if self.has_extras:
+                with open(extras_path(self.filename), 'r', encoding='utf-8') as f:
+                    self._extras = [json.loads(line) for line in f if line.strip()]
+        return self._extras
+    
+    def close(self):
+        """Освобождение отображения файла"""
+        self._decoded.clear()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # На mmap еще ссылаются выданные представления
+            pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
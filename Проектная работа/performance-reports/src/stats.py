@@ -0,0 +1,227 @@
+"""
+Статистика метрик за период в один потоковый проход
+"""
+
+import warnings
+import numpy as np
+from typing import Dict, List, Any, Iterable, Optional
+from .schema import NUMERIC_FIELDS, flatten, parse_timestamp
+from .rollups import QuantileSketch
+
+
+# Порог из конфигурации -> поле, к которому он относится
+THRESHOLD_FIELDS = {
+    'cpu_warning': 'cpu.percent_total',
+    'memory_warning': 'memory.percent',
+    'disk_warning': 'disk.percent'
+}
+
+QUANTILES = (('p50', 0.50), ('p95', 0.95), ('p99', 0.99))
+
+
+class PeriodStats:
+    """Накопление статистики по всем числовым полям
+    
+    Данные подаются пачками. Среднее и дисперсия объединяются по формулам
+    Чана, квантили считаются по логарифмической гистограмме с
+    фиксированной памятью. Пока общее число строк не превышает
+    exact_limit, значения сохраняются, и квантили считаются точно.
+    Для строк агрегатов (resolution - их шаг) квантили и время выше
+    порогов считаются по средним интервалов и в итоге помечаются как
+    приблизительные.
+    """
+    
+    def __init__(self, fields: Iterable[str] = NUMERIC_FIELDS,
+                 thresholds: Optional[Dict[str, float]] = None,
+                 relative_accuracy: float = 0.01, exact_limit: int = 200_000):
+        self.fields = tuple(fields)
+        n = len(self.fields)
+        self.count = np.zeros(n, dtype=np.int64)
+        self.mean = np.zeros(n)
+        self.m2 = np.zeros(n)
+        self.min = np.full(n, np.nan)
+        self.max = np.full(n, np.nan)
+        self.sketch = QuantileSketch(n, relative_accuracy)
+        self.exact_limit = exact_limit
+        self._exact = []
+        self._exact_rows = 0
+        
+        thresholds = thresholds or {}
+        self._thresholds = [(key, THRESHOLD_FIELDS[key], self.fields.index(THRESHOLD_FIELDS[key]),
+                             value) for key, value in thresholds.items()
+                            if THRESHOLD_FIELDS.get(key) in self.fields]
+        self.time_above = np.zeros(len(self._thresholds))
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self._prev_above = None
+        self._last_gap = 0.0
+        self.resolution = None
+    
+    def update(self, timestamps: np.ndarray, values: np.ndarray,
+               minimums: Optional[np.ndarray] = None,
+               maximums: Optional[np.ndarray] = None):
+        """Учет пачки строк: timestamps (k,), values (k, полей)
+        
+        minimums/maximums - экстремумы строк, если строки сами являются
+        агрегатами (иначе берутся значения).
+        """
+        if len(values) == 0:
+            return
+        valid = ~np.isnan(values)
+        count = valid.sum(axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            chunk_mean = np.where(count > 0, np.nansum(values, axis=0) / count, 0.0)
+            chunk_m2 = np.nansum((values - chunk_mean) ** 2, axis=0)
+            total = self.count + count
+            delta = chunk_mean - self.mean
+            self.mean = np.where(total > 0, self.mean + delta * count / total, 0.0)
+            self.m2 = np.where(total > 0,
+                               self.m2 + chunk_m2 + delta ** 2 * self.count * count / total,
+                               0.0)
+        self.count = total
+        
+        self.min = np.fmin(self.min, np.fmin.reduce(values if minimums is None else minimums))
+        self.max = np.fmax(self.max, np.fmax.reduce(values if maximums is None else maximums))
+        self.sketch.add_many(values)
+        
+        if self._exact is not None:
+            self._exact.append(values)
+            self._exact_rows += len(values)
+            if self._exact_rows > self.exact_limit:
+                self._exact = None
+        
+        self._update_time_above(np.asarray(timestamps, dtype=np.float64), values)
+    
+    def _update_time_above(self, timestamps: np.ndarray, values: np.ndarray):
+        """Время выше порогов: каждое измерение действует до следующего"""
+        above = np.column_stack([values[:, i] > value for _, _, i, value in self._thresholds]) \
+            if self._thresholds else np.zeros((len(values), 0), dtype=bool)
+        
+        if self.first_timestamp is None:
+            self.first_timestamp = float(timestamps[0])
+            all_ts, all_above = timestamps, above
+        else:
+            all_ts = np.concatenate(([self.last_timestamp], timestamps))
+            all_above = np.vstack((self._prev_above, above))
+        
+        gaps = np.diff(all_ts)
+        if len(gaps):
+            self.time_above += (all_above[:-1] * gaps[:, None]).sum(axis=0)
+            self._last_gap = float(gaps[-1])
+        self.last_timestamp = float(timestamps[-1])
+        self._prev_above = above[-1:]
+    
+    def result(self) -> Dict[str, Any]:
+        """Итоговая статистика"""
+        if self._exact:
+            data = np.vstack(self._exact)
+            with warnings.catch_warnings():
+                # Поля без единого значения дают NaN, это ожидаемо
+                warnings.simplefilter('ignore', RuntimeWarning)
+                quantiles = {name: np.nanpercentile(data, q * 100, axis=0)
+                             for name, q in QUANTILES}
+        else:
+            quantiles = {name: self.sketch.quantile(q) for name, q in QUANTILES}
+        
+        with np.errstate(invalid='ignore', divide='ignore'):
+            std = np.sqrt(np.where(self.count > 1, self.m2 / np.maximum(self.count - 1, 1), 0.0))
+        
+        fields = {}
+        for i, field in enumerate(self.fields):
+            if self.count[i] == 0:
+                continue
+            fields[field] = {
+                'count': int(self.count[i]),
+                'mean': float(self.mean[i]),
+                'min': float(self.min[i]),
+                'max': float(self.max[i]),
+                'std': float(std[i])
+            }
+            for name, _ in QUANTILES:
+                fields[field][name] = float(quantiles[name][i])
+        
+        duration = 0.0
+        if self.first_timestamp is not None:
+            duration = self.last_timestamp - self.first_timestamp + self._last_gap
+        time_above = self.time_above.copy()
+        if self._prev_above is not None and len(time_above):
+            time_above += self._prev_above[0] * self._last_gap
+        
+        above = {}
+        for j, (key, field, _, value) in enumerate(self._thresholds):
+            above[key] = {
+                'field': field,
+                'threshold': value,
+                'seconds': float(time_above[j]),
+                'share': float(time_above[j] / duration) if duration > 0 else 0.0
+            }
+        
+        return {'duration_seconds': duration, 'fields': fields, 'time_above': above,
+                'resolution': self.resolution}
+
+
+def compute_period_stats(metrics: Iterable[Dict[str, Any]],
+                         thresholds: Optional[Dict[str, float]] = None,
+                         fields: Iterable[str] = NUMERIC_FIELDS,
+                         chunk_size: int = 4096, **kwargs) -> Dict[str, Any]:
+    """Статистика по потоку записей метрик с ограниченной памятью
+    
+    Записи читаются пачками по chunk_size, поэтому на вход можно подать
+    итератор по файлу, который не помещается в память. Для строк
+    агрегатов (с блоком 'rollup') min/max берутся из агрегата.
+    """
+    fields = tuple(fields)
+    stats = PeriodStats(fields, thresholds, **kwargs)
+    timestamps, rows, minimums, maximums = [], [], [], []
+    has_rollups = False
+    
+    def flush():
+        if not rows:
+            return
+        values = np.array(rows)
+        stats.update(np.array(timestamps), values,
+                     np.array(minimums) if has_rollups else None,
+                     np.array(maximums) if has_rollups else None)
+        for buffer in (timestamps, rows, minimums, maximums):
+            buffer.clear()
+    
+    for metric in metrics:
+        values = flatten(metric, fields)
+        timestamps.append(parse_timestamp(metric['timestamp']))
+        rows.append(values)
+        rollup = metric.get('rollup')
+        if rollup:
+            has_rollups = True
+            stats.resolution = max(stats.resolution or 0, rollup['resolution'])
+            minimums.append([_or_nan(rollup['min'].get(f)) for f in fields])
+            maximums.append([_or_nan(rollup['max'].get(f)) for f in fields])
+        else:
+            minimums.append(values)
+            maximums.append(values)
+        if len(rows) >= chunk_size:
+            flush()
+    flush()
+    
+    return stats.result()
+
+
+def dataset_period_stats(dataset, thresholds: Optional[Dict[str, float]] = None,
+                         fields: Iterable[str] = NUMERIC_FIELDS,
+                         chunk_size: int = 65536, **kwargs) -> Dict[str, Any]:
+    """Статистика по колонкам набора данных (MetricsDataset) без перебора записей"""
+    if dataset.is_rollup:
+        return compute_period_stats(dataset, thresholds, fields, **kwargs)
+    
+    fields = tuple(fields)
+    stats = PeriodStats(fields, thresholds, **kwargs)
+    timestamps = dataset.timestamps
+    columns = [dataset.column(f) for f in fields]
+    for start in range(0, len(dataset), chunk_size):
+        stop = start + chunk_size
+        values = np.column_stack([c[start:stop] for c in columns]).astype(np.float64)
+        stats.update(timestamps[start:stop], values)
+    return stats.result()
+
+
+def _or_nan(value: Optional[float]) -> float:
+    return float('nan') if value is None else value
@@ -0,0 +1,174 @@
+"""
+Хранение метрик: потоковая запись JSON Lines и чтение файлов
+"""
+
+import json
+import os
+from typing import Dict, List, Any, Iterator
+from .schema import parse_timestamp
+from .segment import SEGMENT_MAGIC, Segment, write_records
+
+
+def detect_format(filename: str) -> str:
+    """Определение формата файла метрик: 'json' (список), 'jsonl' или 'segment'"""
+    with open(filename, 'rb') as f:
+        if f.read(len(SEGMENT_MAGIC)) == SEGMENT_MAGIC:
+            return 'segment'
+        f.seek(0)
+        while True:
+            chunk = f.read(64)
+            if not chunk:
+                return 'jsonl'
+            stripped = chunk.lstrip()
+            if stripped:
+                return 'json' if stripped[:1] == b'[' else 'jsonl'
+
+
+def iter_metrics(filename: str, strict: bool = False) -> Iterator[Dict[str, Any]]:
+    """Потоковое чтение метрик
+    
+    Для JSON Lines записи читаются построчно. Строки, которые не удалось
+    разобрать (например, оборванные при аварийном завершении), пропускаются,
+    если не задан strict.
+    """
+    file_format = detect_format(filename)
+    if file_format == 'segment':
+        with Segment(filename) as segment:
+            yield from segment.to_records()
+        return
+    if file_format == 'json':
+        with open(filename, 'r', encoding='utf-8') as f:
+            yield from json.load(f)
+        return
+    
+    with open(filename, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if strict:
+                    raise ValueError(f"Поврежденная запись в {filename}, строка {line_no}")
+
+
+def load_metrics(filename: str) -> List[Dict[str, Any]]:
+    """Загрузка всех метрик из файла любого поддерживаемого формата"""
+    return list(iter_metrics(filename))
+
+
+def time_span(filename: str) -> tuple:
+    """Время первой и последней записи файла (секунды от эпохи)
+    
+    Для JSON Lines читаются только первая и последняя строки.
+    """
+    file_format = detect_format(filename)
+    if file_format == 'segment':
+        with Segment(filename) as segment:
+            timestamps = segment.timestamps()
+            if len(timestamps) == 0:
+                return 0.0, 0.0
+            return float(timestamps[0]), float(timestamps[-1])
+    
+    if file_format == 'json':
+        metrics = load_metrics(filename)
+        if not metrics:
+            return 0.0, 0.0
+        first, last = metrics[0], metrics[-1]
+    else:
+        first = next(iter_metrics(filename), None)
+        if first is None:
+            return 0.0, 0.0
+        last = _last_jsonl_record(filename) or first
+    
+    return parse_timestamp(first['timestamp']), parse_timestamp(last['timestamp'])
+
+
+def _last_jsonl_record(filename: str, chunk: int = 65536) -> Dict[str, Any]:
+    """Последняя целая запись JSON Lines (чтение с конца файла)"""
+    with open(filename, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        f.seek(max(0, size - chunk))
+        lines = f.read().splitlines()
+    for line in reversed(lines):
+        try:
+            return json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+    return None
+
+
+def convert_to_segment(source: str, target: str = None) -> tuple:
+    """Конвертация файла метрик в бинарный сегмент, возвращает (файл, записей)"""
+    target = target or os.path.splitext(source)[0] + '.seg'
+    rows = write_records(target, iter_metrics(source))
+    return target, rows
+
+
+class MetricsWriter:
+    """Потоковая запись метрик в формате JSON Lines
+    
+    Каждая запись - одна строка. Записи сбрасываются на диск пачками по
+    flush_every штук, при fsync=True после сброса вызывается os.fsync.
+    Файл открывается на дозапись, поэтому сбор можно продолжить после
+    перезапуска.
+    """
+    
+    def __init__(self, filename: str, flush_every: int = 1, fsync: bool = False):
+        if os.path.exists(filename) and os.path.getsize(filename) > 0:
+            file_format = detect_format(filename)
+            if file_format != 'jsonl':
+                raise ValueError(f"Файл {filename} в формате {file_format}, дозапись невозможна")
+        
+        self.filename = filename
+        self.flush_every = max(1, flush_every)
+        self.fsync = fsync
+        self.written = 0
+        self._pending = []
+        self._file = open(filename, 'a', encoding='utf-8')
+        self._terminate_partial_line()
+    
+    def write(self, metric: Dict[str, Any]):
+        """Добавление одной записи"""
+        self._pending.append(json.dumps(metric, default=str, ensure_ascii=False,
+                                        separators=(',', ':')))
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+    
+    def write_many(self, metrics: List[Dict[str, Any]]):
+        """Добавление пачки записей"""
+        for metric in metrics:
+            self.write(metric)
+    
+    def flush(self):
+        """Сброс накопленных записей на диск"""
+        if self._pending:
+            self._file.write('\n'.join(self._pending) + '\n')
+            self.written += len(self._pending)
+            self._pending = []
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+    
+    def close(self):
+        """Сброс остатка и закрытие файла"""
+        if not self._file.closed:
+            self.flush()
+            self._file.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _terminate_partial_line(self):
+        """Завершение оборванной строки, оставшейся после сбоя"""
+        if self._file.tell() == 0:
+            return
+        with open(self.filename, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b'\n':
+                self._file.write('\n')
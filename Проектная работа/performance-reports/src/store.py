@@ -0,0 +1,261 @@
+"""
+Хранилище метрик с почасовым разбиением и индексом по времени
+"""
+
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Any, Iterator, Optional
+from .schema import parse_timestamp
+from .storage import MetricsWriter, iter_metrics
+
+
+# Ключ часа сегмента - по UTC: при переводе часов локальные часы повторяются
+PARTITION_FORMAT = '%Y%m%d%H'
+INDEX_FILE = 'index.json'
+# Хранилища узлов, принятых от агентов: <root>/hosts/<узел>/
+HOSTS_DIR = 'hosts'
+
+# Чтение-изменение-запись индекса из разных потоков (сбор, очистка)
+_index_lock = threading.RLock()
+
+
+def partition_key(epoch: float) -> str:
+    """Ключ часа (UTC), в который попадает момент epoch"""
+    return datetime.fromtimestamp(epoch, timezone.utc).strftime(PARTITION_FORMAT)
+
+
+def partition_start(key: str) -> float:
+    """Начало часа key в секундах от эпохи"""
+    return datetime.strptime(key, PARTITION_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+def safe_host_name(host: str) -> str:
+    """Имя узла, пригодное для имени директории"""
+    name = re.sub(r'[^A-Za-z0-9._-]', '_', str(host or '')).strip('.')
+    if not name:
+        raise ValueError(f"Недопустимое имя узла: {host!r}")
+    return name
+
+
+def host_root(root: str, host: str) -> str:
+    """Корень хранилища отдельного узла"""
+    return os.path.join(root, HOSTS_DIR, safe_host_name(host))
+
+
+def list_hosts(root: str) -> List[str]:
+    """Узлы, для которых в хранилище есть данные"""
+    hosts_dir = os.path.join(root, HOSTS_DIR)
+    if not os.path.isdir(hosts_dir):
+        return []
+    return sorted(name for name in os.listdir(hosts_dir)
+                  if os.path.isdir(os.path.join(hosts_dir, name)))
+
+
+class MetricsStore:
+    """Хранилище метрик, разбитое на часовые сегменты
+    
+    Каждый час (UTC) - отдельный файл <root>/<ГГГГММДД>/<ЧЧ>.jsonl (после
+    компактизации - .seg). Директории создаются при первой записи.
+    В index.json хранятся фактические границы
+    времени и число записей каждого закрытого сегмента, поэтому запрос
+    за период открывает только пересекающиеся с ним сегменты.
+    """
+    
+    def __init__(self, root: str):
+        self.root = root
+        self.index_path = os.path.join(root, INDEX_FILE)
+    
+    def load_index(self) -> Dict[str, Dict[str, Any]]:
+        """Индекс сегментов: ключ часа -> путь, границы времени, число записей"""
+        if not os.path.exists(self.index_path):
+            return {}
+        with open(self.index_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def save_index(self, index: Dict[str, Dict[str, Any]]):
+        """Атомарная запись индекса"""
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = self.index_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.index_path)
+    
+    def update_index(self, key: str, path: str, start: float, end: float, rows: int):
+        """Добавление сведений о сегменте (с объединением с имеющимися)"""
+        with _index_lock:
+            index = self.load_index()
+            entry = index.get(key)
+            if entry and entry['path'] == path:
+                start = min(start, entry['start'])
+                end = max(end, entry['end'])
+                rows += entry['rows']
+            index[key] = {'path': path, 'start': start, 'end': end, 'rows': rows}
+            self.save_index(index)
+    
+    def replace_partition(self, key: str, path: Optional[str], start: float = 0.0,
+                          end: float = 0.0, rows: int = 0):
+        """Замена сведений о сегменте после компактизации (path=None - удаление)"""
+        with _index_lock:
+            index = self.load_index()
+            if path is None:
+                index.pop(key, None)
+            else:
+                index[key] = {'path': path, 'start': start, 'end': end, 'rows': rows}
+            self.save_index(index)
+    
+    def mark_open(self, key: str, is_open: bool = True):
+        """Пометка сегмента, в который снова идет запись
+        
+        Пока сегмент открыт, его границы в индексе могут быть устаревшими,
+        и при выборке используются границы часа.
+        """
+        with _index_lock:
+            index = self.load_index()
+            if key in index and index[key].get('open', False) != is_open:
+                if is_open:
+                    index[key]['open'] = True
+                else:
+                    del index[key]['open']
+                self.save_index(index)
+    
+    def partition_path(self, key: str, extension: str = '.jsonl') -> str:
+        """Относительный путь сегмента по ключу часа"""
+        return os.path.join(key[:8], key[8:] + extension)
+    
+    def writer(self, flush_every: int = 1, fsync: bool = False) -> 'StoreWriter':
+        """Писатель, раскладывающий записи по часовым сегментам"""
+        return StoreWriter(self, flush_every, fsync)
+    
+    def partitions(self, start: Optional[datetime] = None,
+                   end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Сегменты, пересекающиеся с периодом, в порядке времени
+        
+        Для сегментов, еще не попавших в индекс или открытых на запись,
+        границами считаются границы часа из имени файла.
+        """
+        lo = start.timestamp() if start else float('-inf')
+        hi = end.timestamp() if end else float('inf')
+        index = self.load_index()
+        found = {}
+        
+        for key, entry in index.items():
+            if entry.get('open'):
+                continue
+            if entry['end'] >= lo and entry['start'] <= hi:
+                found[key] = dict(entry, key=key)
+        
+        for key, path in self._scan():
+            if key in index and not index[key].get('open'):
+                continue
+            hour = partition_start(key)
+            bounds = (hour, hour + 3600)
+            if bounds[1] >= lo and bounds[0] <= hi:
+                found[key] = {'key': key, 'path': path, 'start': bounds[0],
+                              'end': bounds[1], 'rows': None}
+        
+        return [found[key] for key in sorted(found)]
+    
+    def iter_range(self, start: Optional[datetime] = None,
+                   end: Optional[datetime] = None) -> Iterator[Dict[str, Any]]:
+        """Потоковое чтение записей за период"""
+        lo = start.timestamp() if start else float('-inf')
+        hi = end.timestamp() if end else float('inf')
+        
+        for partition in self.partitions(start, end):
+            full_path = os.path.join(self.root, partition['path'])
+            if not os.path.exists(full_path):
+                continue
+            # Сегмент целиком внутри периода - записи не фильтруются
+            inside = partition['rows'] is not None and \
+                lo <= partition['start'] and partition['end'] <= hi
+            for metric in iter_metrics(full_path):
+                if inside or lo <= parse_timestamp(metric['timestamp']) <= hi:
+                    yield metric
+    
+    def range_files(self, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> List[str]:
+        """Полные пути сегментов, пересекающихся с периодом"""
+        return [os.path.join(self.root, p['path']) for p in self.partitions(start, end)
+                if os.path.exists(os.path.join(self.root, p['path']))]
+    
+    def query(self, start: Optional[datetime] = None,
+              end: Optional[datetime] = None) -> List[Dict[str, Any]]:
+        """Все записи за период"""
+        return list(self.iter_range(start, end))
+    
+    def _scan(self) -> Iterator[tuple]:
+        """Сегменты на диске: (ключ часа, относительный путь)"""
+        if not os.path.isdir(self.root):
+            return
+        for day in sorted(os.listdir(self.root)):
+            day_dir = os.path.join(self.root, day)
+            if not (os.path.isdir(day_dir) and day.isdigit() and len(day) == 8):
+                continue
+            for name in sorted(os.listdir(day_dir)):
+                hour, extension = os.path.splitext(name)
+                if extension in ('.jsonl', '.seg') and hour.isdigit():
+                    yield day + hour, os.path.join(day, name)
+
+
+class StoreWriter:
+    """Запись потока метрик в часовые сегменты хранилища"""
+    
+    def __init__(self, store: MetricsStore, flush_every: int = 1, fsync: bool = False):
+        self.store = store
+        self.flush_every = flush_every
+        self.fsync = fsync
+        self._key = None
+        self._writer = None
+        self._start = None
+        self._end = None
+        self._rows = 0
+    
+    def write(self, metric: Dict[str, Any]):
+        """Добавление записи в сегмент ее часа"""
+        epoch = parse_timestamp(metric['timestamp'])
+        key = partition_key(epoch)
+        if key != self._key:
+            self._rotate(key)
+        
+        self._writer.write(metric)
+        self._start = epoch if self._start is None else min(self._start, epoch)
+        self._end = epoch if self._end is None else max(self._end, epoch)
+        self._rows += 1
+    
+    def flush(self):
+        if self._writer:
+            self._writer.flush()
+    
+    def close(self):
+        """Закрытие текущего сегмента и обновление индекса"""
+        self._rotate(None)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def _rotate(self, key: Optional[str]):
+        if self._writer:
+            self._writer.close()
+            if self._rows:
+                self.store.update_index(self._key, self.store.partition_path(self._key),
+                                        self._start, self._end, self._rows)
+            else:
+                self.store.mark_open(self._key, False)
+        
+        self._key = key
+        self._writer = None
+        self._start = self._end = None
+        self._rows = 0
+        
+        if key:
+            relative = self.store.partition_path(key)
+            full_path = os.path.join(self.store.root, relative)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            self.store.mark_open(key)
+            self._writer = MetricsWriter(full_path, self.flush_every, self.fsync)
@@ -0,0 +1,176 @@
+"""
+Синтетические измерения для нагрузочных испытаний
+"""
+
+import time
+import numpy as np
+from typing import Dict, Any, Iterator, Optional
+from .schema import NUMERIC_FIELDS, INTEGER_FIELDS
+from .segment import PER_CORE_FIELD, columns_to_records, write_segment
+from .storage import MetricsWriter
+
+# Записей в одном блоке генерации при потоковой записи
+CHUNK = 65536
+
+GIB = 1024 ** 3
+
+# Скорость накопительных счетчиков при полной нагрузке, в секунду
+COUNTER_RATES = {
+    'disk.read_bytes': 20e6,
+    'disk.write_bytes': 30e6,
+    'disk.read_count': 400,
+    'disk.write_count': 600,
+    'network.bytes_sent': 10e6,
+    'network.bytes_recv': 25e6,
+    'network.packets_sent': 8000,
+    'network.packets_recv': 15000
+}
+
+# Средняя длительность всплеска нагрузки, сек
+SPIKE_SECONDS = 300
+
+# Сколько секунд до первого измерения после перезагрузки система загружалась
+BOOT_SECONDS = 30
+
+
+class SyntheticGenerator:
+    """Правдоподобный профиль нагрузки, генерируемый блоками NumPy
+
+    Загрузка следует суточному циклу (минимум около 4:00, максимум около
+    16:00 местного времени), в выходные она вдвое ниже. Поверх цикла идут
+    всплески случайной длительности (в среднем spikes_per_hour в час) и
+    шум. Память медленно растет от перезагрузки до перезагрузки (утечка),
+    диск заполняется и очищается раз в неделю. Перезагрузки случаются в
+    среднем раз в reboot_days дней: накопительные счетчики обнуляются, а
+    время работы начинается заново. Каждый блок продолжает предыдущий,
+    поэтому набор любого размера строится по частям.
+    """
+
+    def __init__(self, start: Optional[float] = None, step: float = 1.0, seed: int = 0,
+                 cores: int = 4, spikes_per_hour: float = 0.5, reboot_days: float = 7.0):
+        self.start = time.time() if start is None else start
+        self.step = step
+        self.cores = cores
+        self.spikes_per_hour = spikes_per_hour
+        self.reboot_days = reboot_days
+        self._rng = np.random.default_rng(seed)
+        self._utc_offset = time.localtime(self.start).tm_gmtoff
+        self._position = 0
+        self._boot_time = self.start - 3600
+        self._counters = dict.fromkeys(COUNTER_RATES, 0.0)
+        # Всплески, не закончившиеся к концу прошлого блока
+        self._spike_ends = np.empty(0, dtype=np.int64)
+        self._spike_amplitudes = np.empty(0)
+
+    def next_chunk(self, size: int) -> Dict[str, np.ndarray]:
+        """Следующие size измерений в виде колонок сегмента"""
+        rng = self._rng
+        t = self.start + (self._position + np.arange(size)) * self.step
+        local = t + self._utc_offset
+        hour = (local % 86400) / 3600
+        weekday = ((local // 86400).astype(np.int64) + 3) % 7  # 1970-01-01 - четверг
+        load = (0.5 - 0.5 * np.cos(2 * np.pi * (hour - 4) / 24)) * np.where(weekday >= 5, 0.5, 1.0)
+        spikes = self._spikes(size)
+        activity = 0.1 + load + spikes
+
+        # Индекс последней перезагрузки в блоке (-1 - перезагрузок не было)
+        reboots = rng.random(size) < self.step / (self.reboot_days * 86400)
+        last_reboot = np.maximum.accumulate(np.where(reboots, np.arange(size), -1))
+        rebooted = last_reboot >= 0
+        since = np.maximum(last_reboot, 0)
+        boot_time = np.where(rebooted, t[since] - BOOT_SECONDS, self._boot_time)
+        uptime = t - boot_time
+
+        cpu = np.clip(8 + 55 * load + 35 * spikes + rng.normal(0, 4, size), 0, 100)
+        leak = np.minimum(uptime / (self.reboot_days * 86400), 1.0) * 20
+        memory_percent = np.clip(30 + 25 * load + leak + rng.normal(0, 0.5, size), 0, 100)
+        swap_percent = np.clip((memory_percent - 80) * 3, 0, 100)
+        disk_percent = 45 + 30 * (local / (7 * 86400) % 1)
+
+        values = {
+            'cpu.percent_total': cpu,
+            'cpu.cores': np.full(size, self.cores),
+            'cpu.frequency_current': 800 + 2800 * (0.3 + 0.7 * cpu / 100) + rng.normal(0, 50, size),
+            'cpu.frequency_min': np.full(size, 800.0),
+            'cpu.frequency_max': np.full(size, 3600.0),
+            'memory.total': np.full(size, 16 * GIB),
+            'memory.used': memory_percent / 100 * 16 * GIB,
+            'memory.available': (100 - memory_percent) / 100 * 16 * GIB,
+            'memory.percent': memory_percent,
+            'memory.swap_total': np.full(size, 4 * GIB),
+            'memory.swap_used': swap_percent / 100 * 4 * GIB,
+            'memory.swap_percent': swap_percent,
+            'disk.total': np.full(size, 500 * GIB),
+            'disk.used': disk_percent / 100 * 500 * GIB,
+            'disk.free': (100 - disk_percent) / 100 * 500 * GIB,
+            'disk.percent': disk_percent,
+            'network.connections': 50 + 300 * load + 200 * spikes + rng.normal(0, 10, size),
+            'system.uptime_seconds': uptime,
+            'system.users': 1 + (load > 0.3) + (load > 0.7),
+            'system.processes': 180 + 120 * load + rng.normal(0, 5, size)
+        }
+        for field, rate in COUNTER_RATES.items():
+            # Гамма-распределение: приращения неотрицательны, среднее - rate * activity
+            increments = rng.gamma(4.0, activity * rate * self.step / 4.0)
+            totals = np.cumsum(increments)
+            # После перезагрузки счетчик начинается с приращения ее измерения
+            base = np.where(rebooted, totals[since] - increments[since], -self._counters[field])
+            values[field] = totals - base
+            self._counters[field] = values[field][-1]
+
+        columns = {
+            'timestamp': (t * 1_000_000).astype(np.int64),
+            'system.boot_time': (boot_time * 1_000_000).astype(np.int64)
+        }
+        for field in NUMERIC_FIELDS:
+            if field in INTEGER_FIELDS:
+                columns[field] = np.round(values[field]).astype(np.int64)
+            else:
+                columns[field] = values[field].astype(np.float64)
+        per_core = cpu[:, None] + rng.normal(0, 6, (size, self.cores))
+        columns[PER_CORE_FIELD] = np.clip(per_core, 0, 100).astype(np.float32)
+
+        self._position += size
+        self._boot_time = boot_time[-1]
+        return columns
+
+    def _spikes(self, size: int) -> np.ndarray:
+        """Дополнительная нагрузка от всплесков (0..1), прямоугольные импульсы"""
+        rng = self._rng
+        new_starts = np.flatnonzero(rng.random(size) < self.spikes_per_hour * self.step / 3600)
+        lengths = np.maximum(rng.exponential(SPIKE_SECONDS / self.step, len(new_starts)), 1)
+
+        # Начатые в прошлых блоках всплески действуют с начала блока
+        starts = np.concatenate([np.zeros(len(self._spike_ends), dtype=np.int64), new_starts])
+        ends = np.concatenate([self._spike_ends, new_starts + lengths.astype(np.int64)])
+        amplitudes = np.concatenate([self._spike_amplitudes,
+                                     rng.uniform(0.3, 1.0, len(new_starts))])
+
+        level = np.zeros(size + 1)
+        np.add.at(level, starts, amplitudes)
+        np.add.at(level, np.minimum(ends, size), -amplitudes)
+
+        pending = ends > size
+        self._spike_ends = ends[pending] - size
+        self._spike_amplitudes = amplitudes[pending]
+        return np.minimum(np.cumsum(level[:size]), 1.0)
+
+
+def iter_synthetic(count: int, generator: Optional[SyntheticGenerator] = None,
+                   chunk: int = CHUNK) -> Iterator[Dict[str, Any]]:
+    """count синтетических записей, генерируемых блоками по chunk"""
+    generator = generator or SyntheticGenerator()
+    for offset in range(0, count, chunk):
+        yield from columns_to_records(generator.next_chunk(min(chunk, count - offset)))
+
+
+def write_synthetic(filename: str, count: int,
+                    generator: Optional[SyntheticGenerator] = None) -> int:
+    """Запись синтетического набора: сегмент (.seg) целиком или JSON Lines по блокам"""
+    generator = generator or SyntheticGenerator()
+    if filename.endswith('.seg'):
+        return write_segment(filename, generator.next_chunk(count))
+    with MetricsWriter(filename, CHUNK) as writer:
+        for metric in iter_synthetic(count, generator):
+            writer.write(metric)
+    return count
@@ -5,7 +5,7 @@
 import os
 import json
 from typing import Dict, Any
-from datetime import datetime
+from .schema import parse_datetime
 
 
 class ValidationError(Exception):
@@ -21,12 +21,12 @@ def validate_config(config: Dict[str, Any]) -> bool:
         if section not in config:
             raise ValidationError(f"Отсутствует секция конфигурации: {section}")
     
-    # Проверка путей
-    for path in config['paths'].values():
-        try:
-            os.makedirs(path, exist_ok=True)
-        except Exception as e:
-            raise ValidationError(f"Не удалось создать директорию {path}: {e}")
+    # Проверка путей (директории создаются командами, которые в них пишут)
+    for name, path in config['paths'].items():
+        if not isinstance(path, str) or not path:
+            raise ValidationError(f"Путь {name} должен быть непустой строкой")
+        if os.path.exists(path) and not os.path.isdir(path):
+            raise ValidationError(f"Путь {name} не является директорией: {path}")
     
     # Проверка порогов
     thresholds = config['thresholds']
@@ -44,18 +44,22 @@ def validate_metrics_file(filepath: str) -> bool:
     if not os.path.exists(filepath):
         raise ValidationError(f"Файл не найден: {filepath}")
     
+    # Импорт здесь: загрузчик сам использует валидатор для проверки периодов
+    from .loader import load_dataset
+    
     try:
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-        
-        if not isinstance(data, list):
-            raise ValidationError("Файл метрик должен содержать список")
+        # Файл разбирается через общий кэш, и отчет с графиком
+        # получат тот же разобранный набор данных
+        dataset = load_dataset(filepath)
+        first_item = dataset[0] if len(dataset) else None
         
-        if len(data) == 0:
+        if first_item is None:
             raise ValidationError("Файл метрик пуст")
         
+        if not isinstance(first_item, dict):
+            raise ValidationError("Файл метрик должен содержать список записей")
+        
         # Проверка структуры первой записи
-        first_item = data[0]
         required_keys = ['timestamp', 'cpu', 'memory', 'disk', 'network']
         
         for key in required_keys:
@@ -73,8 +77,8 @@ def validate_metrics_file(filepath: str) -> bool:
 def validate_date_range(start_date: str, end_date: str) -> bool:
     """Валидация диапазона дат"""
     try:
-        start = datetime.fromisoformat(start_date.replace('Z', '+00:00'))
-        end = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
+        start = parse_datetime(start_date)
+        end = parse_datetime(end_date)
         
         if start > end:
             raise ValidationError("Дата начала должна быть раньше даты окончания")
@@ -2,46 +2,182 @@
 Визуализация метрик в виде графиков
 """
 
-import matplotlib.pyplot as plt
+import matplotlib
+import matplotlib.style
 import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
-import json
 import os
-from typing import List, Dict, Any
-from config import get_config
+import numpy as np
+from typing import List, Dict, Any, Tuple, Union
+from config import get_config, ensure_directories
+from .loader import (MetricsDataset, load_dataset, load_file, load_period, as_dataset,
+                     shared_segment)
+from .downsample import downsample_indices
+from .processes import summarize_processes
+from .store import host_root
+
+# Графики строятся без GUI, в том числе в рабочих процессах
+matplotlib.use('Agg')
 
 
 class MetricsVisualizer:
     """Создание графиков и диаграмм"""
     
+    # Разрешение сохраняемых графиков
+    CHART_DPI = 150
+    
+    # Тип графика -> метод построения
+    RENDERERS = {
+        'cpu': '_create_cpu_chart',
+        'memory': '_create_memory_chart',
+        'disk': '_create_disk_chart',
+        'network': '_create_network_chart',
+        'processes': '_create_processes_chart',
+        'all': '_create_comprehensive_chart'
+    }
+    
+    # Графики по полям записей, которых нет в сегментах: строятся в
+    # основном процессе, без передачи данных рабочим через сегмент
+    RECORD_CHARTS = ('processes',)
+    
+    # Ряды для сравнения узлов: тип графика -> (заголовок, единица)
+    HOST_SERIES = {
+        'cpu': ('Загрузка CPU', '%'),
+        'memory': ('Использование памяти', '%'),
+        'disk': ('Использование диска', '%'),
+        'network': ('Сетевая активность (прием + отправка)', 'МБ/с')
+    }
+    
     def __init__(self):
         self.config = get_config()
-        plt.style.use('seaborn-v0_8-darkgrid')
+        matplotlib.style.use('seaborn-v0_8-darkgrid')
         
-    def create_chart(self, metrics_file: str, chart_type: str, 
-                    output_file: str = None) -> str:
+    def create_chart(self, metrics_file: Union[str, MetricsDataset], chart_type: str,
+                    output_file: str = None, start: str = None,
+                    end: str = None) -> str:
         """Создание графика указанного типа"""
-        metrics = self._load_metrics(metrics_file)
-        
-        if chart_type == 'cpu':
-            return self._create_cpu_chart(metrics, output_file)
-        elif chart_type == 'memory':
-            return self._create_memory_chart(metrics, output_file)
-        elif chart_type == 'disk':
-            return self._create_disk_chart(metrics, output_file)
-        elif chart_type == 'network':
-            return self._create_network_chart(metrics, output_file)
-        elif chart_type == 'all':
-            return self._create_comprehensive_chart(metrics, output_file)
-        else:
+        output_files = {chart_type: output_file} if output_file else None
+        return self.create_charts(metrics_file, [chart_type], output_files,
+                                  start, end)[chart_type]
+    
+    def create_charts(self, metrics: Union[str, MetricsDataset, List[Dict]],
+                      chart_types: List[str], output_files: Dict[str, str] = None,
+                      start: str = None, end: str = None,
+                      host: str = None) -> Dict[str, str]:
+        """Создание нескольких графиков, возвращает тип -> путь к файлу
+        
+        metrics - путь к файлу метрик или уже загруженный набор. Графики
+        строятся параллельно в reporting.chart_workers процессах; данные
+        передаются им через сегмент (mmap), без повторного разбора.
+        host - узел из хранилища агрегатора.
+        """
+        for chart_type in chart_types:
+            if chart_type not in self.RENDERERS:
+                raise ValueError(f"Неизвестный тип графика: {chart_type}")
+        
+        if isinstance(metrics, str):
+            metrics = self._load_metrics(metrics, start, end, host)
+        dataset = as_dataset(metrics)
+        output_files = output_files or {}
+        
+        charts = {chart_type: self.render_chart(dataset, chart_type,
+                                                output_files.get(chart_type))
+                  for chart_type in chart_types if chart_type in self.RECORD_CHARTS}
+        chart_types = [t for t in chart_types if t not in self.RECORD_CHARTS]
+        
+        workers = min(len(chart_types),
+                      self.config['reporting']['chart_workers'] or os.cpu_count() or 1)
+        if workers <= 1 or not len(dataset):
+            charts.update({chart_type: self.render_chart(dataset, chart_type,
+                                                         output_files.get(chart_type))
+                           for chart_type in chart_types})
+            return charts
+        
+        with shared_segment(dataset) as source:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = {chart_type: pool.submit(_render_chart, source, chart_type,
+                                                   output_files.get(chart_type))
+                           for chart_type in chart_types}
+                charts.update({chart_type: future.result()
+                               for chart_type, future in futures.items()})
+        return charts
+    
+    def render_chart(self, metrics: List[Dict], chart_type: str,
+                     output_file: str = None) -> str:
+        """Построение графика по уже загруженным метрикам"""
+        if chart_type not in self.RENDERERS:
             raise ValueError(f"Неизвестный тип графика: {chart_type}")
+        if not output_file:
+            ensure_directories(self.config['reporting']['charts_dir'])
+        return getattr(self, self.RENDERERS[chart_type])(metrics, output_file)
+    
+    def create_host_charts(self, hosts: List[str], chart_types: List[str],
+                           output_files: Dict[str, str] = None, start: str = None,
+                           end: str = None) -> Dict[str, str]:
+        """Графики сравнения узлов за период: по линии на узел
+        
+        Возвращает тип -> путь к файлу. Для типа all строится по панели
+        на каждый ряд HOST_SERIES.
+        """
+        datasets = {host: self._load_metrics(None, start, end, host) for host in hosts}
+        datasets = {host: dataset for host, dataset in datasets.items() if len(dataset)}
+        if not datasets:
+            raise ValueError("Нет данных узлов за период")
+        output_files = output_files or {}
+        charts = {}
+        for chart_type in chart_types:
+            if chart_type != 'all' and chart_type not in self.HOST_SERIES:
+                raise ValueError(f"График {chart_type} не поддерживает сравнение узлов")
+            series = list(self.HOST_SERIES) if chart_type == 'all' else [chart_type]
+            
+            fig = Figure(figsize=(15, 10) if len(series) > 1 else (12, 6))
+            axes = fig.subplots(2, 2).flatten() if len(series) > 1 else [fig.subplots()]
+            for ax, name in zip(axes, series):
+                title, unit = self.HOST_SERIES[name]
+                for host, dataset in datasets.items():
+                    timestamps, values = self._plot_series(
+                        ax, dataset, self._host_series(dataset, name))
+                    ax.plot(timestamps, values, linewidth=1.5, label=host)
+                ax.set_title(title, fontsize=12)
+                ax.set_ylabel(unit)
+                ax.legend(fontsize=9)
+                ax.grid(True, alpha=0.3)
+                ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+                ax.tick_params(axis='x', labelrotation=45)
+            
+            fig.suptitle(f'Сравнение узлов: {", ".join(datasets)}', fontsize=14,
+                         fontweight='bold')
+            fig.tight_layout()
+            
+            output_file = output_files.get(chart_type)
+            if not output_file:
+                ensure_directories(self.config['reporting']['charts_dir'])
+                output_file = os.path.join(
+                    self.config['reporting']['charts_dir'],
+                    f'hosts_{chart_type}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png')
+            fig.savefig(output_file, dpi=self.CHART_DPI, bbox_inches='tight')
+            charts[chart_type] = output_file
+        return charts
+    
+    @staticmethod
+    def _host_series(dataset: MetricsDataset, name: str) -> np.ndarray:
+        """Ряд одного узла для графика сравнения"""
+        if name == 'network':
+            rates = dataset.rates
+            return (rates.rate('network.bytes_sent', 1 / (1024**2)) +
+                    rates.rate('network.bytes_recv', 1 / (1024**2)))
+        column = {'cpu': 'cpu.percent_total', 'memory': 'memory.percent',
+                  'disk': 'disk.percent'}[name]
+        return dataset.column(column)
     
     def _create_cpu_chart(self, metrics: List[Dict], output_file: str = None) -> str:
         """График загрузки CPU"""
-        timestamps = [datetime.fromisoformat(m['timestamp']) for m in metrics]
-        cpu_values = [m['cpu']['percent_total'] for m in metrics]
-        
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
+        fig = Figure(figsize=(12, 8))
+        ax1, ax2 = fig.subplots(2, 1)
+        timestamps, cpu_values = self._plot_series(
+            ax1, metrics, as_dataset(metrics).column('cpu.percent_total'))
         
         # Общая загрузка CPU
         ax1.plot(timestamps, cpu_values, 'b-', linewidth=2)
@@ -60,24 +196,24 @@ class MetricsVisualizer:
             ax2.set_ylabel('Загрузка (%)', fontsize=12)
             ax2.set_xticks(cores)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if not output_file:
             output_file = os.path.join(self.config['reporting']['charts_dir'],
                                      f'cpu_chart_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png')
         
-        plt.savefig(output_file, dpi=150, bbox_inches='tight')
-        plt.close()
+        fig.savefig(output_file, dpi=self.CHART_DPI, bbox_inches='tight')
         
         return output_file
     
     def _create_memory_chart(self, metrics: List[Dict], output_file: str = None) -> str:
         """График использования памяти"""
-        timestamps = [datetime.fromisoformat(m['timestamp']) for m in metrics]
-        memory_values = [m['memory']['percent'] for m in metrics]
-        swap_values = [m['memory']['swap_percent'] for m in metrics]
-        
-        fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 8))
+        dataset = as_dataset(metrics)
+        fig = Figure(figsize=(12, 8))
+        ax1, ax2 = fig.subplots(2, 1)
+        timestamps, memory_values, swap_values = self._plot_series(
+            ax1, dataset, dataset.column('memory.percent'),
+            dataset.column('memory.swap_percent'))
         
         # Оперативная память
         ax1.plot(timestamps, memory_values, 'g-', linewidth=2, label='Оперативная память')
@@ -89,7 +225,7 @@ class MetricsVisualizer:
         ax1.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
         
         # Своп память
-        if any(swap > 0 for swap in swap_values):
+        if (swap_values > 0).any():
             ax2.plot(timestamps, swap_values, 'r-', linewidth=2, label='Своп память')
             ax2.fill_between(timestamps, 0, swap_values, alpha=0.3, color='red')
             ax2.set_title('Использование своп памяти', fontsize=14, fontweight='bold')
@@ -102,14 +238,13 @@ class MetricsVisualizer:
                     ha='center', va='center', fontsize=12)
             ax2.axis('off')
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if not output_file:
             output_file = os.path.join(self.config['reporting']['charts_dir'],
                                      f'memory_chart_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png')
         
-        plt.savefig(output_file, dpi=150, bbox_inches='tight')
-        plt.close()
+        fig.savefig(output_file, dpi=self.CHART_DPI, bbox_inches='tight')
         
         return output_file
     
@@ -125,7 +260,8 @@ class MetricsVisualizer:
         sizes = [disk['used'], disk['free']]
         colors = ['#ff9999', '#66b3ff']
         
-        fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 6))
+        fig = Figure(figsize=(12, 6))
+        ax1, ax2 = fig.subplots(1, 2)
         
         # Круговая диаграмма
         ax1.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
@@ -133,111 +269,213 @@ class MetricsVisualizer:
         ax1.set_title(f'Использование диска: {disk["percent"]:.1f}%', 
                      fontsize=14, fontweight='bold')
         
-        # Гистограмма IO
-        io_labels = ['Чтение', 'Запись']
-        io_read = disk['read_bytes'] / (1024**3)  # в GB
-        io_write = disk['write_bytes'] / (1024**3)  # в GB
-        
-        ax2.bar(io_labels, [io_read, io_write], color=['blue', 'orange'])
-        ax2.set_title('Операции ввода-вывода', fontsize=14, fontweight='bold')
-        ax2.set_ylabel('ГБ', fontsize=12)
+        if len(metrics) > 1:
+            # Скорость чтения/записи и IOPS
+            rates = as_dataset(metrics).rates
+            mb = 1 / (1024 ** 2)
+            timestamps, read_mb, write_mb, read_iops, write_iops = self._plot_series(
+                ax2, metrics, rates.rate('disk.read_bytes', mb),
+                rates.rate('disk.write_bytes', mb), rates.rate('disk.read_count'),
+                rates.rate('disk.write_count'))
+            ax2.plot(timestamps, read_mb, 'b-', label='Чтение')
+            ax2.plot(timestamps, write_mb, color='orange', label='Запись')
+            ax2.set_title('Скорость ввода-вывода', fontsize=14, fontweight='bold')
+            ax2.set_ylabel('МБ/с', fontsize=12)
+            ax2.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
+            ax2.tick_params(axis='x', labelrotation=45)
+            
+            iops = ax2.twinx()
+            iops.plot(timestamps, read_iops, 'b:', alpha=0.6, label='IOPS чтения')
+            iops.plot(timestamps, write_iops, ':', color='orange', alpha=0.6,
+                      label='IOPS записи')
+            iops.set_ylabel('IOPS', fontsize=12)
+            iops.grid(False)
+            
+            lines = ax2.get_legend_handles_labels()
+            extra = iops.get_legend_handles_labels()
+            ax2.legend(lines[0] + extra[0], lines[1] + extra[1], fontsize=9)
+        else:
+            # Гистограмма IO
+            io_labels = ['Чтение', 'Запись']
+            io_read = disk['read_bytes'] / (1024**3)  # в GB
+            io_write = disk['write_bytes'] / (1024**3)  # в GB
+            
+            ax2.bar(io_labels, [io_read, io_write], color=['blue', 'orange'])
+            ax2.set_title('Операции ввода-вывода', fontsize=14, fontweight='bold')
+            ax2.set_ylabel('ГБ', fontsize=12)
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if not output_file:
             output_file = os.path.join(self.config['reporting']['charts_dir'],
                                      f'disk_chart_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png')
         
-        plt.savefig(output_file, dpi=150, bbox_inches='tight')
-        plt.close()
+        fig.savefig(output_file, dpi=self.CHART_DPI, bbox_inches='tight')
         
         return output_file
     
     def _create_network_chart(self, metrics: List[Dict], output_file: str = None) -> str:
         """График сетевой активности"""
-        timestamps = [datetime.fromisoformat(m['timestamp']) for m in metrics]
+        fig = Figure(figsize=(12, 6))
+        ax = fig.subplots()
         
-        # Конвертируем байты в мегабайты
-        sent_mb = [m['network']['bytes_sent'] / (1024**2) for m in metrics]
-        recv_mb = [m['network']['bytes_recv'] / (1024**2) for m in metrics]
+        # Скорость по накопительным счетчикам, МБ/с
+        rates = as_dataset(metrics).rates
+        timestamps, sent_mb, recv_mb = self._plot_series(
+            ax, metrics, rates.rate('network.bytes_sent', 1 / (1024**2)),
+            rates.rate('network.bytes_recv', 1 / (1024**2)))
         
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
-        ax.plot(timestamps, sent_mb, 'b-', linewidth=2, label='Отправлено')
-        ax.plot(timestamps, recv_mb, 'g-', linewidth=2, label='Получено')
+        ax.plot(timestamps, sent_mb, 'b-', linewidth=2, label='Отправка')
+        ax.plot(timestamps, recv_mb, 'g-', linewidth=2, label='Прием')
         
         ax.set_title('Сетевая активность', fontsize=14, fontweight='bold')
-        ax.set_ylabel('МБ', fontsize=12)
+        ax.set_ylabel('МБ/с', fontsize=12)
         ax.legend()
         ax.grid(True, alpha=0.3)
         ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M:%S'))
         
-        plt.tight_layout()
+        fig.tight_layout()
         
         if not output_file:
             output_file = os.path.join(self.config['reporting']['charts_dir'],
                                      f'network_chart_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png')
         
-        plt.savefig(output_file, dpi=150, bbox_inches='tight')
-        plt.close()
+        fig.savefig(output_file, dpi=self.CHART_DPI, bbox_inches='tight')
+        
+        return output_file
+    
+    def _create_processes_chart(self, metrics: List[Dict], output_file: str = None) -> str:
+        """Лидеры по загрузке CPU и памяти за период"""
+        processes = summarize_processes(metrics, self.config['metrics'].get('processes_top', 10))
+        if not processes:
+            raise ValueError("Нет данных о процессах (включите metrics.processes)")
+        
+        fig = Figure(figsize=(14, 6))
+        ax1, ax2 = fig.subplots(1, 2)
+        
+        # CPU: среднее за период и пик
+        rows = processes['top_cpu'][::-1]
+        labels = [f"{row['name']} ({row['pid']})" for row in rows]
+        ax1.barh(labels, [row['cpu_max'] for row in rows], color='steelblue', alpha=0.3,
+                 label='Пик')
+        ax1.barh(labels, [row['cpu_mean'] for row in rows], color='steelblue', label='Среднее')
+        ax1.set_title('Загрузка CPU по процессам', fontsize=14, fontweight='bold')
+        ax1.set_xlabel('%', fontsize=12)
+        ax1.legend()
+        
+        # Память: пик резидентной памяти
+        rows = processes['top_memory'][::-1]
+        ax2.barh([f"{row['name']} ({row['pid']})" for row in rows],
+                 [row['rss_max'] / (1024**2) for row in rows], color='green', alpha=0.7)
+        ax2.set_title('Память по процессам (пик RSS)', fontsize=14, fontweight='bold')
+        ax2.set_xlabel('МБ', fontsize=12)
+        
+        fig.tight_layout()
+        
+        if not output_file:
+            output_file = os.path.join(self.config['reporting']['charts_dir'],
+                                     f'processes_chart_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png')
+        
+        fig.savefig(output_file, dpi=self.CHART_DPI, bbox_inches='tight')
         
         return output_file
     
     def _create_comprehensive_chart(self, metrics: List[Dict], output_file: str = None) -> str:
         """Комплексный график всех метрик"""
-        timestamps = [datetime.fromisoformat(m['timestamp']) for m in metrics]
-        
-        fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 10))
+        dataset = as_dataset(metrics)
+        fig = Figure(figsize=(15, 10))
+        (ax1, ax2), (ax3, ax4) = fig.subplots(2, 2)
         
         # CPU
-        cpu_values = [m['cpu']['percent_total'] for m in metrics]
+        timestamps, cpu_values = self._plot_series(
+            ax1, dataset, dataset.column('cpu.percent_total'))
         ax1.plot(timestamps, cpu_values, 'r-', linewidth=1.5)
         ax1.set_title('Загрузка CPU', fontsize=12)
         ax1.set_ylabel('%')
         ax1.grid(True, alpha=0.3)
         
         # Memory
-        memory_values = [m['memory']['percent'] for m in metrics]
+        timestamps, memory_values = self._plot_series(
+            ax2, dataset, dataset.column('memory.percent'))
         ax2.plot(timestamps, memory_values, 'g-', linewidth=1.5)
         ax2.set_title('Использование памяти', fontsize=12)
         ax2.set_ylabel('%')
         ax2.grid(True, alpha=0.3)
         
         # Disk
-        disk_values = [m['disk']['percent'] for m in metrics]
+        timestamps, disk_values = self._plot_series(
+            ax3, dataset, dataset.column('disk.percent'))
         ax3.plot(timestamps, disk_values, 'b-', linewidth=1.5)
         ax3.set_title('Использование диска', fontsize=12)
         ax3.set_ylabel('%')
         ax3.grid(True, alpha=0.3)
         
         # Network
-        network_sent = [m['network']['bytes_sent'] / (1024**2) for m in metrics]
-        network_recv = [m['network']['bytes_recv'] / (1024**2) for m in metrics]
-        ax4.plot(timestamps, network_sent, 'orange', linewidth=1.5, label='Отправлено')
-        ax4.plot(timestamps, network_recv, 'purple', linewidth=1.5, label='Получено')
+        rates = dataset.rates
+        timestamps, network_sent, network_recv = self._plot_series(
+            ax4, dataset, rates.rate('network.bytes_sent', 1 / (1024**2)),
+            rates.rate('network.bytes_recv', 1 / (1024**2)))
+        ax4.plot(timestamps, network_sent, 'orange', linewidth=1.5, label='Отправка')
+        ax4.plot(timestamps, network_recv, 'purple', linewidth=1.5, label='Прием')
         ax4.set_title('Сетевая активность', fontsize=12)
-        ax4.set_ylabel('МБ')
+        ax4.set_ylabel('МБ/с')
         ax4.legend(fontsize=10)
         ax4.grid(True, alpha=0.3)
         
         # Форматирование осей времени
         for ax in [ax1, ax2, ax3, ax4]:
             ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
-            plt.setp(ax.xaxis.get_majorticklabels(), rotation=45)
+            ax.tick_params(axis='x', labelrotation=45)
         
-        plt.suptitle('Комплексный отчет о производительности', fontsize=16, fontweight='bold')
-        plt.tight_layout()
+        fig.suptitle('Комплексный отчет о производительности', fontsize=16, fontweight='bold')
+        fig.tight_layout()
         
         if not output_file:
             output_file = os.path.join(self.config['reporting']['charts_dir'],
                                      f'comprehensive_{datetime.now().strftime("%Y%m%d_%H%M%S")}.png')
         
-        plt.savefig(output_file, dpi=150, bbox_inches='tight')
-        plt.close()
+        fig.savefig(output_file, dpi=self.CHART_DPI, bbox_inches='tight')
         
         return output_file
     
-    def _load_metrics(self, metrics_file: str) -> List[Dict]:
-        """Загрузка метрик из файла"""
-        with open(metrics_file, 'r') as f:
-            return json.load(f)
\ No newline at end of file
+    def _plot_series(self, ax, metrics: List[Dict], *series: np.ndarray) -> Tuple:
+        """Метки времени и ряды, прореженные до ширины оси в пикселях
+        
+        Возвращает (timestamps, *series). Число точек определяется
+        размером графика, а не длиной периода.
+        """
+        dataset = as_dataset(metrics)
+        indices = downsample_indices(dataset.timestamps, series,
+                                     self._axis_pixels(ax),
+                                     self.config['reporting']['downsample'])
+        if indices is None:
+            return (dataset.datetimes,) + series
+        return (dataset.datetimes[indices],) + tuple(
+            np.asarray(values)[indices] for values in series)
+    
+    def _axis_pixels(self, ax) -> int:
+        """Ширина области построения в пикселях сохраняемого файла"""
+        return int(ax.get_position().width * ax.figure.get_figwidth() * self.CHART_DPI)
+    
+    def _load_metrics(self, metrics_file: str, start: str = None,
+                      end: str = None, host: str = None) -> MetricsDataset:
+        """Загрузка метрик из файла или из хранилища за период
+        
+        Для длинных периодов читаются агрегаты самого грубого уровня,
+        который дает не меньше reporting.max_points точек. host - узел,
+        принятый агрегатором (только для периода из хранилища).
+        """
+        rollups = self.config['rollups']
+        tiers = rollups['tiers'] if rollups['enabled'] else []
+        max_points = self.config['reporting']['max_points']
+        root = self.config['paths']['store']
+        if host:
+            root = host_root(root, host)
+        if start:
+            return load_period(root, start, end, tiers, max_points)
+        return load_file(metrics_file, tiers, max_points)
+
+
+def _render_chart(source: str, chart_type: str, output_file: str = None) -> str:
+    """Построение графика в рабочем процессе по сегменту source"""
+    return MetricsVisualizer().render_chart(load_dataset(source), chart_type, output_file)
\ No newline at end of file
@@ -0,0 +1,38 @@
+"""
+Общие настройки тестов: модули проекта импортируются из корня проекта
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+
+START = datetime(2026, 1, 1, 12, 0, 0)
+
+
+def make_metric(seconds: float, cpu: float = 10.0, **groups) -> dict:
+    """Запись измерения через seconds секунд после START"""
+    metric = {
+        'timestamp': (START + timedelta(seconds=seconds)).isoformat(),
+        'cpu': {'percent_total': cpu, 'cores': 1, 'percent_per_core': [cpu]},
+        'memory': {'percent': 50.0},
+        'disk': {'percent': 40.0, 'read_bytes': int(seconds * 1000)},
+        'system': {'uptime_seconds': 1000.0 + seconds}
+    }
+    for group, values in groups.items():
+        metric.setdefault(group, {}).update(values)
+    return metric
+
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Временная рабочая директория (относительные пути конфигурации - в ней)"""
+    monkeypatch.chdir(tmp_path)
+    # Уже созданные директории запоминаются по относительным путям
+    monkeypatch.setattr(config, '_created_directories', set())
+    return tmp_path
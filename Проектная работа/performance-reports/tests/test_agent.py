@@ -0,0 +1,113 @@
+"""
+Агент и агрегатор на localhost: доставка, повторы, спул при 503
+"""
+
+import queue
+import time
+from zoneinfo import ZoneInfo
+
+import pytest
+
+from conftest import START, make_metric
+from src.agent import MetricsAgent, encode_batch
+from src.aggregator import MetricsAggregator
+from src.schema import parse_timestamp
+from src.store import MetricsStore, host_root, partition_key
+
+
+@pytest.fixture
+def aggregator(workdir):
+    server = MetricsAggregator('127.0.0.1', 0)
+    server.start()
+    yield server
+    server.stop()
+
+
+def make_agent(aggregator):
+    host, port = aggregator.address
+    return MetricsAgent(f"http://{host}:{port}/ingest", 'web1')
+
+
+def stored(aggregator):
+    aggregator.stop()
+    return list(MetricsStore(host_root(aggregator.root, 'web1')).iter_range(START))
+
+
+def busy(*args, **kwargs):
+    raise queue.Full
+
+
+@pytest.fixture
+def set_zone(monkeypatch):
+    """Смена часового пояса процесса (восстанавливается после теста)"""
+    def apply(name):
+        monkeypatch.setenv('TZ', name)
+        time.tzset()
+    yield apply
+    monkeypatch.undo()
+    time.tzset()
+
+
+def test_round_trip(aggregator):
+    with make_agent(aggregator) as agent:
+        for second in range(5):
+            agent(make_metric(second))
+    
+    assert agent.stats['sent'] == 1
+    assert agent.spool_size() == (0, 0)
+    records = stored(aggregator)
+    assert [m['timestamp'] for m in records] == [make_metric(s)['timestamp'] for s in range(5)]
+    assert {m['host'] for m in records} == {'web1'}
+
+
+def test_duplicate_batch_id_is_skipped(aggregator):
+    agent = make_agent(aggregator)
+    payload = encode_batch([make_metric(0), make_metric(1)])
+    assert agent._send(payload)
+    assert agent._send(payload)
+    
+    assert aggregator.stats['duplicates'] == 1
+    assert aggregator.stats['records'] == 2
+    assert len(stored(aggregator)) == 2
+
+
+def test_busy_aggregator_spools_then_drains(aggregator):
+    aggregator._queue.put_nowait = busy
+    with make_agent(aggregator) as agent:
+        for second in range(3):
+            agent(make_metric(second))
+    
+    assert aggregator.stats['throttled'] == 1
+    assert agent.stats['failures'] == 1
+    assert agent.spool_size()[0] == 1
+    
+    # Агрегатор снова принимает: новый запуск агента выгружает спул
+    del aggregator._queue.put_nowait
+    with make_agent(aggregator) as agent:
+        deadline = time.monotonic() + 10
+        while agent.spool_size()[0] and time.monotonic() < deadline:
+            time.sleep(0.05)
+    
+    assert agent.stats['resent'] == 1
+    assert agent.spool_size() == (0, 0)
+    assert len(stored(aggregator)) == 3
+
+
+def test_agent_in_other_time_zone(aggregator, set_zone):
+    # Агент в Токио: START - местное время узла
+    set_zone('Asia/Tokyo')
+    agent = make_agent(aggregator)
+    for second in range(3):
+        agent(make_metric(second))
+    
+    # Агрегатор в Нью-Йорке получает пакет уже в своем поясе
+    set_zone('America/New_York')
+    with agent:
+        pass
+    
+    epoch = START.replace(tzinfo=ZoneInfo('Asia/Tokyo')).timestamp()
+    aggregator.stop()
+    records = list(MetricsStore(host_root(aggregator.root, 'web1')).iter_range())
+    assert [parse_timestamp(m['timestamp']) for m in records] == [epoch, epoch + 1, epoch + 2]
+    keys = [p['key'] for p in MetricsStore(host_root(aggregator.root, 'web1')).partitions()]
+    assert keys == [partition_key(epoch)]
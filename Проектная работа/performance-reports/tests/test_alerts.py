@@ -0,0 +1,45 @@
+"""
+Оповещения: окно длительности и гистерезис закрытия
+"""
+
+from conftest import START, make_metric
+from src.alerts import AlertRule, evaluate_incidents
+from src.loader import MetricsDataset
+
+RULE = {'name': 'cpu_high', 'field': 'cpu.percent_total', 'above': 80,
+        'for': 30, 'clear_below': 70, 'clear_after': 20}
+
+
+def run(rule, values):
+    """События правила по ряду значений с шагом 10 секунд"""
+    epoch = START.timestamp()
+    events = [rule.update(epoch + 10 * i, value) for i, value in enumerate(values)]
+    return [(i, event['event']) for i, event in enumerate(events) if event]
+
+
+def test_short_spike_does_not_open():
+    rule = AlertRule.from_config(RULE)
+    assert run(rule, [50, 95, 95, 95, 50, 50]) == []
+    assert not rule.active
+
+
+def test_hysteresis_keeps_alert_open():
+    rule = AlertRule.from_config(RULE)
+    # Открытие через 30 сек выше порога; 75 - ниже порога, но выше
+    # clear_below, и одно измерение ниже 70 не закрывает оповещение
+    values = [90, 90, 90, 90, 75, 75, 65, 85, 65, 65, 65, 50]
+    assert run(rule, values) == [(3, 'open'), (10, 'close')]
+    assert not rule.active
+
+
+def test_period_incidents_match_streaming():
+    values = [50, 90, 90, 90, 90, 75, 65, 65, 65, 50, 95, 95, 95, 95]
+    metrics = [make_metric(10 * i, cpu=value) for i, value in enumerate(values)]
+    incidents = evaluate_incidents(MetricsDataset(metrics), [RULE])
+    
+    assert len(incidents) == 2
+    closed, still_open = incidents
+    assert closed['start'] == metrics[1]['timestamp']
+    assert closed['end'] == metrics[6]['timestamp']
+    assert closed['seconds'] == 50 and closed['peak'] == 90
+    assert still_open['start'] == metrics[10]['timestamp'] and still_open['end'] is None
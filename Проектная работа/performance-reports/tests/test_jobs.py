@@ -0,0 +1,96 @@
+"""
+Расписание задач: сроки запусков, догоняющий запуск, лимит одновременных
+"""
+
+import asyncio
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time
+
+import pytest
+
+from src import jobs
+from src.jobs import JobRunner, last_missed_run, next_run
+
+CONFIG = {'scheduling': {'daily_time': time(9, 0), 'weekly_day': 'monday'}}
+
+
+@pytest.mark.parametrize('frequency, after, expected', [
+    ('hourly', datetime(2026, 1, 1, 23, 30), datetime(2026, 1, 2, 0, 0)),
+    ('hourly', datetime(2026, 1, 1, 12, 0), datetime(2026, 1, 1, 13, 0)),
+    ('daily', datetime(2026, 1, 1, 8, 59), datetime(2026, 1, 1, 9, 0)),
+    ('daily', datetime(2026, 1, 1, 9, 0), datetime(2026, 1, 2, 9, 0)),
+    ('daily', datetime(2026, 1, 31, 10, 0), datetime(2026, 2, 1, 9, 0)),
+    # 1 января 2026 - четверг
+    ('weekly', datetime(2026, 1, 1, 12, 0), datetime(2026, 1, 5, 9, 0)),
+    ('weekly', datetime(2026, 1, 5, 8, 0), datetime(2026, 1, 5, 9, 0)),
+    ('weekly', datetime(2026, 1, 5, 9, 0), datetime(2026, 1, 12, 9, 0)),
+    ('weekly', datetime(2025, 12, 30, 9, 0), datetime(2026, 1, 5, 9, 0)),
+])
+def test_next_run(frequency, after, expected):
+    assert next_run(frequency, after, CONFIG) == expected
+
+
+def test_last_missed_run():
+    last = datetime(2026, 1, 1, 9, 0)
+    assert last_missed_run('daily', last, datetime(2026, 1, 4, 10, 0), CONFIG) == \
+        datetime(2026, 1, 4, 9, 0)
+    assert last_missed_run('daily', last, datetime(2026, 1, 2, 8, 0), CONFIG) is None
+    assert last_missed_run('weekly', datetime(2025, 12, 29, 9, 0),
+                           datetime(2026, 1, 13, 0, 0), CONFIG) == datetime(2026, 1, 12, 9, 0)
+
+
+class FakeClock(datetime):
+    """datetime с зафиксированным текущим временем"""
+    
+    current = datetime(2026, 1, 1, 12, 30)
+    
+    @classmethod
+    def now(cls, tz=None):
+        return cls.current
+
+
+def test_catch_up_runs_missed_job_once(workdir, monkeypatch):
+    monkeypatch.setattr(jobs, 'datetime', FakeClock)
+    workdir.joinpath('data').mkdir()
+    workdir.joinpath('data', 'jobs_state.json').write_text(
+        json.dumps({'hourly': '2026-01-01T10:00:00'}), encoding='utf-8')
+    calls = []
+    runner = JobRunner(['hourly'], lambda frequency, due: calls.append((frequency, due)))
+    
+    async def run_until_called():
+        task = asyncio.create_task(runner.run())
+        for _ in range(500):
+            if runner.history:
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    
+    asyncio.run(run_until_called())
+    # Пропущены 11:00 и 12:00, выполняется один - последний
+    assert calls == [('hourly', datetime(2026, 1, 1, 12, 0))]
+    record, = runner.history
+    assert record['catch_up'] and record['status'] == 'ok'
+    assert record['lag'] == 30 * 60
+    state = json.loads(workdir.joinpath('data', 'jobs_state.json').read_text(encoding='utf-8'))
+    assert state == {'hourly': '2026-01-01T12:00:00'}
+
+
+def test_run_skipped_when_limit_reached(workdir):
+    release = threading.Event()
+    runner = JobRunner(['hourly'], lambda frequency, due: release.wait(5))
+    runner._executor = ThreadPoolExecutor(max_workers=2)
+    
+    async def overlapping_runs():
+        first = asyncio.create_task(runner._run('hourly', datetime(2026, 1, 1, 12), False))
+        await asyncio.sleep(0.05)
+        await runner._run('hourly', datetime(2026, 1, 1, 13), False)
+        release.set()
+        await first
+    
+    asyncio.run(overlapping_runs())
+    runner._executor.shutdown()
+    assert [record['status'] for record in runner.history] == ['skipped', 'ok']
@@ -0,0 +1,33 @@
+"""
+Скорости накопительных счетчиков: сбросы и перезагрузки
+"""
+
+import numpy as np
+
+from conftest import make_metric
+from src.rates import RateEngine, counter_rate
+
+
+def test_counter_decrease_is_reset():
+    timestamps = np.array([0.0, 1.0, 2.0, 4.0])
+    values = np.array([100.0, 300.0, 50.0, 250.0])
+    rates = counter_rate(timestamps, values)
+    
+    assert np.isnan(rates[0])
+    # После сброса отсчет ведется от нуля: 50 за секунду, а не -250
+    assert rates[1:].tolist() == [200.0, 50.0, 100.0]
+
+
+def test_reboot_detected_by_uptime():
+    metrics = [make_metric(second) for second in range(4)]
+    # Перезагрузка между 2 и 3: счетчик успел вырасти выше прежнего
+    metrics[3]['disk']['read_bytes'] = 5000
+    metrics[3]['system']['uptime_seconds'] = 1.0
+    engine = RateEngine.from_records(metrics)
+    
+    rates = engine.rate('disk.read_bytes')
+    assert rates[1:].tolist() == [1000.0, 1000.0, 5000.0]
+    assert engine.rate('disk.read_bytes') is rates
+    assert not rates.flags.writeable
+    assert engine.summary('disk.read_bytes', 1 / 1000) == {'mean': 7 / 3, 'max': 5.0,
+                                                          'last': 5.0}
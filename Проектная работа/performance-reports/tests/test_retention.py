@@ -0,0 +1,80 @@
+"""
+Очистка хранилища: пробный проход, свертка перед удалением, сжатие
+"""
+
+import os
+from datetime import timedelta
+
+import pytest
+
+from conftest import START, make_metric
+from src.retention import RetentionEngine
+from src.rollups import store_tier_path
+from src.storage import load_metrics
+from src.store import MetricsStore, partition_key
+
+
+@pytest.fixture
+def store(workdir):
+    """Хранилище с двумя минутами измерений в одном часе"""
+    store = MetricsStore('data/store')
+    with store.writer() as writer:
+        for second in range(0, 120, 10):
+            writer.write(make_metric(second, cpu=float(second)))
+    return store
+
+
+def partition_files(store):
+    return [os.path.join(store.root, p['path']) for p in store.partitions()]
+
+
+def test_dry_run_deletes_nothing(store):
+    files = partition_files(store)
+    index = store.load_index()
+    
+    result = RetentionEngine(now=START + timedelta(days=10), dry_run=True).run()
+    assert result['deleted'] == 1
+    assert all(os.path.exists(path) for path in files)
+    assert store.load_index() == index
+    assert not os.path.exists(os.path.join(store.root, 'rollups'))
+
+
+def test_partition_rolled_up_before_delete(store):
+    path, = partition_files(store)
+    
+    result = RetentionEngine(now=START + timedelta(days=10)).run()
+    assert result['deleted'] == 1 and result['rolled_up'] == 1
+    assert not os.path.exists(path)
+    assert store.partitions() == []
+    
+    rows = load_metrics(store_tier_path(store.root, 60, START.isoformat()))
+    assert [row['rollup']['count'] for row in rows] == [6, 6]
+    assert rows[1]['rollup']['max']['cpu.percent_total'] == 110.0
+
+
+def test_open_partition_is_skipped(store):
+    path, = partition_files(store)
+    store.mark_open(partition_key(START.timestamp()))
+    
+    result = RetentionEngine(now=START + timedelta(days=10)).run()
+    assert result['deleted'] == 0 and result['compressed'] == 0
+    assert os.path.exists(path)
+
+
+def test_compress_updates_index_before_removing_jsonl(store, monkeypatch):
+    path, = partition_files(store)
+    key = partition_key(START.timestamp())
+    remove = os.remove
+    seen = []
+    
+    def checked_remove(target):
+        if target == path:
+            seen.append(store.load_index()[key]['path'])
+        remove(target)
+    
+    monkeypatch.setattr(os, 'remove', checked_remove)
+    result = RetentionEngine(now=START + timedelta(days=2)).run()
+    assert result['compressed'] == 1
+    assert seen == [store.partition_path(key, '.seg')]
+    assert not os.path.exists(path)
+    assert len(list(store.iter_range())) == 12
@@ -0,0 +1,47 @@
+"""
+Агрегаты 1m/5m/1h: перезапуски не дублируют строки интервалов
+"""
+
+import os
+
+from conftest import make_metric
+from src.rollups import RollupManager, RollupWriter
+from src.storage import load_metrics
+
+
+def run(metrics_file, seconds, cpu=10.0):
+    manager = RollupManager(RollupWriter.for_file(metrics_file), tiers=(60,))
+    for second in seconds:
+        manager.add(make_metric(second, cpu))
+    manager.close()
+
+
+def test_restart_continues_open_bucket(workdir):
+    metrics_file = str(workdir / 'm.jsonl')
+    run(metrics_file, [0, 10, 20], cpu=10.0)
+    run(metrics_file, [30, 40], cpu=60.0)
+    
+    rows = load_metrics(str(workdir / 'm.1m.jsonl'))
+    assert len(rows) == 1
+    assert rows[0]['rollup']['count'] == 5
+    assert rows[0]['cpu']['percent_total'] == 30.0
+    assert rows[0]['rollup']['min']['cpu.percent_total'] == 10.0
+    assert rows[0]['rollup']['max']['cpu.percent_total'] == 60.0
+    
+    # Следующая минута закрывает продолженный интервал без новой строки
+    run(metrics_file, [70])
+    rows = load_metrics(str(workdir / 'm.1m.jsonl'))
+    assert [row['rollup']['count'] for row in rows] == [5, 1]
+
+
+def test_restart_without_state_merges_rows(workdir):
+    metrics_file = str(workdir / 'm.jsonl')
+    run(metrics_file, [0, 10, 20], cpu=10.0)
+    os.remove(workdir / 'm.rollups.json')
+    run(metrics_file, [30], cpu=50.0)
+    
+    rows = load_metrics(str(workdir / 'm.1m.jsonl'))
+    assert len(rows) == 1
+    assert rows[0]['rollup']['count'] == 4
+    assert rows[0]['cpu']['percent_total'] == 20.0
+    assert rows[0]['rollup']['max']['cpu.percent_total'] == 50.0
@@ -0,0 +1,102 @@
+"""
+Бинарные сегменты: восстановление записей без потерь
+"""
+
+import json
+import os
+from datetime import timedelta
+
+import numpy as np
+
+from conftest import START, make_metric
+from src.loader import load_dataset
+from src.retention import RetentionEngine
+from src.segment import Segment, extras_path, write_records
+from src.storage import convert_to_segment, load_metrics
+from src.store import MetricsStore
+
+
+def test_round_trip_through_mmap_columns(tmp_path):
+    metrics = [make_metric(second, cpu=second * 1.5) for second in range(100)]
+    source = tmp_path / 'metrics_daily.json'
+    source.write_text(json.dumps(metrics), encoding='utf-8')
+    
+    target, rows = convert_to_segment(str(source))
+    assert target == str(tmp_path / 'metrics_daily.seg') and rows == 100
+    
+    with Segment(target) as segment:
+        expected = [make_metric(s)['timestamp'] for s in range(100)]
+        assert segment.timestamps().tolist() == [START.timestamp() + s for s in range(100)]
+        # Счетчик хранится разностями, читается накопленным
+        assert segment.raw_column('disk.read_bytes')[1:].tolist() == [1000] * 99
+        assert segment.column('disk.read_bytes').tolist() == [s * 1000 for s in range(100)]
+        assert segment.column('cpu.percent_total').dtype == np.float64
+        assert not segment.column('cpu.percent_total').flags.writeable
+        
+        restored = segment.to_records()
+    assert [m['timestamp'] for m in restored] == expected
+    for original, record in zip(metrics, restored):
+        assert record['cpu']['percent_total'] == original['cpu']['percent_total']
+        assert record['cpu']['percent_per_core'] == original['cpu']['percent_per_core']
+        assert record['cpu']['cores'] == 1
+        assert record['disk']['read_bytes'] == original['disk']['read_bytes']
+        assert record['system']['uptime_seconds'] == original['system']['uptime_seconds']
+
+
+def annotated_metrics():
+    metrics = [make_metric(second, cpu=10.0 + second) for second in range(5)]
+    metrics[1]['anomalies'] = [{'field': 'cpu.percent_total', 'z': 4.2,
+                                'value': 11.0, 'mean': 5.0}]
+    metrics[2]['processes'] = {'top_cpu': [{'pid': 1, 'name': 'init', 'cpu': 1.5}]}
+    metrics[3]['stale'] = ['disk_io']
+    metrics[4]['host'] = 'web1'
+    metrics[4]['disk']['read_bytes'] = None
+    return metrics
+
+
+def test_extras_and_null_integers_survive(tmp_path):
+    metrics = annotated_metrics()
+    target = str(tmp_path / 'm.seg')
+    assert write_records(target, metrics) == len(metrics)
+    assert os.path.exists(extras_path(target))
+    
+    restored = load_metrics(target)
+    assert restored[1]['anomalies'] == metrics[1]['anomalies']
+    assert restored[2]['processes'] == metrics[2]['processes']
+    assert restored[3]['stale'] == ['disk_io']
+    assert restored[4]['host'] == 'web1'
+    assert restored[4]['disk']['read_bytes'] is None
+    assert restored[3]['disk']['read_bytes'] == 3000
+    
+    dataset = load_dataset(target)
+    assert not dataset.numeric_only
+    assert dataset.stale('disk_io').tolist() == [False, False, False, True, False]
+    read_bytes = dataset.column('disk.read_bytes')
+    assert read_bytes[3] == 3000 and read_bytes[4] != read_bytes[4]
+
+
+def test_numeric_records_have_no_side_file(tmp_path):
+    target = str(tmp_path / 'm.seg')
+    write_records(target, [make_metric(second) for second in range(3)])
+    assert not os.path.exists(extras_path(target))
+    with Segment(target) as segment:
+        assert segment.nulls('disk.read_bytes') is None
+        assert 'disk.read_bytes:null' not in segment.fields
+
+
+def test_compressed_partition_keeps_annotations(workdir):
+    metrics = annotated_metrics()
+    store = MetricsStore('data/store')
+    with store.writer() as writer:
+        for metric in metrics:
+            writer.write(metric)
+    
+    engine = RetentionEngine(now=START + timedelta(days=2))
+    assert engine.run()['compressed'] == 1
+    path, = [p['path'] for p in store.partitions()]
+    assert path.endswith('.seg')
+    
+    restored = list(store.iter_range(START, START + timedelta(minutes=1)))
+    assert restored == load_metrics(os.path.join(store.root, path))
+    assert restored[1]['anomalies'] == metrics[1]['anomalies']
+    assert restored[4]['host'] == 'web1'
@@ -0,0 +1,55 @@
+"""
+Статистика за период: объединение пачек по Чану и пометка агрегатов
+"""
+
+import numpy as np
+import pytest
+
+from conftest import make_metric
+from src.stats import PeriodStats, compute_period_stats
+
+
+def test_chunked_merge_matches_numpy():
+    rng = np.random.default_rng(1)
+    values = rng.normal(50, 10, (10_000, 3))
+    values[rng.random(values.shape) < 0.05] = np.nan
+    timestamps = np.arange(len(values), dtype=np.float64)
+    
+    stats = PeriodStats(('a.x', 'a.y', 'a.z'), exact_limit=0)
+    for start in range(0, len(values), 777):
+        stats.update(timestamps[start:start + 777], values[start:start + 777])
+    result = stats.result()['fields']
+    
+    for i, field in enumerate(('a.x', 'a.y', 'a.z')):
+        column = values[:, i]
+        assert result[field]['count'] == np.count_nonzero(~np.isnan(column))
+        assert result[field]['mean'] == pytest.approx(np.nanmean(column))
+        assert result[field]['std'] == pytest.approx(np.nanstd(column, ddof=1))
+        assert result[field]['min'] == np.nanmin(column)
+        assert result[field]['max'] == np.nanmax(column)
+        # Скетч с относительной погрешностью 1%
+        assert result[field]['p95'] == pytest.approx(np.nanpercentile(column, 95), rel=0.02)
+
+
+def test_time_above_threshold():
+    metrics = [make_metric(second, cpu=95.0 if 10 <= second < 20 else 5.0)
+               for second in range(40)]
+    result = compute_period_stats(metrics, {'cpu_warning': 80})
+    assert result['duration_seconds'] == 40
+    assert result['time_above']['cpu_warning']['seconds'] == 10
+    assert result['resolution'] is None
+
+
+def test_rollup_rows_marked_approximate():
+    rows = []
+    for minute in range(3):
+        row = make_metric(minute * 60, cpu=20.0)
+        row['rollup'] = {'resolution': 60, 'count': 60,
+                         'min': {'cpu.percent_total': 1.0},
+                         'max': {'cpu.percent_total': 99.0},
+                         'p95': {'cpu.percent_total': 90.0}}
+        rows.append(row)
+    result = compute_period_stats(rows, fields=('cpu.percent_total',))
+    assert result['resolution'] == 60
+    assert result['fields']['cpu.percent_total']['min'] == 1.0
+    assert result['fields']['cpu.percent_total']['max'] == 99.0
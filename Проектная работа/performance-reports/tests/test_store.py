@@ -0,0 +1,41 @@
+"""
+Хранилище по часам: сегменты, границы в индексе, выборка за период
+"""
+
+import os
+from datetime import timedelta
+
+from conftest import START, make_metric
+from src.store import MetricsStore, partition_key
+
+
+def test_range_reads_only_overlapping_partitions(workdir):
+    store = MetricsStore('data/store')
+    # 10:50 - 13:10 с шагом 10 минут: четыре часовых сегмента
+    seconds = range(-70 * 60, 71 * 60, 10 * 60)
+    with store.writer() as writer:
+        for second in seconds:
+            writer.write(make_metric(second))
+    
+    epochs = [START.timestamp() + s for s in seconds]
+    index = store.load_index()
+    assert sorted(index) == sorted({partition_key(epoch) for epoch in epochs})
+    assert len(index) == 4
+    for key, entry in index.items():
+        hour = [epoch for epoch in epochs if partition_key(epoch) == key]
+        assert (entry['start'], entry['end'], entry['rows']) == (hour[0], hour[-1], len(hour))
+        assert entry['path'] == store.partition_path(key)
+    
+    # 12:05 - 12:25 пересекается только с одним часом
+    start, end = START + timedelta(minutes=5), START + timedelta(minutes=25)
+    files = store.range_files(start, end)
+    key = partition_key(START.timestamp())
+    assert files == [os.path.join(store.root, store.partition_path(key))]
+    records = list(store.iter_range(start, end))
+    assert [r['timestamp'] for r in records] == [make_metric(600)['timestamp'],
+                                                 make_metric(1200)['timestamp']]
+    
+    # Период через границу часа читает записи обоих сегментов
+    records = list(store.iter_range(START - timedelta(minutes=15), START))
+    assert [r['timestamp'] for r in records] == [make_metric(-600)['timestamp'],
+                                                 make_metric(0)['timestamp']]